@@ -1,21 +1,139 @@
 import os
+import sys
 from pathlib import Path
+from argparse import ArgumentParser
 import signal
 
-from ambrogio.cli.start import start
-from ambrogio.cli.prompt import Prompt, ask_for_interrupt
 from ambrogio.environment import get_closest_ini
-from ambrogio.utils.project import create_project
-from ambrogio.utils.threading import pause_event
+
+# The modules of the commands are imported only when the commands are
+# executed, so each command only pays for the dependencies it needs
 
 
 available_commands = {
     'init': 'Create a new project',
     'create': 'Create a new procedure',
-    'start': 'Start the project'
+    'start': 'Start the project',
+    'list': 'List the procedures of the project',
+    'run': 'Run a procedure without prompts',
+    'batch': 'Run more procedures at the same time',
+    'sweep': 'Run a procedure with combinations of parameter values',
+    'report': 'Write a performance report of the runs of a procedure'
 }
 
 
+def get_parser() -> ArgumentParser:
+    """
+    Get the parser of the command-line arguments.
+
+    :return: An ArgumentParser object.
+    """
+
+    parser = ArgumentParser(prog = 'ambrogio')
+    subparsers = parser.add_subparsers(dest = 'command')
+
+    start_parser = subparsers.add_parser(
+        'start',
+        help = available_commands['start']
+    )
+    start_parser.add_argument(
+        '-w',
+        '--watch',
+        action = 'store_true',
+        help = 'Keep the session open, reloading the changed procedures'
+    )
+    subparsers.add_parser('list', help = available_commands['list'])
+
+    run_parser = subparsers.add_parser('run', help = available_commands['run'])
+    run_parser.add_argument(
+        'procedure',
+        help = 'The name of the procedure to run'
+    )
+    run_parser.add_argument(
+        '-p', '--param',
+        action = 'append',
+        default = [],
+        help = 'The value of a parameter, like "name=value"'
+    )
+    run_parser.add_argument(
+        '-f', '--params-file',
+        help = 'A JSON file with an object of parameter values'
+    )
+
+    batch_parser = subparsers.add_parser(
+        'batch',
+        help = available_commands['batch']
+    )
+    batch_parser.add_argument(
+        'procedures',
+        nargs = '*',
+        help = 'The names of the procedures to run'
+    )
+    batch_parser.add_argument(
+        '-f', '--jobs-file',
+        help = 'A JSON file with a list of procedure names or objects with'
+            ' "procedure" and "params" keys'
+    )
+
+    sweep_parser = subparsers.add_parser(
+        'sweep',
+        help = available_commands['sweep']
+    )
+    sweep_parser.add_argument(
+        'procedure',
+        help = 'The name of the procedure to run'
+    )
+    sweep_parser.add_argument(
+        '-p', '--param',
+        action = 'append',
+        default = [],
+        help = 'The values of a parameter, like "name=1,2,5..10"'
+    )
+
+    for subparser in (batch_parser, sweep_parser):
+        subparser.add_argument(
+            '-j', '--max-concurrency',
+            type = int,
+            help = 'The maximum number of procedures running at the same time'
+        )
+        subparser.add_argument(
+            '-e', '--executor',
+            choices = ('thread', 'process'),
+            default = 'thread',
+            help = 'Run the procedures in threads or in worker processes'
+        )
+
+    report_parser = subparsers.add_parser(
+        'report',
+        help = available_commands['report']
+    )
+    report_parser.add_argument(
+        'procedure',
+        help = 'The name of the procedure'
+    )
+    report_parser.add_argument(
+        '-o', '--output',
+        help = 'The path to the HTML report'
+    )
+    report_parser.add_argument(
+        '-b', '--baseline',
+        help = 'The id of the run to compare the last run with'
+    )
+    report_parser.add_argument(
+        '-t', '--threshold',
+        type = float,
+        default = 0.2,
+        help = 'The relative increase to report, like 0.2 for 20 %%'
+    )
+    report_parser.add_argument(
+        '--fail-on-regression',
+        action = 'store_true',
+        help = 'Exit with status 1 if the last run has regressions'
+    )
+
+    return parser
+
+
 def signal_handler(signal, frame):
     """
     Handle SIGINT signal.
@@ -23,18 +141,85 @@ def signal_handler(signal, frame):
     able to handle it.
     """
 
+    from ambrogio.utils.threading import pause_event
+
     if not pause_event.is_set():
+        from ambrogio.cli.prompt import ask_for_interrupt
+
         ask_for_interrupt()
 
     else:
         raise KeyboardInterrupt
 
 
-def execute():
+def execute(argv = None):
     """
     Run Ambrogio via command-line interface.
+
+    :param argv: The command-line arguments, defaulting to sys.argv.
     """
     
+    args = get_parser().parse_args(argv)
+
+    if args.command == 'list':
+        from ambrogio.cli.procedures import list_procedures
+
+        list_procedures()
+        return
+
+    from ambrogio.cli.logger import setup_logging, setup_headless_logging
+    from ambrogio.cli.prompt import Prompt
+
+    if args.command == 'report':
+        from ambrogio.cli.report import report
+
+        setup_headless_logging()
+
+        sys.exit(report(
+            args.procedure,
+            args.output,
+            args.baseline,
+            args.threshold,
+            args.fail_on_regression
+        ))
+
+    if args.command in ('run', 'batch', 'sweep'):
+        from ambrogio.utils.threading import exit_event
+
+        setup_headless_logging()
+
+        signal.signal(signal.SIGINT, lambda signal, frame: exit_event.set())
+        Prompt.interactive = False
+
+        if args.command == 'run':
+            from ambrogio.cli.run import run
+
+            sys.exit(run(args.procedure, args.param, args.params_file))
+
+        from ambrogio.cli.batch import batch, sweep
+
+        if args.command == 'batch':
+            batch(
+                args.procedures,
+                args.jobs_file,
+                args.max_concurrency,
+                args.executor
+            )
+
+        else:
+            sweep(
+                args.procedure,
+                args.param,
+                args.max_concurrency,
+                args.executor
+            )
+
+        return
+
+    from ambrogio.cli.start import start
+    from ambrogio.utils.project import create_project
+
+    setup_logging()
     signal.signal(signal.SIGINT, signal_handler)
 
     if not get_closest_ini('.'):
@@ -49,7 +234,7 @@ def execute():
                 project_path: Path = Path('.') / project_name
                 os.chdir(project_path.resolve())
 
-                start()
+                start(getattr(args, 'watch', False))
 
     else:
-        start()
\ No newline at end of file
+        start(getattr(args, 'watch', False))
\ No newline at end of file
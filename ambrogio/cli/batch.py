@@ -0,0 +1,196 @@
+import sys
+import json
+from typing import List, Optional
+
+from rich.console import Console
+from rich.table import Table
+
+from ambrogio.environment import init_env
+from ambrogio.procedures.loader import ProcedureLoader
+from ambrogio.procedures.batch import BatchResult, summarize_results
+from ambrogio.utils.time import Timer
+
+
+def load_jobs(path: str) -> list:
+    """
+    Load the jobs of a batch from a JSON file containing a list of
+    procedure names or objects with 'procedure' and 'params' keys.
+
+    :param path: The path to the JSON file.
+
+    :return: A list of jobs accepted by ProcedureLoader.run_batch.
+
+    :raises ValueError: If a job is not valid.
+    """
+
+    with open(path) as file:
+        jobs = json.load(file)
+
+    if not isinstance(jobs, list):
+        raise ValueError('The jobs file must contain a list of jobs')
+
+    for index, job in enumerate(jobs):
+        if isinstance(job, dict) and 'procedure' in job:
+            jobs[index] = (job['procedure'], job.get('params') or {})
+
+        elif not isinstance(job, str):
+            raise ValueError(f'Job {index} is not valid: {job}')
+
+    return jobs
+
+
+def parse_sweep_values(text: str) -> List[str]:
+    """
+    Parse the values of a parameter sweep, separated by commas.
+    Integer ranges can be written as 'start..stop' or 'start..stop..step',
+    including the stop value.
+
+    :param text: The values to parse, like '1,2,5..10'.
+
+    :return: A list of values, converted to the parameter type later.
+
+    :raises ValueError: If a range is not valid.
+    """
+
+    values = []
+
+    for value in text.split(','):
+        bounds = value.strip().split('..')
+
+        if len(bounds) == 1:
+            values.append(bounds[0])
+            continue
+
+        start, stop, *step = (int(bound) for bound in bounds)
+        step = step[0] if step else 1
+
+        if len(bounds) > 3 or not step:
+            raise ValueError(f'Range is not valid: {value}')
+
+        stop += 1 if step > 0 else -1
+        values += [str(v) for v in range(start, stop, step)]
+
+    return values
+
+
+def print_results(results: List[BatchResult]):
+    """
+    Print a table with the results of a batch and their summary.
+    The program exits with status 1 if any procedure fails.
+
+    :param results: The results of the batch.
+    """
+
+    summary = summarize_results(results)
+    mean, max_ = (
+        Timer.format_elapsed_time(0, summary['elapsed'][key])
+        for key in ('mean', 'max')
+    )
+
+    table = Table(
+        show_header = True,
+        header_style = 'bold',
+        expand = True,
+        caption = (
+            f"{summary['completed']}/{summary['total']} completed"
+            f" · {summary['failed']} failed"
+            f" · {summary['cancelled']} cancelled"
+            f" · mean {mean} · max {max_}"
+        )
+    )
+
+    table.add_column('Procedure')
+    table.add_column('Params')
+    table.add_column('Status')
+    table.add_column('Elapsed time', justify = 'right')
+
+    for result in results:
+        status = result.status
+
+        if result.error is not None:
+            status += f': {result.error}'
+
+        table.add_row(
+            result.procedure_name,
+            ', '.join(f'{k}={v}' for k, v in result.params.items()),
+            status,
+            result.elapsed_time
+        )
+
+    Console().print(table)
+
+    if summary['completed'] < summary['total']:
+        sys.exit(1)
+
+
+def batch(
+    procedure_names: List[str],
+    jobs_file: Optional[str] = None,
+    max_concurrency: Optional[int] = None,
+    executor: str = 'thread'
+):
+    """
+    Run more procedures at the same time, printing a summary of their
+    results. The program exits with status 1 if any procedure fails.
+
+    :param procedure_names: The names of the procedures to run.
+    :param jobs_file: A JSON file with more jobs to run.
+    :param max_concurrency: The maximum number of running procedures.
+    :param executor: Either 'thread' or 'process'.
+    """
+
+    config = init_env()
+
+    jobs = list(procedure_names)
+
+    if jobs_file:
+        jobs += load_jobs(jobs_file)
+
+    if not jobs:
+        print('No procedures to run')
+        return
+
+    procedure_loader = ProcedureLoader(config)
+
+    print_results(procedure_loader.run_batch(jobs, max_concurrency, executor))
+
+
+def sweep(
+    procedure_name: str,
+    params: List[str],
+    max_concurrency: Optional[int] = None,
+    executor: str = 'thread'
+):
+    """
+    Run a procedure with all the combinations of the given parameter
+    values, printing a summary of their results. The program exits with
+    status 1 if any combination fails.
+
+    :param procedure_name: The name of the procedure to run.
+    :param params: The parameter values, like 'name=1,2,5..10'.
+    :param max_concurrency: The maximum number of running procedures.
+    :param executor: Either 'thread' or 'process'.
+
+    :raises ValueError: If a parameter is not valid.
+    """
+
+    config = init_env()
+
+    grid = {}
+
+    for param in params:
+        name, separator, values = param.partition('=')
+
+        if not separator:
+            raise ValueError(f'Parameter is not valid: {param}')
+
+        grid[name.strip()] = parse_sweep_values(values)
+
+    procedure_loader = ProcedureLoader(config)
+
+    print_results(procedure_loader.run_sweep(
+        procedure_name,
+        grid,
+        max_concurrency,
+        executor
+    ))
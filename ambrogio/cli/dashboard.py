@@ -1,119 +1,211 @@
-import os
-import psutil
-from time import sleep
+from typing import Optional, Union
 
+from rich.console import Console
 from rich.table import Table
-from rich.columns import Columns
 from rich.panel import Panel
 from rich.live import Live
 
+from ambrogio.cli.widgets import CachedWidget, WidgetColumns, get_sparkline
 from ambrogio.procedures import Procedure
 from ambrogio.utils.memory import format_bytes
+from ambrogio.utils.sampler import PerformanceSampler
 from ambrogio.utils.time import Timer
-from ambrogio.utils.threading import pause_event, wait_resume, check_events
+from ambrogio.utils.threading import (
+    pause_event,
+    display_idle_event,
+    wait_resume,
+    check_events
+)
+
+
+# The number of most recent samples drawn in the trend of each performance
+SPARKLINE_WIDTH = 30
+
+# The label and the formatter of each sampled performance
+PERFORMANCE_FORMATS = {
+    'memory': ('Memory', format_bytes),
+    'cpu': ('CPU', lambda value: f'{value:.1f} %'),
+    'threads': ('Threads', lambda value: f'{value:.0f}'),
+    'io': ('Disk IO', lambda value: f'{format_bytes(value)}/s')
+}
 
 
 class Dashboard():
     """
     Show a dashboard with live performances monitoring.
 
+    The performances are sampled in a background thread, while the
+    dashboard is rendered at the same interval, rendering again only the
+    widgets which changed since the previous refresh. The interval can be set
+    using the dashboard_interval attribute of the procedure or the
+    'dashboard_interval' setting, and defaults to 1 second.
+
+    The last samples are kept in ring buffers to show the trend, the average
+    and the percentiles of each performance. Their number can be set using
+    the dashboard_samples attribute or the 'dashboard_samples' setting, and
+    defaults to 120.
+
     :param procedure: The procedure to monitor.
+    :param console: The console to render the dashboard on.
     """
 
-    _max_performances: dict = {
-        'memory': 0,
-        'cpu': 0,
-        'threads': 0
-    }
     _procedure: Procedure
-    _process: psutil.Process
+    _sampler: PerformanceSampler
     _timer: Timer
 
-    def __init__(self, procedure: Procedure):
-        self._process = psutil.Process(os.getpid())
+    def __init__(
+        self,
+        procedure: Procedure,
+        console: Optional[Console] = None
+    ):
+        self._procedure = procedure
+        self._console = console
         self._timer = Timer()
 
-        self._procedure = procedure
+        self._sampler = PerformanceSampler(
+            self._get_setting('dashboard_interval', 1.0),
+            self._get_setting('dashboard_samples', 120),
+            callback = procedure.metrics.record_performances
+        )
+
+        self._performances_widget = CachedWidget()
+        self._rendered_sample = None
 
     @property
     def procedure(self):
         return self._procedure
 
+    @property
+    def sampler(self) -> PerformanceSampler:
+        return self._sampler
+
     @property
     def max_performances(self):
-        return self._max_performances
+        return self.procedure.metrics.max_performances
 
     def show(self):
         """
         Show the dashboard.
         """
 
-        with Live(self._generate_dashboard(), refresh_per_second = 4) as live:
-            while not self.procedure.finished and check_events():
-                live.update(self._generate_dashboard())
-                sleep(1/4)
-            
-            live.update(self._generate_dashboard())
-        
+        display_idle_event.clear()
+        self._sampler.start()
+
+        try:
+            with Live(
+                self._generate_dashboard(),
+                console = self._console,
+                auto_refresh = False
+            ) as live:
+                while (
+                    not self.procedure.finished
+                    and not self.procedure.cancelled
+                    and check_events()
+                ):
+                    pause_event.wait(self._sampler.interval)
+                    live.update(self._generate_dashboard(), refresh = True)
+
+        finally:
+            self._sampler.stop()
+            display_idle_event.set()
+
         if pause_event.is_set():
             wait_resume()
             self.show()
 
-    def _get_performances(self):
+    def _get_setting(self, name: str, default: Union[int, float]):
         """
-        Get the performances of the current process.
+        Get a dashboard setting from the procedure attribute or, if not
+        set, from the project configuration.
 
-        :return: A dict with the performances.
+        :param name: The name of the attribute and of the setting.
+        :param default: The value used if the setting is not set, whose
+        type is used to convert the setting.
+
+        :return: The value of the setting.
         """
-        
-        return {
-            'memory': self._process.memory_info().rss,
-            'cpu': self._process.cpu_percent(),
-            'threads': self._process.num_threads()
-        }
+
+        value = getattr(self.procedure, name, None)
+
+        if value is None and self.procedure.config is not None:
+            value = self.procedure.config.get(
+                'settings',
+                name,
+                fallback = None
+            )
+
+        return type(default)(value) if value else default
 
     def _generate_dashboard(self):
         """
-        Generate the dashboard.
+        Generate the dashboard, updating the performances table if a new
+        sample has been taken.
+
+        :return: A WidgetColumns object.
+        """
+
+        if self._rendered_sample != self._sampler.count:
+            self._rendered_sample = self._sampler.count
+            self._performances_widget.update(Panel(
+                self._get_performances_table(),
+                title = 'Performances'
+            ))
+
+        widgets = [
+            widget if isinstance(widget, CachedWidget)
+            else CachedWidget(widget)
+            for widget in self.procedure._dashboard_widgets
+        ]
+
+        return WidgetColumns([self._performances_widget, *widgets])
+
+    def _get_performances_table(self) -> Table:
+        """
+        Get a table with, for each performance, the last sampled value, the
+        average and the percentiles of the kept samples, the max value of
+        the run and the trend of the last samples.
 
-        :return: A rich.layout.Layout object.
+        :return: A rich.table.Table object.
         """
 
-        performances = self._get_performances()
-        
-        for key, value in performances.items():
-            if value > self.max_performances[key]:
-                self.max_performances[key] = value
-                
+        max_performances = self.max_performances
+
         performance_table = Table(
             show_header = True,
             header_style = 'bold',
-            expand = True
-        )
-        
-        performance_table.add_column('Elapsed time', justify = 'right')
-        performance_table.add_column('Memory', justify = 'right')
-        performance_table.add_column('CPU', justify = 'right', min_width = 10)
-        performance_table.add_column('Threads', justify = 'right')
-
-        performance_table.add_row(
-            self._timer.elapsed_time,
-            format_bytes(performances['memory']),
-            f"{performances['cpu']:.2f} %",
-            f"{performances['threads']}",
-            end_section = True
+            expand = True,
+            caption = f'Elapsed time {self._timer.elapsed_time}'
         )
 
-        performance_table.add_row(
-            'Max',
-            format_bytes(self.max_performances['memory']),
-            f"{self.max_performances['cpu']:.2f} %",
-            f"{self.max_performances['threads']}"
+        performance_table.add_column('', style = 'bold')
+
+        for column in ('Current', 'Avg', 'p50', 'p95', 'Max'):
+            performance_table.add_column(column, justify = 'right')
+
+        performance_table.add_column(
+            'Trend',
+            min_width = SPARKLINE_WIDTH,
+            no_wrap = True
         )
 
-        columns = Columns([
-            Panel(performance_table, title='Performances'),
-            *self.procedure._dashboard_widgets
-        ], expand = True)
+        for performance in self._sampler.performances:
+            label, format_value = PERFORMANCE_FORMATS[performance]
+            summary = self._sampler.summarize(performance)
+
+            if summary is None:
+                continue
+
+            summary['max'] = max_performances.get(performance, summary['max'])
+
+            performance_table.add_row(
+                label,
+                *(
+                    format_value(summary[key])
+                    for key in ('current', 'mean', 'p50', 'p95', 'max')
+                ),
+                get_sparkline(
+                    self._sampler.get_values(performance, SPARKLINE_WIDTH)
+                )
+            )
 
-        return columns
\ No newline at end of file
+        return performance_table
@@ -1,17 +1,47 @@
 import logging
 
-from rich.logging import RichHandler
-from rich import traceback
-
 
 FORMAT = "%(message)s"
-logging.basicConfig(
-    level="NOTSET",
-    format=FORMAT,
-    datefmt="[%X]",
-    handlers=[RichHandler(rich_tracebacks = True)]
-)
 
-traceback.install(show_locals = True)
+# Format of the headless commands, close to the one of Rich
+HEADLESS_FORMAT = "%(asctime)s %(levelname)-8s %(message)s"
+
+logger = logging.getLogger('Ambrogio')
+
+
+def setup_logging(install_traceback: bool = True):
+    """
+    Log using Rich. Rich is only imported here, so commands which don't
+    log start faster.
+
+    :param install_traceback: Whether to show uncaught exceptions with
+    Rich tracebacks, including the local variables.
+    """
+
+    from rich.logging import RichHandler
+
+    logging.basicConfig(
+        level="NOTSET",
+        format=FORMAT,
+        datefmt="[%X]",
+        handlers=[RichHandler(rich_tracebacks = True)]
+    )
+
+    if install_traceback:
+        from rich import traceback
+
+        traceback.install(show_locals = True)
+
+
+def setup_headless_logging():
+    """
+    Log using the standard library, for the headless commands executed by
+    scripts and schedulers, which don't need Rich and start faster without
+    importing it.
+    """
 
-logger = logging.getLogger('Ambrogio')
\ No newline at end of file
+    logging.basicConfig(
+        level="NOTSET",
+        format=HEADLESS_FORMAT,
+        datefmt="[%X]"
+    )
@@ -0,0 +1,14 @@
+from ambrogio.environment import init_env
+from ambrogio.procedures.loader import ProcedureLoader
+
+
+def list_procedures():
+    """
+    Print the names of the procedures available in the project, one per
+    line, without importing their modules.
+    """
+
+    config = init_env()
+
+    for procedure_name in ProcedureLoader(config).list():
+        print(procedure_name)
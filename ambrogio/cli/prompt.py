@@ -1,13 +1,13 @@
 import sys
 from typing import Any, Optional
 from pathlib import Path
-from time import sleep
-
-import inquirer
-from inquirer.themes import Theme, term
 
 from ambrogio.cli.logger import logger
-from ambrogio.utils.threading import pause_event, exit_event
+from ambrogio.utils.threading import (
+    pause_event,
+    exit_event,
+    display_idle_event
+)
 
 
 def ask_for_interrupt():
@@ -31,30 +31,21 @@ def ask_for_interrupt():
         return False
 
 
-class PromptTheme(Theme):
-    def __init__(self):
-        super().__init__()
-        self.Question.mark_color = term.normal + term.bold
-        self.Question.brackets_color = term.normal
-        self.Question.default_color = term.normal
-        self.Editor.opening_prompt_color = term.normal
-        self.Checkbox.selection_color = term.normal + term.bold
-        self.Checkbox.selection_icon = ">"
-        self.Checkbox.selected_icon = "[X]"
-        self.Checkbox.selected_color = term.normal + term.bold
-        self.Checkbox.unselected_color = term.normal
-        self.Checkbox.unselected_icon = "[ ]"
-        self.Checkbox.locked_option_color = term.gray50
-        self.List.selection_color = term.normal + term.bold
-        self.List.selection_cursor = ">"
-        self.List.unselected_color = term.normal
+class NonInteractiveError(RuntimeError):
+    'The user can\'t be prompted in non-interactive mode'
+    pass
 
 
 class Prompt:
     """
     Prompt the user with interactive command line interfaces.
+
+    When interactive is False, like in headless runs, the user is never
+    prompted and the default values are returned instead.
     """
 
+    interactive: bool = True
+
     @classmethod
     def confirm(cls, message: str, **kwargs) -> Optional[bool]:
         """
@@ -170,10 +161,25 @@ class Prompt:
         :return: The result of the inquirer method.
 
         :raises AttributeError: If the method name is not valid.
+        :raises NonInteractiveError: If the prompt is not interactive and
+        no default value is given.
         """
 
+        if not Prompt.interactive:
+            if kwargs.get('default') is None:
+                raise NonInteractiveError(
+                    f"Can't ask '{kwargs.get('message')}'"
+                    ' in non-interactive mode'
+                )
+
+            return kwargs['default']
+
+        # Inquirer is only imported when the user is actually prompted
+        import inquirer
+        from ambrogio.cli.theme import PromptTheme
+
         pause_event.set()
-        sleep(1/2)
+        display_idle_event.wait()
 
         questions = [
             getattr(inquirer, method.capitalize())('answer', **kwargs)
@@ -191,6 +197,5 @@ class Prompt:
                 result = Prompt._convert_to_inquirer(method, **kwargs)
 
         pause_event.clear()
-        sleep(1/2)
 
         return result['answer'] if result else None
\ No newline at end of file
@@ -0,0 +1,82 @@
+from typing import Optional
+from pathlib import Path
+
+from ambrogio.cli.logger import logger
+from ambrogio.environment import init_env, get_closest_ini
+from ambrogio.utils.telemetry import RunTelemetry
+from ambrogio.utils.report import get_baseline, find_regressions, write_report
+
+
+# Exit codes of the report command
+EXIT_SUCCESS = 0
+EXIT_REGRESSION = 1
+EXIT_USAGE = 2
+
+
+def report(
+    procedure_name: str,
+    output: Optional[str] = None,
+    baseline: Optional[str] = None,
+    threshold: float = 0.2,
+    fail_on_regression: bool = False
+) -> int:
+    """
+    Write an HTML report with the performance trends of the stored runs of
+    a procedure, comparing its last completed run with a baseline.
+
+    :param procedure_name: The name of the procedure.
+    :param output: The path to the HTML file, defaulting to the
+    '.ambrogio/reports' directory of the project.
+    :param baseline: The id of the baseline run, defaulting to the median
+    of the previous completed runs.
+    :param threshold: The relative increase to report, like 0.2 for 20 %.
+    :param fail_on_regression: If the command must fail when the last run
+    has regressions.
+
+    :return: The exit code: 0 if the report has been written, 1 if
+    fail_on_regression is set and regressions have been found and 2 if
+    there are no runs or the baseline is not found.
+    """
+
+    init_env()
+
+    project_path = Path(get_closest_ini()).parent
+    telemetry = RunTelemetry(project_path / '.ambrogio' / 'runs')
+    runs = telemetry.read(procedure_name)
+
+    if not runs:
+        logger.error(f"No runs of '{procedure_name}' found")
+        return EXIT_USAGE
+
+    completed = [run for run in runs if run['status'] == 'completed']
+    regressions = []
+
+    try:
+        baseline_values = get_baseline(runs, baseline)
+
+    except KeyError as e:
+        logger.error(e.args[0])
+        return EXIT_USAGE
+
+    if completed and baseline_values:
+        regressions = find_regressions(
+            completed[-1],
+            baseline_values,
+            threshold
+        )
+
+    if output is None:
+        file_name = telemetry.get_file_path(procedure_name).stem + '.html'
+        output = project_path / '.ambrogio' / 'reports' / file_name
+
+    report_path = write_report(procedure_name, runs, regressions, output)
+
+    print(f'Report of {len(runs)} runs written to {report_path}')
+
+    for regression in regressions:
+        print(regression)
+
+    if regressions and fail_on_regression:
+        return EXIT_REGRESSION
+
+    return EXIT_SUCCESS
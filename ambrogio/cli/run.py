@@ -0,0 +1,126 @@
+import os
+import re
+import json
+from typing import List, Optional, Dict, Any
+
+from ambrogio.cli.logger import logger
+from ambrogio.cli.prompt import Prompt
+from ambrogio.environment import init_env
+from ambrogio.procedures.loader import ProcedureLoader
+from ambrogio.utils.threading import exit_event
+
+
+# Exit codes of headless runs
+EXIT_SUCCESS = 0
+EXIT_FAILURE = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+
+def get_env_name(param_name: str) -> str:
+    """
+    Get the name of the environment variable setting a parameter,
+    like AMBROGIO_PARAM_MY_PARAM for 'my param'.
+
+    :param param_name: The name of the parameter.
+
+    :return: The name of the environment variable.
+    """
+
+    return 'AMBROGIO_PARAM_' + re.sub(r'\W+', '_', param_name).upper()
+
+
+def get_run_params(
+    procedure_class: type,
+    params: List[str],
+    params_file: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Get the parameter values of a headless run. Values given as arguments
+    override the ones in environment variables, which override the ones
+    in the JSON params file.
+
+    :param procedure_class: The procedure class.
+    :param params: The parameter values, like 'name=value'.
+    :param params_file: A JSON file with an object of parameter values.
+
+    :return: The parameter values, by parameter name.
+
+    :raises ValueError: If a parameter or the params file is not valid.
+    """
+
+    values = {}
+
+    if params_file:
+        with open(params_file) as file:
+            file_values = json.load(file)
+
+        if not isinstance(file_values, dict):
+            raise ValueError('The params file must contain an object')
+
+        values.update(file_values)
+
+    for param in procedure_class.params:
+        env_name = get_env_name(param.name)
+
+        if env_name in os.environ:
+            values[param.name] = os.environ[env_name]
+
+    for param in params:
+        name, separator, value = param.partition('=')
+
+        if not separator:
+            raise ValueError(f'Parameter is not valid: {param}')
+
+        values[name.strip()] = value
+
+    return values
+
+
+def run(
+    procedure_name: str,
+    params: List[str],
+    params_file: Optional[str] = None
+) -> int:
+    """
+    Run a procedure without prompting the user or showing the dashboard.
+
+    :param procedure_name: The name of the procedure to run.
+    :param params: The parameter values, like 'name=value'.
+    :param params_file: A JSON file with an object of parameter values.
+
+    :return: The exit code: 0 if the procedure has been executed
+    successfully, 1 if it failed, 2 if the procedure or its parameters
+    are not valid and 130 if the program has been interrupted.
+    """
+
+    Prompt.interactive = False
+
+    try:
+        config = init_env()
+        procedure_loader = ProcedureLoader(config)
+
+        procedure_class = procedure_loader.load(procedure_name)
+        procedure_class = procedure_class.with_params(**get_run_params(
+            procedure_class,
+            params,
+            params_file
+        ))
+
+        procedure = procedure_class(config)
+
+    except (KeyError, TypeError, ValueError, OSError) as e:
+        logger.error(e.args[0] if e.args else e)
+
+        return EXIT_USAGE
+
+    try:
+        procedure._run()
+
+    except Exception as e:
+        logger.exception(e)
+
+    if exit_event.is_set():
+        return EXIT_INTERRUPTED
+
+    return EXIT_SUCCESS if procedure.finished else EXIT_FAILURE
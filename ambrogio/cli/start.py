@@ -1,6 +1,6 @@
 from threading import Thread
-from time import sleep
 
+from ambrogio.cli.logger import logger
 from ambrogio.cli.prompt import Prompt
 from ambrogio.cli.dashboard import Dashboard
 from ambrogio.environment import init_env
@@ -17,7 +17,10 @@ def prompt_create_procedure(config):
     procedure_name = Prompt.text('Type the procedure name')
     procedure_type = Prompt.list('Select the procedure type', [
         ('Basic procedure', 'basic'),
-        ('Step procedure', 'step')
+        ('Step procedure', 'step'),
+        ('Async basic procedure', 'async_basic'),
+        ('Async step procedure', 'async_step'),
+        ('Pipeline procedure', 'pipeline')
     ])
 
     if procedure_name and procedure_type:
@@ -29,63 +32,99 @@ def prompt_create_procedure(config):
         )
 
 
-def start():
+def run_procedure(procedure_loader: ProcedureLoader, procedure_name: str):
+    """
+    Prompt the user for the parameters of a procedure and run it with
+    live performances monitoring.
+
+    :param procedure_loader: The loader of the project procedures.
+    :param procedure_name: The name of the procedure to run.
+    """
+
+    procedure = procedure_loader.load(procedure_name)
+
+    if len(procedure.params):
+        procedure_needs_params = not procedure._check_params(False)
+        if not procedure_needs_params:
+            procedure_needs_params = Prompt.confirm(
+                'Do you want to change the default parameters?'
+            )
+        
+        if procedure_needs_params:
+            procedure._prompt_params()
+    
+    procedure = procedure(procedure_loader.config)
+
+    dashboard = Dashboard(procedure)
+
+    show_dashboard_thread = Thread(target=dashboard.show)
+    show_dashboard_thread.start()
+
+    try:
+        procedure._run()
+    
+    except Exception as e:
+        procedure.cancel()
+        show_dashboard_thread.join()
+        raise e
+
+    show_dashboard_thread.join()
+
+
+def start(watch: bool = False):
     """
     Prompt the user for a procedure to start a procedure with
     live performances monitoring.
+
+    :param watch: Whether to keep prompting for procedures after each
+    execution, reloading the procedure modules when they change.
     """
     config = init_env()
             
     procedure_loader = ProcedureLoader(config)
-    procedure_list = procedure_loader.list()
 
-    if len(procedure_list):
-        procedure_name = Prompt.list(
-            'Choose a procedure to run',
-            [*procedure_list, ('Create a new procedure', None)]
-        )
+    while True:
+        # The modules are only reloaded before prompting for a procedure,
+        # so they never change while a procedure is running
+        if watch:
+            procedure_loader.reload()
 
-        if not procedure_name:
-            prompt_create_procedure(config)
+        procedure_list = procedure_loader.list()
 
-        else:
-            procedure = procedure_loader.load(procedure_name)
-
-            if len(procedure.params):
-                procedure_needs_params = not procedure._check_params(False)
-                if not procedure_needs_params:
-                    procedure_needs_params = Prompt.confirm(
-                        'Do you want to change the default parameters?'
-                    )
-                
-                if procedure_needs_params:
-                    procedure._prompt_params()
-            
-            procedure = procedure(config)
+        if len(procedure_list):
+            choices = [*procedure_list, ('Create a new procedure', None)]
 
-            dashboard = Dashboard(procedure)
+            if watch:
+                choices.append(('Quit', False))
 
-            show_dashboard_thread = Thread(target=dashboard.show)
-            show_dashboard_thread.start()
+            procedure_name = Prompt.list('Choose a procedure to run', choices)
 
-            try:
-                procedure._execute()
-            
-            except Exception as e:
-                exit_event.set()
-                sleep(1)
-                raise e
+            if procedure_name is False:
+                break
 
-            show_dashboard_thread.join()
+            elif not procedure_name:
+                prompt_create_procedure(config)
 
+            elif watch:
+                try:
+                    run_procedure(procedure_loader, procedure_name)
 
-    else:
-        print(
-            f"The '{config['settings']['procedure_module']}'"
-            ' module doesn\'t contain any Procedure class'
-        )
+                except Exception as e:
+                    logger.exception(e)
+
+            else:
+                run_procedure(procedure_loader, procedure_name)
+
+        else:
+            print(
+                f"The '{config['settings']['procedure_module']}'"
+                ' module doesn\'t contain any Procedure class'
+            )
+
+            create = Prompt.confirm('Do you want to create a new procedure?')
 
-        create = Prompt.confirm('Do you want to create a new procedure?')
+            if create:
+                prompt_create_procedure(config)
 
-        if create:
-            prompt_create_procedure(config)
\ No newline at end of file
+        if not watch or exit_event.is_set():
+            break
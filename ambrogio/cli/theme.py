@@ -0,0 +1,20 @@
+from inquirer.themes import Theme, term
+
+
+class PromptTheme(Theme):
+    def __init__(self):
+        super().__init__()
+        self.Question.mark_color = term.normal + term.bold
+        self.Question.brackets_color = term.normal
+        self.Question.default_color = term.normal
+        self.Editor.opening_prompt_color = term.normal
+        self.Checkbox.selection_color = term.normal + term.bold
+        self.Checkbox.selection_icon = ">"
+        self.Checkbox.selected_icon = "[X]"
+        self.Checkbox.selected_color = term.normal + term.bold
+        self.Checkbox.unselected_color = term.normal
+        self.Checkbox.unselected_icon = "[ ]"
+        self.Checkbox.locked_option_color = term.gray50
+        self.List.selection_color = term.normal + term.bold
+        self.List.selection_cursor = ">"
+        self.List.unselected_color = term.normal
@@ -0,0 +1,210 @@
+from typing import Optional, Tuple, List
+
+from rich.console import Console, ConsoleOptions, RenderableType, RenderResult
+from rich.measure import Measurement
+from rich.segment import Segment
+
+
+SPARKLINE_BARS = '▁▂▃▄▅▆▇█'
+
+
+def get_sparkline(values: List[float], width: Optional[int] = None) -> str:
+    """
+    Draw the trend of some values with block characters, scaled between
+    the min and the max value.
+
+    :param values: The values, from the oldest to the newest.
+    :param width: The max number of characters, showing only the most
+    recent values, or None to show all of them.
+
+    :return: A string with a character for each value.
+    """
+
+    if width is not None:
+        values = values[-width:] if width > 0 else []
+
+    if not values:
+        return ''
+
+    low = min(values)
+    scale = (len(SPARKLINE_BARS) - 1) / ((max(values) - low) or 1)
+
+    return ''.join(
+        SPARKLINE_BARS[round((value - low) * scale)]
+        for value in values
+    )
+
+
+class CachedWidget:
+    """
+    A dashboard widget keeping its rendered lines until its content is
+    updated, so refreshing the dashboard only renders again the widgets
+    which changed. The lines are padded to the width of the widget.
+
+    :param renderable: The content of the widget.
+    """
+
+    def __init__(self, renderable: RenderableType = ''):
+        self._renderable = renderable
+        self._version = 0
+
+        self._lines = None
+        self._lines_key: Optional[Tuple] = None
+        self._measurement = None
+        self._measurement_key: Optional[Tuple] = None
+
+    @property
+    def renderable(self) -> RenderableType:
+        """
+        The content of the widget.
+        """
+
+        return self._renderable
+
+    def update(self, renderable: Optional[RenderableType] = None):
+        """
+        Mark the content of the widget as changed.
+
+        :param renderable: The new content or None to keep the current one,
+        if it has been changed in place.
+        """
+
+        if renderable is not None:
+            self._renderable = renderable
+
+        self._version += 1
+
+    def render_lines(
+        self,
+        console: Console,
+        options: ConsoleOptions
+    ) -> List[List[Segment]]:
+        """
+        Get the rendered lines of the widget, rendering it again only if
+        its content or the width changed.
+
+        :param console: The console to render on.
+        :param options: The render options.
+
+        :return: The lines, as lists of segments.
+        """
+
+        key = (self._version, options.max_width, options.height)
+
+        if self._lines_key != key:
+            self._lines = console.render_lines(self._renderable, options)
+            self._lines_key = key
+
+        return self._lines
+
+    def __rich_console__(
+        self,
+        console: Console,
+        options: ConsoleOptions
+    ) -> RenderResult:
+        new_line = Segment.line()
+
+        for line in self.render_lines(console, options):
+            yield from line
+            yield new_line
+
+    def __rich_measure__(
+        self,
+        console: Console,
+        options: ConsoleOptions
+    ) -> Measurement:
+        key = (self._version, options.max_width)
+
+        if self._measurement_key != key:
+            self._measurement = Measurement.get(
+                console,
+                options,
+                self._renderable
+            )
+            self._measurement_key = key
+
+        return self._measurement
+
+
+class WidgetColumns:
+    """
+    Lay out dashboard widgets side by side, starting a new row when the
+    next widget doesn't fit, and expanding the widgets of each row to the
+    available width. Unlike rich.columns.Columns, the rendered lines of
+    the widgets are joined without rendering them again, so the layout
+    only costs a copy of the lines.
+
+    :param widgets: The widgets to lay out.
+    :param padding: The number of spaces between two widgets.
+    """
+
+    def __init__(self, widgets: List[CachedWidget], padding: int = 1):
+        self.widgets = widgets
+        self.padding = padding
+
+    def __rich_console__(
+        self,
+        console: Console,
+        options: ConsoleOptions
+    ) -> RenderResult:
+        max_width = options.max_width
+        new_line = Segment.line()
+        separator = Segment(' ' * self.padding)
+
+        for row in self._get_rows(console, options):
+            # Share the remaining width among the widgets of the row
+            widths = [width for _, width in row]
+            spare = max_width - sum(widths) - self.padding * (len(row) - 1)
+
+            for index in range(len(widths)):
+                widths[index] += spare // len(widths)
+
+            widths[-1] += spare % len(widths)
+
+            columns = [
+                widget.render_lines(console, options.update_width(width))
+                for (widget, _), width in zip(row, widths)
+            ]
+            height = max(len(lines) for lines in columns)
+
+            for line_index in range(height):
+                for column_index, lines in enumerate(columns):
+                    if column_index:
+                        yield separator
+
+                    if line_index < len(lines):
+                        yield from lines[line_index]
+
+                    else:
+                        yield Segment(' ' * widths[column_index])
+
+                yield new_line
+
+    def _get_rows(
+        self,
+        console: Console,
+        options: ConsoleOptions
+    ) -> List[List[Tuple[CachedWidget, int]]]:
+        """
+        Split the widgets in rows, with the width of each widget.
+        """
+
+        max_width = options.max_width
+        rows = []
+        row_width = 0
+
+        for widget in self.widgets:
+            width = min(
+                widget.__rich_measure__(console, options).maximum,
+                max_width
+            )
+
+            if rows and row_width + self.padding + width <= max_width:
+                rows[-1].append((widget, width))
+                row_width += self.padding + width
+
+            else:
+                rows.append([(widget, width)])
+                row_width = width
+
+        return rows
@@ -1,13 +1,21 @@
-from typing import Optional, List
+from typing import Optional, List, Type, Any, TYPE_CHECKING
+from dataclasses import replace
 from configparser import ConfigParser
+from pathlib import Path
+import os
+import time
+import inspect
 import logging
 
-from rich.panel import Panel
-
 from ambrogio.environment import get_closest_ini
 from ambrogio.procedures.param import ProcedureParam
+from ambrogio.utils.metrics import ProcedureMetrics, get_peak_memory
+from ambrogio.utils.threading import CancellationToken
 from ambrogio.cli.prompt import Prompt
 
+if TYPE_CHECKING:
+    from rich.panel import Panel
+
 
 class Procedure:
     """
@@ -19,17 +27,22 @@ class Procedure:
     params: List[ProcedureParam] = []
 
     config: Optional[ConfigParser] = None
+    telemetry: Optional[bool] = None
+    telemetry_interval: Optional[float] = None
 
     logger: logging.Logger
     prompt: Prompt = Prompt()
 
-    _finished: bool = False
+    _finished: bool
 
     def __init__(self, config: Optional[ConfigParser] = None):
         if not getattr(self, 'name', None):
             raise ValueError(f"{type(self).__name__} must have a name")
         
         self.logger = logging.getLogger(self.name)
+        self._metrics = ProcedureMetrics()
+        self._finished = False
+        self._cancel_token = CancellationToken()
         
         self._check_params()
         
@@ -51,7 +64,40 @@ class Procedure:
         return self._finished
 
     @property
-    def _dashboard_widgets(self) -> List[Panel]:
+    def cancelled(self) -> bool:
+        """
+        Whether the procedure execution has been stopped, either by cancel,
+        by a failed blocking step or by the exit event.
+        """
+
+        return self._cancel_token.cancelled
+
+    @property
+    def metrics(self) -> ProcedureMetrics:
+        """
+        The counters of the procedure and of its steps.
+        """
+
+        return self._metrics
+
+    @property
+    def project_path(self) -> Path:
+        """
+        The path to the project directory containing the procedure.
+        """
+
+        try:
+            module_path = Path(inspect.getfile(type(self))).parent
+
+        except TypeError:
+            module_path = Path('.')
+
+        ini_path = get_closest_ini(module_path) or get_closest_ini()
+
+        return Path(ini_path).parent if ini_path else Path('.').resolve()
+
+    @property
+    def _dashboard_widgets(self) -> List['Panel']:
         """
         Additional widgets to be added to Ambrogio dashboard.
 
@@ -60,10 +106,121 @@ class Procedure:
         
         return []
     
+    def cancel(self):
+        """
+        Stop the execution of the procedure.
+        Unlike the exit event, other procedures running in the same
+        process are not affected.
+        """
+
+        self._cancel_token.cancel()
+
     def _execute(self):
         raise NotImplementedError(
             f'{self.__class__.__name__}._execute callback is not defined'
         )
+
+    def _run(self) -> Any:
+        """
+        Execute the procedure, storing the telemetry of the run in the
+        '.ambrogio/runs' directory of the project, unless disabled using
+        the telemetry attribute or setting.
+
+        While the telemetry is enabled, the performances of the process
+        are sampled every telemetry_interval seconds, using the attribute
+        or the setting and defaulting to 1 second, keeping their max values
+        in the metrics of the procedure.
+
+        :return: The value returned by the procedure.
+
+        :raises Exception: If the procedure raises an exception.
+        """
+
+        telemetry_enabled = self._is_telemetry_enabled()
+        sampler = None
+
+        if telemetry_enabled:
+            from ambrogio.utils.sampler import RunSampler
+
+            sampler = RunSampler(
+                self._get_telemetry_interval(),
+                callback = self.metrics.record_performances
+            )
+            sampler.start()
+
+        started = time.time()
+        started_at = time.perf_counter()
+        started_cpu = os.times()
+        started_memory = get_peak_memory()
+        error = None
+
+        try:
+            return self._execute()
+
+        except Exception as e:
+            error = e
+            raise
+
+        finally:
+            if telemetry_enabled:
+                from ambrogio.utils.telemetry import (
+                    RunTelemetry,
+                    get_run_record
+                )
+
+                sampler.stop()
+                finished_cpu = os.times()
+                finished_memory = get_peak_memory()
+
+                RunTelemetry(self.project_path / '.ambrogio' / 'runs').write(
+                    get_run_record(
+                        self,
+                        started,
+                        time.perf_counter() - started_at,
+                        finished_cpu.user - started_cpu.user
+                        + finished_cpu.system - started_cpu.system,
+                        finished_memory - started_memory
+                        if started_memory is not None
+                        else None,
+                        error
+                    )
+                )
+
+    def _is_telemetry_enabled(self) -> bool:
+        """
+        Check whether the telemetry of the runs must be stored, from the
+        telemetry attribute or, if not set, from the project configuration.
+        """
+
+        if self.telemetry is not None:
+            return self.telemetry
+
+        if self.config is not None:
+            return self.config.getboolean(
+                'settings',
+                'telemetry',
+                fallback = True
+            )
+
+        return True
+
+    def _get_telemetry_interval(self) -> float:
+        """
+        Get the seconds between two samples of the performances of a run,
+        from the telemetry_interval attribute or, if not set, from the
+        project configuration.
+        """
+
+        interval = self.telemetry_interval
+
+        if interval is None and self.config is not None:
+            interval = self.config.getfloat(
+                'settings',
+                'telemetry_interval',
+                fallback = None
+            )
+
+        return interval or 1.0
     
     @classmethod
     def get_param(cls, name: str) -> Optional[ProcedureParam]:
@@ -77,6 +234,37 @@ class Procedure:
         
         return None
     
+    @classmethod
+    def with_params(cls, **values: Any) -> Type['Procedure']:
+        """
+        Get a subclass of the procedure using the given parameter values, so
+        more parameter sets can be executed at the same time without
+        changing the parameters of the procedure.
+
+        :param values: The parameter values, by parameter name.
+
+        :return: The Procedure subclass.
+
+        :raises KeyError: If a parameter is not defined.
+        :raises TypeError: If a value can't be converted to the parameter type.
+        """
+
+        for name in values:
+            if not cls.get_param(name):
+                raise KeyError(f"Parameter not found: {name}")
+
+        params = [
+            replace(param, value = param.convert(values[param.name]))
+            if param.name in values
+            else replace(param)
+            for param in cls.params
+        ]
+
+        return type(cls.__name__, (cls,), {
+            '__module__': cls.__module__,
+            'params': params
+        })
+
     @classmethod
     def _prompt_params(cls):
         """
@@ -0,0 +1,36 @@
+from typing import Any
+import asyncio
+
+from ambrogio.procedures.basic import BasicProcedure
+
+
+class AsyncBasicProcedure(BasicProcedure):
+    """
+    Class for Ambrogio basic procedures executing a coroutine.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+    def _execute(self) -> Any:
+        """
+        Execute the procedure in a new event loop.
+        """
+
+        self.logger.info(f'Executing "{self.name}" procedure...')
+
+        result = asyncio.run(self.execute())
+        self._finished = True
+        
+        self.logger.info(f'Procedure "{self.name}" executed successfully')
+
+        return result
+
+    async def execute(self) -> Any:
+        """
+        Execute the procedure.
+        """
+        
+        raise NotImplementedError(
+            f'{self.__class__.__name__}.execute callback is not defined'
+        )
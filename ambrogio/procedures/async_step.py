@@ -0,0 +1,353 @@
+from typing import Optional, Callable, Awaitable, Any, Tuple
+from functools import partial
+from threading import Lock, get_ident
+from time import perf_counter
+import os
+import asyncio
+
+from ambrogio.procedures.step import StepProcedure
+from ambrogio.utils.metrics import StepProfile, measure_call
+from ambrogio.utils.threading import (
+    WorkerPool,
+    async_wait_resume,
+    CancellationToken,
+    StepCancelledError,
+    StepTimeoutError
+)
+
+
+class AsyncStepProcedure(StepProcedure):
+    """
+    Class for Ambrogio step procedures executing coroutines.
+
+    All the steps are scheduled on a single event loop: parallel steps are
+    executed as concurrent tasks, while the other steps are executed one at
+    a time, awaited by the scheduler when all the pending steps depend on
+    them. Steps which are not coroutine functions, like map steps, are
+    executed by the worker pool of the procedure or, for process steps, in
+    a pool of worker processes.
+    """
+
+    _wakeup: Optional[asyncio.Event] = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+    def _execute(self) -> Any:
+        """
+        Execute the procedure in a new event loop.
+        """
+
+        self.logger.info(f"Executing '{self.name}' procedure...")
+
+        self.set_up()
+
+        if not self.total_steps:
+            raise ValueError('No steps added to the procedure')
+
+        self._worker_pool = WorkerPool(self._get_setting('max_workers'))
+        self._process_pool = None
+        self._process_pool_lock = Lock()
+        self._step_cache = None
+        self._step_error = None
+        self._load_checkpoint()
+
+        try:
+            asyncio.run(self._schedule_async_steps())
+
+        finally:
+            if self._cancel_token.cancelled:
+                self._terminate_process_pool()
+
+            self._worker_pool.shutdown(wait = False)
+
+            if self._process_pool is not None:
+                self._process_pool.shutdown(wait = False)
+
+        if self._step_error is not None:
+            raise self._step_error
+
+        if not self.cancelled:
+            self._remove_checkpoint()
+            self._finished = True
+
+            self.tear_down()
+
+            self.logger.info(f"Procedure '{self.name}' executed successfully")
+
+    def add_step(self, function: Callable, *args, **kwargs):
+        """
+        Add a step to the procedure.
+        Accepts the same arguments of StepProcedure.add_step, where function
+        should be a coroutine function. Other functions are executed by the
+        worker pool of the procedure or, with the process executor, in a
+        pool of worker processes.
+
+        :raises ValueError: If a coroutine function is set to be executed
+        in a process, or for the same reasons of StepProcedure.add_step.
+        """
+
+        if (
+            kwargs.get('executor') == 'process'
+            and asyncio.iscoroutinefunction(function)
+        ):
+            raise ValueError(
+                'Coroutine functions can\'t be executed in a process'
+            )
+
+        super().add_step(function, *args, **kwargs)
+
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _schedule_async_steps(self):
+        """
+        Start each step as soon as all its dependencies have finished.
+        The scheduler is woken up when the procedure is cancelled, also
+        from other threads, like the one setting the exit event.
+        """
+
+        self._wakeup = wakeup = asyncio.Event()
+        loop = asyncio.get_running_loop()
+
+        def wake_scheduler():
+            loop.call_soon_threadsafe(wakeup.set)
+
+        self._cancel_token.add_callback(wake_scheduler)
+
+        try:
+            while not self.cancelled:
+                self._wakeup.clear()
+                ready_steps = self._select_steps_to_start(
+                    self._get_steps_to_start()
+                )
+
+                if not ready_steps:
+                    if not self._get_running_steps():
+                        break
+
+                    await self._wakeup.wait()
+                    continue
+
+                for step in ready_steps:
+                    step['status'] = 'running'
+
+                inline_step = self._get_inline_step(ready_steps)
+
+                for step in ready_steps:
+                    if step is not inline_step:
+                        self._current_step = step['index'] + 1
+
+                        self.logger.debug(
+                            f"Starting parallel step '{step['name']}'..."
+                        )
+                        self._parallel_steps.append(asyncio.ensure_future(
+                            self._execute_async_step(step)
+                        ))
+
+                if inline_step is not None:
+                    await async_wait_resume()
+                    if self.cancelled:
+                        break
+
+                    self._current_step = inline_step['index'] + 1
+                    await self._execute_async_step(inline_step)
+
+            await async_wait_resume()
+
+        finally:
+            self._cancel_token.remove_callback(wake_scheduler)
+            await self._join_async_steps()
+            self._wakeup = None
+
+    async def _execute_async_step(self, step: dict):
+        """
+        Execute a step.
+
+        If the step is blocking and it raises an exception the procedure
+        execution will be stopped and the procedure will be cancelled.
+
+        :param step: The step to execute.
+
+        :raises Exception: If the step raises an exception.
+        """
+
+        self.logger.debug(f"Executing step '{step['name']}'...")
+
+        try:
+            step['result'] = await self._call_async_step_function(step)
+            self._count_step(step, 'completed')
+            self._finish_step(step, 'completed')
+
+            self.logger.debug(f"Step '{step['name']}' executed successfully")
+
+        except Exception as e:
+            self.logger.error(f"Step '{step['name']}' raised an exception: {e}")
+            self._count_step(step, 'failed')
+
+            if step['blocking']:
+                self._stop_on_error(e)
+                self._finish_step(step, 'failed')
+                raise e
+            
+            self._finish_step(step, 'failed')
+
+    async def _call_async_step_function(self, step: dict) -> Any:
+        """
+        Await the function of a step or, if it is not a coroutine function,
+        execute it in the worker pool of the procedure or in a worker process.
+
+        :param step: The step to call.
+
+        :return: The value returned by the function.
+
+        :raises Exception: If the function raises an exception.
+        """
+
+        params = self._get_step_params(step)
+        key, found, result = self._load_cached_result(step, params)
+
+        if found:
+            return result
+
+        while True:
+            try:
+                result = await self._attempt_async_step(step, params)
+                break
+
+            except StepCancelledError:
+                raise
+
+            except Exception as e:
+                delay = self._get_retry_delay(step, e)
+
+                if delay is None:
+                    raise
+
+                await asyncio.sleep(delay)
+                self._cancel_token.check()
+
+        self._store_cached_result(step, key, result)
+
+        return result
+
+    async def _attempt_async_step(self, step: dict, params: dict) -> Any:
+        """
+        Call the function of a step once, enforcing its timeout.
+
+        :param step: The step to call.
+        :param params: The parameters to pass to the function.
+
+        :return: The value returned by the function.
+
+        :raises StepTimeoutError: If the step times out.
+        :raises Exception: If the function raises an exception.
+        """
+
+        step['attempts'] += 1
+        self.metrics.increment('attempts', step['name'])
+
+        function = step['function']
+        cancel_token = CancellationToken(self._cancel_token)
+        call_params = self._get_call_params(step, params, cancel_token)
+
+        started = perf_counter()
+
+        if asyncio.iscoroutinefunction(function):
+            awaitable = self._measure_coroutine(function(**call_params))
+
+        elif step['executor'] == 'process':
+            awaitable = asyncio.get_running_loop().run_in_executor(
+                self._get_process_pool(),
+                partial(measure_call, function, call_params)
+            )
+
+        else:
+            # The worker pool of the procedure limits the running threads
+            # to max_workers, unlike the default executor of the loop
+            awaitable = asyncio.wrap_future(
+                self._worker_pool.submit(measure_call, function, call_params)
+            )
+
+        try:
+            return self._profile_attempt(
+                step,
+                *await asyncio.wait_for(awaitable, step['timeout'])
+            )
+
+        except asyncio.TimeoutError:
+            cancel_token.cancel()
+
+            self._count_step(step, 'timeouts')
+            self.metrics.add_profile(StepProfile(
+                step['name'],
+                step['attempts'],
+                'timeout',
+                perf_counter() - started
+            ))
+
+            raise StepTimeoutError(
+                f"Step '{step['name']}' timed out after"
+                f" {step['timeout']} seconds"
+            )
+
+    @staticmethod
+    async def _measure_coroutine(
+        coroutine: Awaitable
+    ) -> Tuple[Any, Optional[Exception], dict]:
+        """
+        Await a coroutine measuring its wall time, like measure_call.
+        The CPU time and the memory delta are not measured, as the event
+        loop executes other steps while the coroutine is suspended.
+        """
+
+        started = perf_counter()
+        result, error = None, None
+
+        try:
+            result = await coroutine
+
+        except Exception as e:
+            error = e
+
+        return result, error, {
+            'wall_time': perf_counter() - started,
+            'thread_id': get_ident(),
+            'process_id': os.getpid()
+        }
+
+    def _finish_step(self, step: dict, status: str):
+        """
+        Set the final status of a step and wake up the scheduler.
+
+        :param step: The finished step.
+        :param status: Either 'completed' or 'failed'.
+        """
+
+        step['status'] = status
+
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+        if status == 'completed':
+            self._save_checkpoint(step)
+
+    async def _join_async_steps(self):
+        """
+        Wait for the parallel steps or, if the procedure has been stopped,
+        cancel them.
+        """
+
+        self.logger.debug('Joining parallel steps...')
+
+        if self._cancel_token.cancelled:
+            for task in self._parallel_steps:
+                task.cancel()
+
+        await asyncio.gather(*self._parallel_steps, return_exceptions = True)
+
+    def __getstate__(self) -> dict:
+        state = super().__getstate__()
+        state.pop('_wakeup', None)
+
+        return state
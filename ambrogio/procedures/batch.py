@@ -0,0 +1,210 @@
+from dataclasses import dataclass, field
+from typing import Optional, Any, Dict, List, Iterable, Type
+from configparser import ConfigParser
+from importlib import import_module
+from itertools import product
+from time import perf_counter
+from threading import Thread, Event
+
+from ambrogio.procedures import Procedure
+from ambrogio.utils.time import Timer
+from ambrogio.utils.threading import exit_event, wait_resume
+
+
+@dataclass
+class BatchResult:
+    """
+    The result of a procedure executed in a batch.
+    """
+
+    procedure_name: str
+    params: Dict[str, Any] = field(default_factory = dict)
+    procedure: Optional[Procedure] = None
+    result: Any = None
+    error: Optional[Exception] = None
+    started: bool = False
+    finished: bool = False
+    elapsed: float = 0
+
+    @property
+    def status(self) -> str:
+        """
+        Either 'completed', 'failed' or, for procedures which have not been
+        started, 'cancelled'.
+        """
+
+        if self.finished:
+            return 'completed'
+
+        if self.started:
+            return 'failed'
+
+        return 'cancelled'
+
+    @property
+    def succeeded(self) -> bool:
+        """
+        Whether the procedure has been executed successfully.
+        """
+
+        return self.status == 'completed'
+
+    @property
+    def elapsed_time(self) -> str:
+        """
+        The elapsed time in the format HH:MM:SS.
+        """
+
+        return Timer.format_elapsed_time(0, self.elapsed)
+
+
+def expand_grid(grid: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Expand a grid of parameter values to all their combinations.
+    Values which are not lists, tuples, ranges or sets are used as a
+    single value.
+
+    :param grid: The values of each parameter, by parameter name.
+
+    :return: A list of parameter dicts.
+    """
+
+    values = [
+        list(value) if isinstance(value, (list, tuple, range, set))
+        else [value]
+        for value in grid.values()
+    ]
+
+    return [
+        dict(zip(grid.keys(), combination))
+        for combination in product(*values)
+    ]
+
+
+def summarize_results(results: Iterable[BatchResult]) -> Dict[str, Any]:
+    """
+    Aggregate the results of a batch.
+
+    :param results: The results of the batch.
+
+    :return: A dict with the number of jobs for each status and the
+    total, minimum, mean and maximum elapsed times of the started jobs.
+    """
+
+    results = list(results)
+    elapsed = [result.elapsed for result in results if result.started]
+
+    summary = {
+        'total': len(results),
+        'completed': 0,
+        'failed': 0,
+        'cancelled': 0,
+        'elapsed': {
+            'total': sum(elapsed),
+            'min': min(elapsed, default = 0),
+            'mean': sum(elapsed) / len(elapsed) if elapsed else 0,
+            'max': max(elapsed, default = 0)
+        }
+    }
+
+    for result in results:
+        summary[result.status] += 1
+
+    return summary
+
+
+def run_job(
+    procedure_class: Type[Procedure],
+    config: Optional[ConfigParser],
+    result: BatchResult
+) -> BatchResult:
+    """
+    Run a procedure of a batch, storing its outcome in the result.
+    Procedures are not started if the exit event has been set.
+
+    :param procedure_class: The procedure class, with its parameter values.
+    :param config: The project configuration.
+    :param result: The result to update.
+
+    :return: The updated result.
+    """
+
+    wait_resume()
+    if exit_event.is_set():
+        return result
+
+    result.started = True
+    started_at = perf_counter()
+
+    try:
+        result.procedure = procedure_class(config)
+        result.result = result.procedure._run()
+        result.finished = result.procedure.finished
+
+    except Exception as e:
+        result.error = e
+
+    result.elapsed = perf_counter() - started_at
+
+    return result
+
+
+def run_job_in_process(
+    module_name: str,
+    class_name: str,
+    config: Optional[ConfigParser],
+    result: BatchResult
+) -> BatchResult:
+    """
+    Run a procedure of a batch in a worker process, importing its class.
+    The procedure is cancelled when the exit event of the main process is
+    set, and its instance is not sent back to the main process.
+
+    :param module_name: The name of the module defining the procedure.
+    :param class_name: The name of the procedure class.
+    :param config: The project configuration.
+    :param result: The result to update.
+
+    :return: The updated result.
+    """
+
+    procedure_class = getattr(import_module(module_name), class_name)
+    job_finished = Event()
+
+    Thread(
+        target = watch_exit_event,
+        args = (job_finished,),
+        name = 'AmbrogioExitWatcher',
+        daemon = True
+    ).start()
+
+    try:
+        result = run_job(
+            procedure_class.with_params(**result.params),
+            config,
+            result
+        )
+
+    finally:
+        job_finished.set()
+
+    result.procedure = None
+
+    return result
+
+
+def watch_exit_event(job_finished: Event):
+    """
+    Set the exit event of a worker process, cancelling its procedure, when
+    the main process sets it, as SIGINT is only handled by the main process.
+    The shared event is checked at short intervals, instead of waiting for
+    it, so a terminated worker process can't block the main process when it
+    sets the event.
+
+    :param job_finished: An event set when the job of the process finishes.
+    """
+
+    while not job_finished.wait(0.05):
+        if exit_event.is_set():
+            exit_event.set()
+            break
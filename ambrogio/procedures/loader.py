@@ -1,17 +1,41 @@
 import os
 from types import ModuleType
-from typing import TypeVar, List, Type, Generator, Union
+from typing import (
+    TypeVar, List, Type, Generator, Union, Optional, Iterable, Tuple, Dict, Any,
+    Callable, TYPE_CHECKING
+)
+import sys
 import inspect
-from importlib import import_module
+import logging
+from pathlib import Path
+from threading import Thread, Event, RLock
+from importlib import import_module, reload, invalidate_caches
+from importlib.util import find_spec
 from pkgutil import iter_modules
 from configparser import ConfigParser
 
-from ambrogio.procedures import Procedure
-from ambrogio.procedures.basic import BasicProcedure
-from ambrogio.procedures.step import StepProcedure
+from ambrogio.utils.manifest import ProcedureManifest
 
+# Procedure types, batches and worker pools are only imported when
+# procedures are loaded or run, so listing them from the manifest is fast
+if TYPE_CHECKING:
+    from ambrogio.procedures import Procedure
+    from ambrogio.procedures.batch import BatchResult
+    from ambrogio.procedures.basic import BasicProcedure
+    from ambrogio.procedures.step import StepProcedure
+    from ambrogio.procedures.async_basic import AsyncBasicProcedure
+    from ambrogio.procedures.async_step import AsyncStepProcedure
+    from ambrogio.procedures.pipeline import PipelineProcedure
 
-ProcedureType = TypeVar('ProcedureType', BasicProcedure, StepProcedure)
+
+ProcedureType = TypeVar(
+    'ProcedureType',
+    'BasicProcedure',
+    'StepProcedure',
+    'AsyncBasicProcedure',
+    'AsyncStepProcedure',
+    'PipelineProcedure'
+)
 
 
 def walk_modules(path: str) -> List[ModuleType]:
@@ -48,6 +72,14 @@ class ProcedureLoader:
     ProcedureLoader is a class which locates, loads and 
     runs procedures in a Ambrogio project.
 
+    Procedures are located without importing their modules, using a
+    manifest stored in the '.ambrogio' directory of the project, and only
+    the module of a procedure is imported when the procedure is loaded.
+    The modules of the procedures whose name can't be read from the source
+    are imported when the procedures are listed, or when a procedure is
+    not found in the manifest.
+    Changed modules can be reloaded, without restarting the program.
+
     :param config: The project configuration.
     :param project_path: The path to the project.
     """
@@ -61,34 +93,119 @@ class ProcedureLoader:
         self._project_path = project_path
 
         self._procedures = {}
+        self._index = {}
+        self._unresolved_modules = []
+        self._modules = {}
+        self._lock = RLock()
+        self._watch_event = None
+        self._logger = logging.getLogger('Ambrogio')
+
         self._load_all_procedures()
 
     def _load_procedures(self, module: ModuleType):
         """
-        Load all procedures from the given module.
+        Load all procedures from the given module, storing the state of
+        its file to reload it when it changes.
 
         :param module: The module to load procedures from.
         """
 
+        self._track_module(module)
+
         for procedure in self.iter_procedure_classes(module):
             self._procedures[procedure.name] = procedure
 
+        # Track the project modules imported by the module, like the
+        # helpers of the procedures or the modules of their base classes
+        self._track_project_modules()
+
+    def _track_module(self, module: ModuleType):
+        """
+        Store the state of the file of a module, to reload the module when
+        the file changes.
+        """
+
+        file_path = getattr(module, '__file__', None)
+
+        if file_path:
+            self._modules[module.__name__] = (
+                file_path,
+                self._get_file_state(file_path)
+            )
+
+    def _track_project_modules(self):
+        """
+        Store the state of the files of the loaded modules of the project
+        package which are not tracked yet.
+        """
+
+        package_name = self.config['settings']['procedure_module']
+        package_name = package_name.split('.')[0]
+
+        for module_name, module in list(sys.modules.items()):
+            if (
+                module is not None
+                and module_name not in self._modules
+                and (
+                    module_name == package_name
+                    or module_name.startswith(f'{package_name}.')
+                )
+            ):
+                self._track_module(module)
+
     def _load_all_procedures(self):
         """
-        Load all procedures from the project.
+        Locate all procedures in the project, parsing the modules which
+        changed since the manifest has been updated. If the procedure module
+        is not a package, it is imported instead.
 
-        :raises ImportError: If the procedure module cannot be imported.
+        :raises ImportError: If the procedure module cannot be found.
         """
-        
-        try:
-            modules = walk_modules(self.config['settings']['procedure_module'])
-            
-            for module in modules:
+
+        module_name = self.config['settings']['procedure_module']
+        spec = find_spec(module_name)
+
+        if spec is None:
+            raise ModuleNotFoundError(f"No module named '{module_name}'")
+
+        if not spec.submodule_search_locations:
+            for module in walk_modules(module_name):
                 self._load_procedures(module)
-        
-        except ImportError:
-            raise
-    
+
+            return
+
+        package_path = Path(list(spec.submodule_search_locations)[0])
+        project_path = package_path.parents[module_name.count('.')]
+
+        manifest = ProcedureManifest(
+            project_path / '.ambrogio' / 'manifest.json'
+        )
+
+        self._index, self._unresolved_modules = manifest.scan(
+            package_path,
+            module_name
+        )
+
+    def _load_unresolved_modules(self):
+        """
+        Import the modules defining procedures whose name is not in the
+        manifest, unless already loaded. Modules which can't be imported
+        are logged and skipped.
+        """
+
+        with self._lock:
+            for module_name in self._unresolved_modules:
+                if module_name in self._modules:
+                    continue
+
+                try:
+                    self._load_procedures(import_module(module_name))
+
+                except Exception as e:
+                    self._logger.error(
+                        f"Procedures in '{module_name}' not loaded: {e}"
+                    )
+
     def list(self) -> List[str]:
         """
         Return a list with the names of all procedures available in the project.
@@ -96,25 +213,234 @@ class ProcedureLoader:
         :return: A list of procedure names.
         """
 
-        return list(self._procedures.keys())
+        self._load_unresolved_modules()
+
+        return list(dict.fromkeys([*self._index, *self._procedures]))
 
     def load(self, procedure_name: str) -> Type[ProcedureType]:
         """
-        Return the Procedure class for the given procedure name.
+        Return the Procedure class for the given procedure name, importing
+        its module the first time.
         If the procedure name is not found, raise a KeyError.
 
         :param procedure_name: The name of the procedure to load.
 
         :raises KeyError: If the procedure name is not found.
+        :raises ImportError: If the procedure module cannot be imported.
 
         :return: The Procedure class.
         """
 
+        with self._lock:
+            if (
+                procedure_name not in self._procedures
+                and procedure_name in self._index
+            ):
+                module_name, _ = self._index[procedure_name]
+                self._load_procedures(import_module(module_name))
+
+            elif procedure_name not in self._procedures:
+                self._load_unresolved_modules()
+
+            try:
+                return self._procedures[procedure_name]
+
+            except KeyError:
+                raise KeyError(f"Procedure not found: {procedure_name}")
+
+    def reload(self) -> List[str]:
+        """
+        Reload the loaded modules of the project whose files changed,
+        replacing their procedures, while the other modules are kept with
+        their state. Modules importing a reloaded module, or objects defined
+        in it, and modules defining procedures which extend classes of a
+        reloaded module are reloaded too, so they use the new objects.
+
+        If a module can't be reloaded, for example because of a syntax
+        error, the error is logged and its previous procedures are kept
+        until it changes again.
+
+        :return: The names of the reloaded or removed modules.
+        """
+
+        with self._lock:
+            self._track_project_modules()
+
+            changed = [
+                module_name
+                for module_name, (file_path, state) in self._modules.items()
+                if self._get_file_state(file_path) != state
+            ]
+
+            invalidate_caches()
+            self._load_all_procedures()
+
+            dependent = self._get_dependent_modules(changed)
+
+            while dependent:
+                changed += dependent
+                dependent = self._get_dependent_modules(changed)
+
+            for module_name in changed:
+                self._reload_module(module_name)
+
+            return changed
+
+    def _get_dependent_modules(self, module_names: List[str]) -> List[str]:
+        """
+        Get the loaded modules, not among the given ones, importing the
+        given modules or objects defined in them, or defining procedures
+        which extend classes of the given modules.
+        """
+
+        dependent = [
+            procedure.__module__
+            for procedure in self._procedures.values()
+            if procedure.__module__ not in module_names
+            and procedure.__module__ in self._modules
+            and any(
+                base.__module__ in module_names
+                for base in procedure.__mro__[1:]
+            )
+        ]
+
+        for module_name in self._modules:
+            module = sys.modules.get(module_name)
+
+            if (
+                module_name not in module_names
+                and module is not None
+                and self._imports_modules(module, module_names)
+            ):
+                dependent.append(module_name)
+
+        return list(dict.fromkeys(dependent))
+
+    @staticmethod
+    def _imports_modules(module: ModuleType, module_names: List[str]) -> bool:
+        """
+        Check whether a module references one of the given modules or an
+        object defined in them. The submodules of a package, which are set
+        as its attributes when they are imported, are not considered.
+        """
+
+        for value in list(vars(module).values()):
+            if isinstance(value, ModuleType):
+                if value.__name__.startswith(f'{module.__name__}.'):
+                    continue
+
+                value_module = value.__name__
+
+            else:
+                value_module = getattr(value, '__module__', None)
+
+            if value_module in module_names:
+                return True
+
+        return False
+
+    def _reload_module(self, module_name: str):
+        """
+        Reload a loaded module and its procedures, or remove them if its
+        file has been deleted.
+        """
+
+        file_path, _ = self._modules[module_name]
+        state = self._get_file_state(file_path)
+
+        try:
+            if state is None:
+                module = None
+                sys.modules.pop(module_name, None)
+
+            elif module_name in sys.modules:
+                module = reload(sys.modules[module_name])
+
+            else:
+                module = import_module(module_name)
+
+        except Exception as e:
+            self._logger.error(f"Module '{module_name}' not reloaded: {e}")
+            self._modules[module_name] = (file_path, state)
+            return
+
+        for name, procedure in list(self._procedures.items()):
+            if procedure.__module__ == module_name:
+                del self._procedures[name]
+
+        if module is None:
+            del self._modules[module_name]
+            self._logger.info(f"Module '{module_name}' removed")
+
+        else:
+            self._load_procedures(module)
+            self._logger.info(f"Module '{module_name}' reloaded")
+
+    def watch(
+        self,
+        interval: float = 1.0,
+        callback: Optional[Callable[[List[str]], Any]] = None
+    ):
+        """
+        Start a thread checking every interval seconds whether the loaded
+        modules changed and reloading them, until unwatch is called or the
+        exit event is set.
+
+        :param interval: The seconds between two checks.
+        :param callback: A function called with the names of the reloaded
+        modules, after each reload.
+        """
+
+        from ambrogio.utils.threading import exit_event
+
+        self.unwatch()
+
+        self._watch_event = watch_event = Event()
+
+        def watch_modules():
+            while (
+                not watch_event.wait(interval)
+                and not exit_event.is_set()
+            ):
+                try:
+                    module_names = self.reload()
+
+                except Exception as e:
+                    self._logger.error(f'Procedures not reloaded: {e}')
+                    continue
+
+                if module_names and callback is not None:
+                    callback(module_names)
+
+        Thread(
+            target = watch_modules,
+            name = 'AmbrogioWatcher',
+            daemon = True
+        ).start()
+
+    def unwatch(self):
+        """
+        Stop checking whether the loaded modules changed.
+        """
+
+        if self._watch_event is not None:
+            self._watch_event.set()
+            self._watch_event = None
+
+    @staticmethod
+    def _get_file_state(file_path: str) -> Optional[Tuple[int, int]]:
+        """
+        Get the modification time and the size of a file, or None if the
+        file doesn't exist.
+        """
+
         try:
-            return self._procedures[procedure_name]
+            stat = os.stat(file_path)
+
+        except OSError:
+            return None
 
-        except KeyError:
-            raise KeyError(f"Procedure not found: {procedure_name}")
+        return stat.st_mtime_ns, stat.st_size
 
     def run(self, procedure_name: str) -> ProcedureType:
         """
@@ -129,14 +455,144 @@ class ProcedureLoader:
         """
 
         procedure: ProcedureType = self.load(procedure_name)(self.config)
-        procedure._execute()
+        procedure._run()
 
         return procedure
 
+    def run_batch(
+        self,
+        jobs: Iterable[Union[str, Tuple[str, dict]]],
+        max_concurrency: Optional[int] = None,
+        executor: str = 'thread'
+    ) -> List['BatchResult']:
+        """
+        Run more procedures at the same time, each in its own thread or,
+        using the process executor, in its own worker process.
+        A job is either a procedure name or a tuple with a procedure name
+        and its parameter values, so the same procedure can be executed
+        with different parameters.
+
+        The maximum number of procedures running at the same time is taken
+        from the 'max_concurrency' setting and defaults to the number of
+        processors. Jobs not started when the exit event is set are
+        cancelled.
+
+        :param jobs: The procedures to run.
+        :param max_concurrency: The maximum number of running procedures.
+        :param executor: Either 'thread' or 'process'. With processes, the
+        procedure results must be picklable and the procedure instances
+        are not returned.
+
+        :raises KeyError: If a procedure or a parameter is not found.
+        :raises TypeError: If a parameter value is not valid.
+        :raises ValueError: If the executor is not valid.
+
+        :return: A list of BatchResult objects, in the order of the jobs.
+        """
+
+        if executor not in ('thread', 'process'):
+            raise ValueError("executor must be either 'thread' or 'process'")
+
+        from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+        from ambrogio.procedures.batch import (
+            BatchResult,
+            run_job,
+            run_job_in_process
+        )
+        from ambrogio.utils.threading import (
+            exit_event,
+            pause_event,
+            init_worker_process
+        )
+
+        procedures = []
+
+        for job in jobs:
+            name, params = (job, {}) if isinstance(job, str) else job
+            procedures.append((
+                self.load(name).with_params(**params),
+                BatchResult(name, dict(params))
+            ))
+
+        if max_concurrency is None:
+            max_concurrency = self.config.getint(
+                'settings',
+                'max_concurrency',
+                fallback = None
+            ) or os.cpu_count()
+
+        if executor == 'process':
+            pool = ProcessPoolExecutor(
+                max_concurrency,
+                initializer = init_worker_process,
+                initargs = (exit_event.share(), pause_event.share())
+            )
+
+        else:
+            pool = ThreadPoolExecutor(
+                max_concurrency,
+                thread_name_prefix = 'AmbrogioBatch'
+            )
+
+        with pool:
+            futures = []
+
+            for procedure, result in procedures:
+                if executor == 'process':
+                    base_class = procedure.__bases__[0]
+                    futures.append(pool.submit(
+                        run_job_in_process,
+                        base_class.__module__,
+                        base_class.__qualname__,
+                        self.config,
+                        result
+                    ))
+
+                else:
+                    futures.append(pool.submit(
+                        run_job,
+                        procedure,
+                        self.config,
+                        result
+                    ))
+
+        return [future.result() for future in futures]
+
+    def run_sweep(
+        self,
+        procedure_name: str,
+        grid: Dict[str, Any],
+        max_concurrency: Optional[int] = None,
+        executor: str = 'thread'
+    ) -> List['BatchResult']:
+        """
+        Run a procedure with all the combinations of the given parameter
+        values, at the same time.
+
+        :param procedure_name: The name of the procedure to run.
+        :param grid: The values of each parameter, by parameter name, as
+        lists, tuples or ranges. Other values are used as a single value.
+        :param max_concurrency: The maximum number of running procedures.
+        :param executor: Either 'thread' or 'process'.
+
+        :raises KeyError: If the procedure or a parameter is not found.
+        :raises TypeError: If a parameter value is not valid.
+
+        :return: A list of BatchResult objects, one for each combination.
+        """
+
+        from ambrogio.procedures.batch import expand_grid
+
+        return self.run_batch(
+            [(procedure_name, params) for params in expand_grid(grid)],
+            max_concurrency,
+            executor
+        )
+
     @staticmethod
     def iter_procedure_classes(
         module: ModuleType
-    ) -> Generator[Type[Procedure], None, None]:
+    ) -> Generator[Type['Procedure'], None, None]:
         """
         Return an iterator over all procedure classes defined in the given
         module that can be instantiated (i.e. which have name)
@@ -148,6 +604,8 @@ class ProcedureLoader:
         :return: An iterator over all procedure classes.
         """
 
+        from ambrogio.procedures import Procedure
+
         for obj in vars(module).values():
             if (
                 inspect.isclass(obj)
@@ -0,0 +1,189 @@
+import os
+from typing import Optional, Callable, Iterable, Any, List
+from itertools import islice
+from collections import deque
+
+from ambrogio.utils.threading import CancellationToken
+
+
+def apply_chunk(
+    function: Callable,
+    chunk: list,
+    params: dict,
+    cancel_token: Optional[CancellationToken] = None
+) -> list:
+    """
+    Call a function on each item of a chunk.
+
+    :param function: The function to call.
+    :param chunk: The items to pass as first argument of the function.
+    :param params: The other parameters to pass to the function.
+    :param cancel_token: The token checked before each item.
+
+    :return: The list of the values returned by the function.
+
+    :raises StepCancelledError: If the token is cancelled.
+    """
+
+    results = []
+
+    for item in chunk:
+        if cancel_token is not None:
+            cancel_token.check()
+
+        results.append(function(item, **params))
+
+    return results
+
+
+class MapTask:
+    """
+    The function of a map step, which consumes an iterable in chunks and
+    dispatches them to the worker pool of the procedure, keeping a bounded
+    number of chunks in flight. Results are streamed in the order of the
+    iterable.
+
+    :param procedure: The procedure executing the step.
+    :param function: The function to call on each item.
+    :param iterable: The items to process, consumed lazily.
+    :param chunk_size: The number of items of each chunk.
+    :param executor: Either 'thread' or 'process'.
+    :param on_result: A function called with each result.
+    :param collect: If the results must be returned as a list.
+    :param name: The name of the step, used to count its processed items.
+    """
+
+    def __init__(
+        self,
+        procedure,
+        function: Callable,
+        iterable: Iterable,
+        chunk_size: int,
+        executor: str,
+        on_result: Optional[Callable[[Any], Any]],
+        collect: bool,
+        name: str
+    ):
+        if chunk_size <= 0:
+            raise ValueError('chunk_size must be greater than 0')
+
+        self.procedure = procedure
+        self.function = function
+        self.iterable = iterable
+        self.chunk_size = chunk_size
+        self.executor = executor
+        self.on_result = on_result
+        self.collect = collect
+        self.name = name
+
+    def __call__(self, cancel_token: CancellationToken, **params) -> Any:
+        """
+        Process all the items.
+
+        :param cancel_token: The cancellation token of the step.
+        :param params: The other parameters to pass to the function.
+
+        :return: The list of the results if collect is set, otherwise the
+        number of processed items.
+        """
+
+        items = 0
+        results = [] if self.collect else None
+        pending = deque()
+        max_pending = self._get_max_pending()
+
+        iterator = iter(self.iterable)
+
+        while True:
+            cancel_token.check()
+            chunk = list(islice(iterator, self.chunk_size))
+
+            if not chunk:
+                break
+
+            pending.append(self._submit(chunk, params, cancel_token))
+
+            while len(pending) >= max_pending:
+                items += self._stream(
+                    self._get_results(pending.popleft()),
+                    results
+                )
+
+        while pending:
+            items += self._stream(self._get_results(pending.popleft()), results)
+
+        return results if self.collect else items
+
+    def _get_max_pending(self) -> int:
+        """
+        Get the maximum number of chunks in flight.
+        """
+
+        if self.executor == 'process':
+            processes = (
+                self.procedure._get_setting('max_processes')
+                or os.cpu_count()
+                or 1
+            )
+
+            return processes * 2
+
+        return self.procedure._worker_pool.max_workers * 2
+
+    def _submit(self, chunk: list, params: dict, cancel_token):
+        """
+        Submit a chunk to the worker pool.
+        """
+
+        if self.executor == 'process':
+            return self.procedure._get_process_pool().submit(
+                apply_chunk,
+                self.function,
+                chunk,
+                params
+            )
+
+        return self.procedure._worker_pool.submit(
+            apply_chunk,
+            self.function,
+            chunk,
+            params,
+            cancel_token
+        )
+
+    def _get_results(self, future) -> List[Any]:
+        """
+        Get the results of a chunk, processing it in the current thread if
+        no worker has started it yet.
+        """
+
+        if self.executor == 'process':
+            return future.result()
+
+        return self.procedure._worker_pool.run_or_wait(future)
+
+    @property
+    def items(self) -> int:
+        """
+        The number of processed items.
+        """
+
+        return self.procedure.metrics.get('items', self.name)
+
+    def _stream(self, chunk_results: List[Any], results: Optional[list]) -> int:
+        """
+        Pass the results of a chunk to the callback and to the result list.
+
+        :return: The number of results.
+        """
+
+        for result in chunk_results:
+            if self.on_result is not None:
+                self.on_result(result)
+
+            if results is not None:
+                results.append(result)
+
+        self.procedure.metrics.increment('items', self.name, len(chunk_results))
+
+        return len(chunk_results)
@@ -64,6 +64,40 @@ class ProcedureParam:
 
             self.value = self.type(value)
             
+    def convert(self, value: Any) -> ProcedureParamType:
+        """
+        Convert the given value to the type of this parameter.
+        Strings like 'true', 'yes' and '1' are converted to True, while
+        'false', 'no' and '0' are converted to False.
+
+        :param value: The value to convert.
+
+        :return: The converted value.
+
+        :raises TypeError: If the value can't be converted.
+        """
+
+        if value is None or self._check_type(value, self.type):
+            return value
+
+        if self.type == bool and isinstance(value, str):
+            if value.lower() in ('true', 'yes', 'y', '1'):
+                return True
+
+            if value.lower() in ('false', 'no', 'n', '0'):
+                return False
+
+        elif (
+            self.type != bool
+            and not isinstance(value, bool)
+            and self._check_conversion(value)
+        ):
+            return self.type(value)
+
+        raise TypeError(
+            f"Parameter {self.name} must be of type {self.type.__name__}"
+        )
+
     def _check_conversion(self, value: Any) -> bool:
         """
         Check whether the given value can be converted to the correct type.
@@ -71,7 +105,7 @@ class ProcedureParam:
 
         try:
             self.type(value)
-        except ValueError:
+        except (ValueError, TypeError):
             return False
 
         return True
@@ -0,0 +1,297 @@
+from typing import (
+    List, Optional, Callable, Iterable, Iterator, Any, TYPE_CHECKING
+)
+from threading import Thread
+import inspect
+
+from ambrogio.procedures import Procedure
+from ambrogio.utils.threading import (
+    wait_resume,
+    StepCancelledError,
+    PipeQueue
+)
+
+if TYPE_CHECKING:
+    from rich.panel import Panel
+
+
+class PipelineProcedure(Procedure):
+    """
+    Class for Ambrogio pipeline procedures.
+
+    Stages are executed concurrently, each in its own thread, and connected
+    by bounded queues: the first stage produces the items, each following
+    stage receives an iterator over the items produced by the previous one,
+    and the last stage consumes them. When a queue is full, the stage
+    producing its items waits, so memory doesn't depend on the number of
+    items.
+    """
+
+    queue_size: int = 100
+
+    _stages: List[dict]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self._stages = []
+
+    @property
+    def total_stages(self) -> int:
+        """
+        The total number of stages.
+
+        :return: The total number of stages.
+        """
+
+        return len(self._stages)
+
+    @property
+    def result(self) -> Any:
+        """
+        The value returned by the last stage, if it is not an iterable.
+        """
+
+        return getattr(self, '_result', None)
+
+    @property
+    def _dashboard_widgets(self) -> List['Panel']:
+        """
+        Additional widgets to be added to Ambrogio dashboard.
+
+        :return: A list of Rich panels.
+        """
+
+        from rich.panel import Panel
+        from rich.table import Table
+
+        table = Table(show_header = True, header_style = 'bold', expand = True)
+
+        table.add_column('Stage')
+        table.add_column('In', justify = 'right')
+        table.add_column('Out', justify = 'right')
+        table.add_column('Queue', justify = 'right')
+
+        for stage in self._stages:
+            queue = stage.get('queue')
+
+            table.add_row(
+                stage['name'],
+                f"{self.metrics.get('items_in', stage['name'])}",
+                f"{self.metrics.get('items_out', stage['name'])}",
+                f'{len(queue)}/{queue.maxsize}' if queue else ''
+            )
+
+        return [Panel(table, title = 'Pipeline')]
+
+    def _execute(self) -> Any:
+        """
+        Execute the procedure.
+        """
+
+        self.logger.info(f"Executing '{self.name}' procedure...")
+
+        self.set_up()
+
+        if not self.total_stages:
+            raise ValueError('No stages added to the procedure')
+
+        self._result = None
+        self._errors = []
+
+        wait_resume()
+        if self.cancelled:
+            return
+
+        threads = self._start_stages()
+
+        for thread in threads:
+            thread.join()
+
+        if self._errors:
+            self.logger.error('Stopping procedure execution')
+            self.cancel()
+            raise self._errors[0]
+
+        wait_resume()
+        if not self.cancelled:
+            self._finished = True
+
+            self.tear_down()
+
+            self.logger.info(f"Procedure '{self.name}' executed successfully")
+
+        return self._result
+
+    def set_up(self):
+        """
+        Method called before the execution of the procedure.
+        Procedure stages can be added here.
+        """
+
+        pass
+
+    def tear_down(self):
+        """
+        Method called after the execution of the procedure.
+        """
+
+        pass
+
+    def add_stage(
+        self,
+        function: Callable,
+        name: Optional[str] = None,
+        params: Optional[dict] = None,
+        queue_size: Optional[int] = None,
+    ):
+        """
+        Add a stage to the procedure.
+
+        :param function: The function to be executed. Except for the first
+        stage, it receives an iterator over the items of the previous stage
+        as first argument. Except for the last stage, it must return an
+        iterable, usually being a generator function.
+        :param name: The name of the stage.
+        :param params: The other parameters to be passed to the function.
+        :param queue_size: The maximum number of items produced by the stage
+        and waiting for the next one. Defaults to the queue_size attribute.
+
+        :raises ValueError: If the queue size is not greater than 0.
+        """
+
+        if name is None:
+            name = function.__name__
+
+        queue_size = queue_size or self.queue_size
+
+        if queue_size <= 0:
+            raise ValueError('queue_size must be greater than 0')
+
+        self.logger.debug(f"Adding stage '{name}' to procedure '{self.name}'")
+
+        self._stages.append({
+            'function': function,
+            'name': name,
+            'params': params or {},
+            'queue_size': queue_size,
+            'queue': None
+        })
+
+    def _start_stages(self) -> List[Thread]:
+        """
+        Connect the stages with their queues and start their threads.
+
+        :return: The list of started threads.
+        """
+
+        threads = []
+        input_queue = None
+
+        for index, stage in enumerate(self._stages):
+            is_last = index == len(self._stages) - 1
+
+            output_queue = None if is_last else PipeQueue(stage['queue_size'])
+            stage['queue'] = output_queue
+
+            thread = Thread(
+                target = self._run_stage,
+                args = (stage, input_queue, output_queue),
+                name = f"AmbrogioStage-{stage['name']}",
+                daemon = True
+            )
+
+            self.logger.debug(f"Starting stage '{stage['name']}'...")
+            thread.start()
+            threads.append(thread)
+
+            input_queue = output_queue
+
+        return threads
+
+    def _run_stage(
+        self,
+        stage: dict,
+        input_queue: Optional[PipeQueue],
+        output_queue: Optional[PipeQueue]
+    ):
+        """
+        Execute a stage, passing its items to the next one.
+        If the stage raises an exception, all the stages are stopped.
+        When the stage ends, its input queue is closed, so the previous
+        stages stop producing items nobody will read.
+
+        :param stage: The stage to execute.
+        :param input_queue: The queue with the items of the previous stage.
+        :param output_queue: The queue for the items of the next stage.
+        """
+
+        try:
+            if input_queue is None:
+                output = stage['function'](**stage['params'])
+
+            else:
+                output = stage['function'](
+                    self._iter_input(stage, input_queue),
+                    **stage['params']
+                )
+
+            if output_queue is not None:
+                for item in output:
+                    self._cancel_token.check()
+                    output_queue.put(item)
+                    self.metrics.increment('items_out', stage['name'])
+
+                output_queue.finish()
+
+            elif inspect.isgenerator(output) or isinstance(output, Iterator):
+                for _ in output:
+                    self._cancel_token.check()
+                    self.metrics.increment('items_out', stage['name'])
+
+            else:
+                self._result = output
+
+            self.logger.debug(f"Stage '{stage['name']}' executed successfully")
+
+        except StepCancelledError:
+            if self.cancelled:
+                self._stop_stages()
+
+            else:
+                # The next stage stopped reading its input
+                self.logger.debug(
+                    f"Stage '{stage['name']}' stopped by the next stage"
+                )
+
+        except Exception as e:
+            self.logger.error(
+                f"Stage '{stage['name']}' raised an exception: {e}"
+            )
+            self._errors.append(e)
+
+            self._stop_stages()
+
+        finally:
+            if input_queue is not None:
+                input_queue.close()
+
+    def _iter_input(self, stage: dict, input_queue: PipeQueue) -> Iterable:
+        """
+        Iterate over the items of the previous stage, counting them.
+        """
+
+        for item in input_queue:
+            self.metrics.increment('items_in', stage['name'])
+            yield item
+
+    def _stop_stages(self):
+        """
+        Cancel the procedure and wake up all the stages.
+        """
+
+        self.cancel()
+
+        for stage in self._stages:
+            if stage['queue'] is not None:
+                stage['queue'].close()
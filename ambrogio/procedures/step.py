@@ -1,12 +1,35 @@
-from typing import List, Optional, Callable, Any
-from threading import Thread
+from typing import (
+    List, Optional, Callable, Iterable, Any, Tuple, TYPE_CHECKING
+)
+import re
+import inspect
+from time import perf_counter
+from threading import Condition, Lock, Thread
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
 import logging
 
-from rich.panel import Panel
-from rich.progress import Progress, TextColumn, BarColumn, TaskProgressColumn
-
 from ambrogio.procedures import Procedure
-from ambrogio.utils.threading import exit_event, wait_resume
+from ambrogio.procedures.map import MapTask
+from ambrogio.utils.cache import StepCache
+from ambrogio.utils.checkpoint import Checkpoint
+from ambrogio.utils.memory import format_bytes
+from ambrogio.utils.metrics import StepProfile, measure_call
+from ambrogio.utils.threading import (
+    exit_event,
+    pause_event,
+    wait_resume,
+    init_worker_process,
+    WorkerPool,
+    CancellationToken,
+    StepCancelledError,
+    StepTimeoutError
+)
+
+if TYPE_CHECKING:
+    from rich.table import Table
+
+    from ambrogio.cli.widgets import CachedWidget
 
 
 class StepProcedure(Procedure):
@@ -14,15 +37,30 @@ class StepProcedure(Procedure):
     Class for Ambrogio step procedures.
     """
 
-    _steps: List[dict] = []
-    _parallel_steps: List[Thread] = []
-    _current_step: int = 0
-    _completed_steps: int = 0
-    _failed_steps: int = 0
+    max_workers: Optional[int] = None
+    max_processes: Optional[int] = None
+    cache_size: Optional[int] = None
+    cancel_timeout: Optional[float] = None
+
+    checkpoint: bool = False
+    checkpoint_results: bool = False
+
+    dashboard_steps: int = 10
+
+    _steps: List[dict]
+    _parallel_steps: List[Future]
+    _current_step: int
+    _step_error: Optional[Exception]
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+        self._steps = []
+        self._parallel_steps = []
+        self._current_step = 0
+        self._step_error = None
+        self._dashboard = None
+
     @property
     def current_step(self) -> Optional[dict]:
         """
@@ -60,7 +98,7 @@ class StepProcedure(Procedure):
         :return: The number of completed steps.
         """
 
-        return self._completed_steps
+        return self.metrics.get('completed')
 
     @property
     def failed_steps(self) -> int:
@@ -70,15 +108,102 @@ class StepProcedure(Procedure):
         :return: The number of failed steps.
         """
 
-        return self._failed_steps
+        return self.metrics.get('failed')
+
+    @property
+    def retries(self) -> int:
+        """
+        The number of retried step attempts.
+
+        :return: The number of retries.
+        """
+
+        return self.metrics.get('retries')
 
     @property
-    def _dashboard_widgets(self) -> List[Panel]:
+    def timeouts(self) -> int:
+        """
+        The number of step attempts which timed out.
+
+        :return: The number of timeouts.
+        """
+
+        return self.metrics.get('timeouts')
+
+    @property
+    def _dashboard_widgets(self) -> List['CachedWidget']:
         """
         Additional widgets to be added to Ambrogio dashboard.
+        The widgets are created once and rendered again only when the
+        progress of the procedure changes.
+
+        :return: A list of widgets wrapping Rich panels.
+        """
+
+        if self._dashboard is None:
+            self._dashboard = self._create_dashboard_widgets()
+
+        dashboard = self._dashboard
+        progress = dashboard['progress']
+
+        running_maps = {
+            step['index']: step for step in self._get_running_steps()
+            if isinstance(step['function'], MapTask)
+        }
+
+        state = (
+            self.total_steps,
+            self.completed_steps,
+            self.failed_steps,
+            self.retries,
+            self.timeouts,
+            tuple(
+                (index, step['function'].items)
+                for index, step in running_maps.items()
+            )
+        )
 
-        :return: A list of Rich panels.
+        if dashboard['state'] != state:
+            dashboard['state'] = state
+            self._update_progress_widget(running_maps)
+
+        widgets = [dashboard['progress_widget']]
+        profile_count = self.metrics.profile_count
+
+        if profile_count:
+            if dashboard['profile_count'] != profile_count:
+                from rich.panel import Panel
+
+                dashboard['profile_count'] = profile_count
+                dashboard['profiles_widget'].update(Panel(
+                    self._get_profiles_table(
+                        self.metrics.summarize_profiles()
+                    ),
+                    title='Steps'
+                ))
+
+            widgets.append(dashboard['profiles_widget'])
+        
+        return widgets
+
+    def _create_dashboard_widgets(self) -> dict:
         """
+        Create the widgets of the dashboard.
+
+        :return: A dict with the widgets, the ids of the progress tasks and
+        the last rendered state.
+        """
+
+        from rich.panel import Panel
+        from rich.text import Text
+        from rich.progress import (
+            Progress,
+            TextColumn,
+            BarColumn,
+            TaskProgressColumn
+        )
+
+        from ambrogio.cli.widgets import CachedWidget
 
         progress = Progress(
             TextColumn('[progress.description]{task.description}'),
@@ -87,15 +212,115 @@ class StepProcedure(Procedure):
             expand=True,
             auto_refresh=False
         )
-        
-        progress.add_task(
+
+        steps_task = progress.add_task(
             'Steps',
             total=self.total_steps,
-            completed=self.completed_steps,
             finished_style='green'
         )
-        
-        return [Panel(progress, title='Progress')]
+
+        return {
+            'progress': progress,
+            'steps_task': steps_task,
+            'map_tasks': {},
+            'counters': Text(justify='right'),
+            'progress_widget': CachedWidget(
+                Panel(progress, title='Progress')
+            ),
+            'profiles_widget': CachedWidget(),
+            'profile_count': 0,
+            'state': None
+        }
+
+    def _update_progress_widget(self, running_maps: dict):
+        """
+        Update the progress tasks of the steps and of the running map steps.
+
+        :param running_maps: The running map steps, by index.
+        """
+
+        from rich.console import Group
+        from rich.panel import Panel
+
+        dashboard = self._dashboard
+        progress = dashboard['progress']
+        map_tasks = dashboard['map_tasks']
+
+        progress.update(
+            dashboard['steps_task'],
+            total=self.total_steps,
+            completed=self.completed_steps
+        )
+
+        for index in list(map_tasks):
+            if index not in running_maps:
+                progress.remove_task(map_tasks.pop(index))
+
+        for index, step in running_maps.items():
+            if index not in map_tasks:
+                map_tasks[index] = progress.add_task(
+                    f"{step['name']} (items)",
+                    total=None
+                )
+
+            progress.update(map_tasks[index], completed=step['function'].items)
+
+        renderable = progress
+
+        # The counters are only shown once there is something to count
+        if self.failed_steps or self.retries or self.timeouts:
+            counters = dashboard['counters']
+            counters.plain = (
+                f'Failed: {self.failed_steps}'
+                f'  Retries: {self.retries}'
+                f'  Timeouts: {self.timeouts}'
+            )
+
+            renderable = Group(progress, counters)
+
+        dashboard['progress_widget'].update(
+            Panel(renderable, title='Progress')
+        )
+
+    def _get_profiles_table(self, profiles: dict) -> 'Table':
+        """
+        Get a table with the resources used by the slowest steps.
+
+        :param profiles: The profiles summarized by the procedure metrics.
+
+        :return: A Rich table.
+        """
+
+        from rich.table import Table
+
+        table = Table(show_header=True, header_style='bold', expand=True)
+
+        table.add_column('Step')
+        table.add_column('Attempts', justify='right')
+        table.add_column('Wall time', justify='right')
+        table.add_column('CPU time', justify='right')
+        table.add_column('Memory', justify='right')
+        table.add_column('Threads', justify='right')
+        table.add_column('Status')
+
+        slowest = sorted(
+            profiles.items(),
+            key=lambda item: item[1]['wall_time'],
+            reverse=True
+        )[:self.dashboard_steps]
+
+        for name, profile in slowest:
+            table.add_row(
+                name,
+                f"{profile['attempts']}",
+                f"{profile['wall_time']:.3f} s",
+                f"{profile['cpu_time']:.3f} s",
+                format_bytes(profile['memory_delta']),
+                f"{len(profile['threads'])}",
+                profile['status']
+            )
+
+        return table
 
     def _execute(self) -> Any:
         """
@@ -109,36 +334,284 @@ class StepProcedure(Procedure):
         if not self.total_steps:
             raise ValueError('No steps added to the procedure')
 
-        for step in self._steps:
-            self._current_step += 1
+        self._worker_pool = WorkerPool(self._get_setting('max_workers'))
+        self._process_pool = None
+        self._process_pool_lock = Lock()
+        self._step_cache = None
+        self._step_error = None
+        self._load_checkpoint()
 
-            if step['parallel']:
-                parallel_step = Thread(
-                    target=self._execute_step,
-                    args=(step,)
-                )
-                
-                self.logger.debug(f"Starting parallel step '{step['name']}'...")
-                parallel_step.start()
-                self._parallel_steps.append(parallel_step)
+        try:
+            self._schedule_steps()
 
-            else:
+            wait_resume()
+            if not self.cancelled:
                 self._join_parallel_steps()
 
-                wait_resume()
-                if not exit_event.is_set():
-                    self._execute_step(step)
+        finally:
+            if self._cancel_token.cancelled:
+                self._stop_parallel_steps()
 
-        wait_resume()
-        if not exit_event.is_set():
-            self._join_parallel_steps()
-        
+            self._worker_pool.shutdown(wait = False)
+
+            if self._process_pool is not None:
+                self._process_pool.shutdown(wait = False)
+
+        if self._step_error is not None:
+            raise self._step_error
+
+        if not self.cancelled:
+            self._remove_checkpoint()
             self._finished = True
 
             self.tear_down()
 
             self.logger.info(f"Procedure '{self.name}' executed successfully")
 
+    def _schedule_steps(self):
+        """
+        Start each step as soon as all its dependencies have finished.
+
+        Parallel steps are started in separate threads. The other steps are
+        executed one at a time: in the procedure thread when no other step
+        can be started until they finish, like when they are added without
+        explicit dependencies, or in a separate thread otherwise, so they
+        don't delay the steps which don't depend on them.
+
+        The scheduler is woken up when the procedure is cancelled, so the
+        running steps are stopped even if they ignore their token.
+        """
+
+        self._steps_condition = Condition()
+        self._cancel_token.add_callback(self._wake_scheduler)
+
+        try:
+            while not self.cancelled:
+                with self._steps_condition:
+                    ready_steps = self._select_steps_to_start(
+                        self._get_steps_to_start()
+                    )
+
+                    if not ready_steps:
+                        if not self._get_running_steps():
+                            break
+
+                        self._steps_condition.wait()
+                        continue
+
+                    for step in ready_steps:
+                        step['status'] = 'running'
+
+                    inline_step = self._get_inline_step(ready_steps)
+
+                for step in ready_steps:
+                    if step is not inline_step:
+                        self._start_parallel_step(step)
+
+                if inline_step is not None:
+                    wait_resume()
+                    if self.cancelled:
+                        break
+
+                    self._current_step = inline_step['index'] + 1
+                    self._execute_step(inline_step)
+
+        finally:
+            self._cancel_token.remove_callback(self._wake_scheduler)
+
+    def _select_steps_to_start(self, ready_steps: List[dict]) -> List[dict]:
+        """
+        Select the ready steps which can be started now: all the parallel
+        ones and, unless another one is running, the first sequential one,
+        so sequential steps never run at the same time.
+
+        :param ready_steps: The ready steps.
+
+        :return: A list of steps.
+        """
+
+        parallel_steps = [step for step in ready_steps if step['parallel']]
+
+        if any(not step['parallel'] for step in self._get_running_steps()):
+            return parallel_steps
+
+        sequential_steps = [
+            step for step in ready_steps
+            if not step['parallel']
+        ]
+
+        return parallel_steps + sequential_steps[:1]
+
+    def _get_inline_step(self, started_steps: List[dict]) -> Optional[dict]:
+        """
+        Get the sequential step which can be executed by the scheduler
+        itself, because it is the only running step and all the pending
+        steps depend on it, so no other step can be started until it
+        finishes.
+
+        :param started_steps: The steps just started.
+
+        :return: The step or None.
+        """
+
+        if len(started_steps) != 1 or started_steps[0]['parallel']:
+            return None
+
+        step = started_steps[0]
+
+        if len(self._get_running_steps()) > 1:
+            return None
+
+        # Steps only depend on the steps added before them
+        dependents = {step['index']}
+
+        for other in self._steps[step['index'] + 1:]:
+            if any(index in dependents for index in other['depends_on']):
+                dependents.add(other['index'])
+
+        if all(
+            other['index'] in dependents
+            for other in self._steps
+            if other['status'] == 'pending'
+        ):
+            return step
+
+        return None
+
+    def _wake_scheduler(self):
+        """
+        Wake up the scheduler waiting for a step to finish.
+        """
+
+        with self._steps_condition:
+            self._steps_condition.notify_all()
+
+    def _get_setting(self, name: str, type_: type = int) -> Any:
+        """
+        Get a numeric setting from the procedure attribute with the given
+        name or, if not set, from the project configuration.
+
+        :param name: The name of the setting.
+        :param type_: Either int or float.
+
+        :return: The setting value or None to use the default.
+        """
+
+        value = getattr(self, name, None)
+
+        if value is not None:
+            return value
+
+        if self.config is not None:
+            getter = (
+                self.config.getfloat if type_ is float
+                else self.config.getint
+            )
+
+            return getter('settings', name, fallback = None)
+
+        return None
+
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        """
+        Get the pool of processes executing the process steps, starting
+        it on first use.
+
+        :return: A ProcessPoolExecutor object.
+        """
+
+        with self._process_pool_lock:
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(
+                    self._get_setting('max_processes'),
+                    initializer = init_worker_process,
+                    initargs = (
+                        exit_event.share(),
+                        pause_event.share(),
+                        self._cancel_token.share()
+                    )
+                )
+
+        return self._process_pool
+
+    def _get_step_cache(self) -> StepCache:
+        """
+        Get the cache of the step results, stored in the project directory.
+        Its maximum size in megabytes is taken from the 'cache_size' setting
+        and defaults to 1024.
+
+        :return: A StepCache object.
+        """
+
+        if self._step_cache is None:
+            cache_size = self._get_setting('cache_size') or 1024
+
+            self._step_cache = StepCache(
+                self.project_path / '.ambrogio' / 'cache',
+                cache_size * 1024 * 1024
+            )
+
+        return self._step_cache
+
+    def _get_ready_steps(self) -> List[dict]:
+        """
+        Get the pending steps whose dependencies have all finished.
+
+        :return: A list of steps.
+        """
+
+        return [
+            step for step in self._steps
+            if step['status'] == 'pending'
+            and all(
+                self._steps[index]['status'] in ('completed', 'failed')
+                for index in step['depends_on']
+            )
+        ]
+
+    def _get_steps_to_start(self) -> List[dict]:
+        """
+        Get the ready steps, after resuming the ones completed in a
+        previous execution.
+
+        :return: A list of steps.
+        """
+
+        while True:
+            ready_steps = self._get_ready_steps()
+
+            resumed_steps = [
+                step for step in ready_steps
+                if self._resume_step(step)
+            ]
+
+            if not resumed_steps:
+                return ready_steps
+
+    def _get_running_steps(self) -> List[dict]:
+        """
+        Get the steps which are currently running.
+
+        :return: A list of steps.
+        """
+
+        return [step for step in self._steps if step['status'] == 'running']
+
+    def _start_parallel_step(self, step: dict):
+        """
+        Submit a step to the worker pool, either a parallel step or a
+        sequential one which must not delay the other steps.
+        If all the workers are busy, the step is queued.
+
+        :param step: The step to start.
+        """
+
+        self._current_step = step['index'] + 1
+
+        self.logger.debug(f"Starting parallel step '{step['name']}'...")
+        parallel_step = self._worker_pool.submit(self._execute_step, step)
+        self._parallel_steps.append(parallel_step)
+
     def set_up(self):
         """
         Method called before the execution of the procedure.
@@ -161,6 +634,13 @@ class StepProcedure(Procedure):
         parallel: bool = False,
         blocking: bool = True,
         params: Optional[dict] = None,
+        depends_on: Optional[List[str]] = None,
+        executor: str = 'thread',
+        inputs: Optional[dict] = None,
+        cache: bool = False,
+        timeout: Optional[float] = None,
+        retries: int = 0,
+        backoff: float = 0,
     ):
         """
         Add a step to the procedure.
@@ -170,29 +650,194 @@ class StepProcedure(Procedure):
         :param parallel: If the step can be executed in a separate thread.
         :param blocking: If the step can block the execution of the procedure.
         :param params: The parameters to be passed to the function.
+        :param depends_on: The names of the steps which must be finished
+        before the step is started. If not set, a parallel step depends on
+        the last sequential step and a sequential step depends on all the
+        previous steps.
+        :param executor: Either 'thread' or 'process'. Process steps are
+        executed in a pool of worker processes, so the function and its
+        params must be picklable.
+        :param inputs: A dict mapping parameter names to the names of the
+        steps whose results must be passed as those parameters. The step
+        depends on these steps, even if not listed in depends_on.
+        :param cache: If the result of the step must be cached on disk and
+        reused when the step is executed again with the same code and
+        parameters.
+        :param timeout: The maximum number of seconds of each attempt.
+        :param retries: The number of times the step is executed again if
+        it fails or times out.
+        :param backoff: The number of seconds to wait before the first retry,
+        doubled before each following retry.
 
-        :raises ValueError: If the function is not callable.
+        :raises ValueError: If a dependency or an input step has not been
+        added yet or if the executor is not valid.
         """
 
         if name is None:
             name = function.__name__
 
+        if executor not in ('thread', 'process'):
+            raise ValueError(
+                f"Step executor must be 'thread' or 'process', not '{executor}'"
+            )
+
         self.logger.debug(f"Adding step '{name}' to procedure '{self.name}'")
 
+        if depends_on is None:
+            dependencies = self._get_implicit_dependencies(parallel)
+        
+        else:
+            dependencies = self._get_dependencies(depends_on)
+
+        step_inputs = {
+            param: self._get_dependencies([input_name])[-1]
+            for param, input_name in (inputs or {}).items()
+        }
+
+        for index in step_inputs.values():
+            if index not in dependencies:
+                dependencies.append(index)
+
         self._steps.append({
             'function': function,
             'name': name,
             'parallel': parallel,
             'blocking': blocking,
-            'params': params or {}
+            'params': params or {},
+            'index': len(self._steps),
+            'depends_on': dependencies,
+            'executor': executor,
+            'inputs': step_inputs,
+            'cache': cache,
+            'cancellable': self._accepts_cancel_token(function),
+            'timeout': timeout,
+            'retries': retries,
+            'backoff': backoff,
+            'status': 'pending',
+            'attempts': 0,
+            'result': None,
+            'resumed': False
         })
 
+    def map_step(
+        self,
+        function: Callable,
+        iterable: Iterable,
+        name: Optional[str] = None,
+        chunk_size: int = 100,
+        parallel: bool = False,
+        blocking: bool = True,
+        params: Optional[dict] = None,
+        depends_on: Optional[List[str]] = None,
+        executor: str = 'thread',
+        inputs: Optional[dict] = None,
+        on_result: Optional[Callable[[Any], Any]] = None,
+        collect: bool = False,
+    ):
+        """
+        Add a step calling a function on each item of an iterable.
+
+        The iterable is consumed lazily in chunks, which are dispatched to
+        the worker pool keeping a bounded number of chunks in flight, so
+        memory doesn't depend on the number of items.
+
+        :param function: The function to be called with each item as first
+        argument.
+        :param iterable: The items to process.
+        :param name: The name of the step.
+        :param chunk_size: The number of items of each chunk.
+        :param parallel: If the step can be executed in a separate thread.
+        :param blocking: If the step can block the execution of the procedure.
+        :param params: The other parameters to be passed to the function.
+        :param depends_on: The names of the steps which must be finished
+        before the step is started.
+        :param executor: Either 'thread' or 'process', used for the chunks.
+        :param inputs: A dict mapping parameter names to the names of the
+        steps whose results must be passed as those parameters.
+        :param on_result: A function called with each result, in the order
+        of the items.
+        :param collect: If the results must be collected in a list, which
+        becomes the result of the step. Otherwise the result of the step is
+        the number of processed items.
+
+        :raises ValueError: If chunk_size is not greater than 0, or for the
+        same reasons of add_step.
+        """
+
+        name = name or function.__name__
+
+        self.add_step(
+            MapTask(
+                self,
+                function,
+                iterable,
+                chunk_size,
+                executor,
+                on_result,
+                collect,
+                name
+            ),
+            name = name,
+            parallel = parallel,
+            blocking = blocking,
+            params = params,
+            depends_on = depends_on,
+            inputs = inputs
+        )
+
+    def _get_implicit_dependencies(self, parallel: bool) -> List[int]:
+        """
+        Get the dependencies of a step added without explicit dependencies.
+
+        :param parallel: If the step can be executed in a separate thread.
+
+        :return: A list of step indexes.
+        """
+
+        if not parallel:
+            return [step['index'] for step in self._steps]
+        
+        for step in reversed(self._steps):
+            if not step['parallel']:
+                return [step['index']]
+        
+        return []
+
+    def _get_dependencies(self, names: List[str]) -> List[int]:
+        """
+        Get the indexes of the steps with the given names.
+        If more steps share the same name, the step depends on all of them.
+
+        :param names: The names of the steps.
+
+        :return: A list of step indexes.
+
+        :raises ValueError: If a step with the given name has not been added.
+        """
+
+        dependencies = []
+
+        for name in names:
+            indexes = [
+                step['index'] for step in self._steps
+                if step['name'] == name
+            ]
+
+            if not indexes:
+                raise ValueError(
+                    f"Step '{name}' must be added before its dependents"
+                )
+            
+            dependencies += indexes
+        
+        return dependencies
+
     def _execute_step(self, step: dict):
         """
         Execute a step.
 
         If the step is blocking and it raises an exception the procedure
-        execution will be stopped and the exit event will be set.
+        execution will be stopped and the procedure will be cancelled.
 
         :param step: The step to execute.
 
@@ -202,19 +847,594 @@ class StepProcedure(Procedure):
         self.logger.debug(f"Executing step '{step['name']}'...")
 
         try:
-            step['function'](**step['params'])
-            self._completed_steps += 1
+            step['result'] = self._call_step_function(step)
+            self._count_step(step, 'completed')
+            self._finish_step(step, 'completed')
 
             self.logger.debug(f"Step '{step['name']}' executed successfully")
 
         except Exception as e:
             self.logger.error(f"Step '{step['name']}' raised an exception: {e}")
-            self._failed_steps += 1
+            self._count_step(step, 'failed')
 
             if step['blocking']:
-                self.logger.error('Stopping procedure execution')
-                exit_event.set()
+                self._stop_on_error(e)
+                self._finish_step(step, 'failed')
                 raise e
+            
+            self._finish_step(step, 'failed')
+
+    def _stop_on_error(self, error: Exception):
+        """
+        Cancel the procedure after a blocking step raised an exception.
+        The first exception is kept, so that it is raised when the execution
+        of the procedure is stopped, also if the step was executed in a
+        separate thread.
+
+        :param error: The exception raised by the step.
+        """
+
+        self.logger.error('Stopping procedure execution')
+
+        if self._step_error is None:
+            self._step_error = error
+
+        self.cancel()
+
+    def _call_step_function(self, step: dict) -> Any:
+        """
+        Call the function of a step in the current thread or, for process
+        steps, in a worker process waiting for its result.
+
+        :param step: The step to call.
+
+        :return: The value returned by the function.
+
+        :raises Exception: If the function raises an exception.
+        """
+
+        params = self._get_step_params(step)
+        key, found, result = self._load_cached_result(step, params)
+
+        if found:
+            return result
+
+        while True:
+            try:
+                result = self._attempt_step(step, params)
+                break
+
+            except StepCancelledError:
+                raise
+
+            except Exception as e:
+                delay = self._get_retry_delay(step, e)
+
+                if delay is None:
+                    raise
+
+                self._cancel_token.sleep(delay)
+
+        self._store_cached_result(step, key, result)
+
+        return result
+
+    def _attempt_step(self, step: dict, params: dict) -> Any:
+        """
+        Call the function of a step once, enforcing its timeout.
+
+        When a step times out, its cancellation token is cancelled, also in
+        the worker process of a process step, and the step is abandoned.
+        A process step which doesn't check its token keeps its worker
+        process busy until it returns.
+
+        :param step: The step to call.
+        :param params: The parameters to pass to the function.
+
+        :return: The value returned by the function.
+
+        :raises StepTimeoutError: If the step times out.
+        :raises Exception: If the function raises an exception.
+        """
+
+        step['attempts'] += 1
+        self.metrics.increment('attempts', step['name'])
+
+        cancel_token = CancellationToken(self._cancel_token)
+        call_params = self._get_call_params(step, params, cancel_token)
+
+        if step['executor'] == 'process':
+            future = self._get_process_pool().submit(
+                measure_call,
+                step['function'],
+                call_params
+            )
+
+        elif step['timeout'] is not None:
+            future = Future()
+
+            Thread(
+                target = self._run_in_thread,
+                args = (future, step['function'], call_params),
+                name = f"AmbrogioStep-{step['name']}",
+                daemon = True
+            ).start()
+
+        else:
+            return self._profile_attempt(
+                step,
+                *measure_call(step['function'], call_params)
+            )
+
+        started = perf_counter()
+
+        try:
+            return self._profile_attempt(
+                step,
+                *future.result(step['timeout'])
+            )
+
+        except FutureTimeoutError:
+            future.cancel()
+            cancel_token.cancel()
+
+            self._count_step(step, 'timeouts')
+            self.metrics.add_profile(StepProfile(
+                step['name'],
+                step['attempts'],
+                'timeout',
+                perf_counter() - started
+            ))
+
+            raise StepTimeoutError(
+                f"Step '{step['name']}' timed out after"
+                f" {step['timeout']} seconds"
+            )
+
+    def _profile_attempt(
+        self,
+        step: dict,
+        result: Any,
+        error: Optional[Exception],
+        usage: dict
+    ) -> Any:
+        """
+        Store the profile of a step attempt measured by measure_call.
+
+        :param step: The step.
+        :param result: The value returned by the function.
+        :param error: The exception raised by the function or None.
+        :param usage: The resources used by the function.
+
+        :return: The value returned by the function.
+
+        :raises Exception: If the function raised an exception.
+        """
+
+        self.metrics.add_profile(StepProfile(
+            step['name'],
+            step['attempts'],
+            self._get_attempt_status(error),
+            **usage
+        ))
+
+        if error is not None:
+            raise error
+
+        return result
+
+    @staticmethod
+    def _get_attempt_status(error: Optional[Exception]) -> str:
+        """
+        Get the status of a step attempt from the exception it raised.
+        """
+
+        if error is None:
+            return 'completed'
+
+        if isinstance(error, StepCancelledError):
+            return 'cancelled'
+
+        return 'failed'
+
+    def get_step_profiles(self, name: Optional[str] = None) -> List[StepProfile]:
+        """
+        Get the wall time, CPU time, memory delta and thread of each
+        attempt of the executed steps.
+
+        :param name: The name of the step or None for all the steps.
+
+        :return: A list of StepProfile objects, in the order the attempts
+        finished.
+        """
+
+        return self.metrics.get_profiles(name)
+
+    @staticmethod
+    def _run_in_thread(future: Future, function: Callable, params: dict):
+        """
+        Call a function measuring its resources and set the result of the
+        given future.
+        """
+
+        if not future.set_running_or_notify_cancel():
+            return
+
+        try:
+            result = measure_call(function, params)
+
+        except BaseException as e:
+            future.set_exception(e)
+
+        else:
+            future.set_result(result)
+
+    def _get_retry_delay(self, step: dict, error: Exception) -> Optional[float]:
+        """
+        Get the number of seconds to wait before retrying a failed step.
+
+        :param step: The failed step.
+        :param error: The exception raised by the step.
+
+        :return: The delay or None if the step must not be retried.
+        """
+
+        retry = step['attempts']
+
+        if retry > step['retries'] or self._cancel_token.cancelled:
+            return None
+
+        delay = step['backoff'] * 2 ** (retry - 1)
+        self._count_step(step, 'retries')
+
+        self.logger.warning(
+            f"Step '{step['name']}' raised an exception: {error}."
+            f" Retrying in {delay:.2f} seconds ({retry}/{step['retries']})..."
+        )
+
+        return delay
+
+    def _load_cached_result(
+        self,
+        step: dict,
+        params: dict
+    ) -> Tuple[Optional[str], bool, Any]:
+        """
+        Load the result of a cached step.
+
+        :param step: The step.
+        :param params: The parameters passed to the step function.
+
+        :return: A tuple with the cache key, a bool telling if the result
+        has been found and the result itself. The key is None if the step
+        is not cached or can't be cached.
+        """
+
+        if not step['cache']:
+            return None, False, None
+
+        cache = self._get_step_cache()
+        key = cache.get_key(
+            step['function'],
+            params,
+            owner = self,
+            state = {param.name: param.value for param in self.params}
+        )
+
+        if key is None:
+            self.logger.warning(
+                f"Step '{step['name']}' can't be cached, as its function"
+                ' or its parameters can\'t be hashed'
+            )
+
+            return None, False, None
+
+        found, result = cache.get(key)
+
+        if found:
+            self.logger.debug(f"Step '{step['name']}' result loaded from cache")
+
+        return key, found, result
+
+    def _store_cached_result(self, step: dict, key: Optional[str], result: Any):
+        """
+        Store the result of a cached step.
+
+        :param step: The step.
+        :param key: The cache key returned by _load_cached_result.
+        :param result: The result to store.
+        """
+
+        if key is None:
+            return
+
+        if not self._get_step_cache().set(key, result):
+            self.logger.warning(f"Step '{step['name']}' result can't be cached")
+
+    def _get_step_params(self, step: dict) -> dict:
+        """
+        Get the parameters of a step, including the results of its inputs.
+
+        :param step: The step.
+
+        :return: A dict with the parameters.
+        """
+
+        return {
+            **step['params'],
+            **{
+                param: self._steps[index]['result']
+                for param, index in step['inputs'].items()
+            }
+        }
+
+    @staticmethod
+    def _accepts_cancel_token(function: Callable) -> bool:
+        """
+        Check whether a function has a 'cancel_token' parameter.
+        """
+
+        try:
+            return 'cancel_token' in inspect.signature(function).parameters
+
+        except (TypeError, ValueError):
+            return False
+
+    def _get_call_params(
+        self,
+        step: dict,
+        params: dict,
+        cancel_token: CancellationToken
+    ) -> dict:
+        """
+        Get the parameters to call the function of a step with, adding the
+        cancellation token if the function accepts it.
+
+        :param step: The step.
+        :param params: The parameters of the step.
+        :param cancel_token: The cancellation token of the attempt.
+
+        :return: A dict with the parameters.
+        """
+
+        if not step['cancellable']:
+            return params
+
+        return {**params, 'cancel_token': cancel_token}
+
+    def get_result(self, name: str) -> Any:
+        """
+        Get the value returned by a step.
+        If more steps share the same name, the result of the last added
+        one is returned.
+
+        :param name: The name of the step.
+
+        :return: The value returned by the step or None if it has not
+        been executed yet.
+
+        :raises KeyError: If no step has the given name.
+        """
+
+        for step in reversed(self._steps):
+            if step['name'] == name:
+                return step['result']
+
+        raise KeyError(f"Step not found: {name}")
+
+    def _count_step(self, step: dict, name: str):
+        """
+        Increment a counter of the procedure and of the given step.
+
+        :param step: The step.
+        :param name: The name of the counter.
+        """
+
+        self.metrics.increment(name)
+        self.metrics.increment(name, step['name'])
+
+    def _finish_step(self, step: dict, status: str):
+        """
+        Set the final status of a step and wake up the scheduler.
+
+        :param step: The finished step.
+        :param status: Either 'completed' or 'failed'.
+        """
+
+        with self._steps_condition:
+            step['status'] = status
+            self._steps_condition.notify_all()
+
+        if status == 'completed':
+            self._save_checkpoint(step)
+
+    def _get_checkpoint(self) -> Checkpoint:
+        """
+        Get the checkpoint of the procedure, stored in the project directory.
+        Its file name includes a digest of the parameter values, so an
+        execution is only resumed with the same parameters, and executions
+        with different parameters don't share their checkpoint.
+
+        :return: A Checkpoint object.
+        """
+
+        file_name = re.sub(r'\W+', '_', self.name.lower()).strip('_')
+        digest = Checkpoint.get_digest({
+            param.name: param.value
+            for param in self.params
+        })
+
+        return Checkpoint(
+            self.project_path
+            / '.ambrogio'
+            / 'checkpoints'
+            / f'{file_name}_{(digest or "")[:16]}.pickle'
+        )
+
+    def _get_checkpoint_key(self, step: dict) -> str:
+        """
+        Get the key identifying a step in the checkpoint.
+        """
+
+        return f"{step['index']}:{step['name']}"
+
+    def _load_checkpoint(self):
+        """
+        Load the steps completed in a previous execution, if checkpoints
+        are enabled.
+        """
+
+        self._checkpoint = self._get_checkpoint() if self.checkpoint else None
+        self._checkpoint_steps = (
+            self._checkpoint.load() if self._checkpoint else {}
+        )
+
+        if self._checkpoint_steps:
+            self.logger.info(
+                f"Resuming '{self.name}' procedure from checkpoint..."
+            )
+
+    def _save_checkpoint(self, step: dict):
+        """
+        Store a completed step and, if enabled and picklable, its result.
+
+        :param step: The completed step.
+        """
+
+        if not self._checkpoint:
+            return
+
+        key = self._get_checkpoint_key(step)
+        checkpoint_step = {'params': Checkpoint.get_digest(step['params'])}
+
+        if self.checkpoint_results and self._checkpoint.add(
+            key,
+            {**checkpoint_step, 'result': step['result']}
+        ):
+            return
+
+        self._checkpoint.add(key, checkpoint_step)
+
+    def _remove_checkpoint(self):
+        """
+        Remove the checkpoint, once the procedure has been executed.
+        """
+
+        if self._checkpoint:
+            self._checkpoint.remove()
+
+    def _resume_step(self, step: dict) -> bool:
+        """
+        Set a step as completed, if it has been completed in a previous
+        execution with the same parameters and its inputs have been resumed
+        too. If its result has not been stored and another step needs it,
+        the step is not resumed.
+
+        :param step: The step to resume.
+
+        :return: Whether the step has been resumed.
+        """
+
+        checkpoint_step = self._checkpoint_steps.get(
+            self._get_checkpoint_key(step)
+        )
+
+        if (
+            checkpoint_step is None
+            or checkpoint_step.get('params')
+            != Checkpoint.get_digest(step['params'])
+            or not all(
+                self._steps[index]['resumed']
+                for index in step['inputs'].values()
+            )
+        ):
+            return False
+
+        if 'result' not in checkpoint_step and any(
+            step['index'] in other_step['inputs'].values()
+            for other_step in self._steps
+            if other_step['status'] == 'pending'
+        ):
+            return False
+
+        step['result'] = checkpoint_step.get('result')
+        step['status'] = 'completed'
+        step['resumed'] = True
+        self._count_step(step, 'completed')
+
+        self.logger.debug(
+            f"Step '{step['name']}' completed in a previous execution"
+        )
+
+        return True
+
+    def __getstate__(self) -> dict:
+        """
+        Exclude the execution state when the procedure is pickled to
+        execute one of its methods in a worker process.
+        """
+
+        state = self.__dict__.copy()
+
+        for key in (
+            '_steps',
+            '_parallel_steps',
+            '_steps_condition',
+            '_worker_pool',
+            '_process_pool',
+            '_process_pool_lock',
+            '_step_cache',
+            '_checkpoint',
+            '_checkpoint_steps',
+            '_cancel_token',
+            '_metrics',
+            '_step_error',
+            '_dashboard'
+        ):
+            state.pop(key, None)
+
+        return state
+
+    def _stop_parallel_steps(self):
+        """
+        Wait for the parallel steps to stop after the procedure has been
+        cancelled. Queued steps are not started, while the steps still
+        running after the cancel timeout are abandoned and the worker
+        processes are terminated.
+
+        The cancel timeout in seconds is taken from the 'cancel_timeout'
+        setting and defaults to 1.
+        """
+
+        for parallel_step in self._parallel_steps:
+            parallel_step.cancel()
+
+        timeout = self._get_setting('cancel_timeout', float)
+        timeout = 1.0 if timeout is None else timeout
+
+        _, running_steps = wait(self._parallel_steps, timeout)
+
+        if running_steps:
+            self.logger.warning(
+                f'{len(running_steps)} parallel steps didn\'t stop within'
+                f' {timeout} seconds and have been abandoned'
+            )
+
+            self._terminate_process_pool()
+
+    def _terminate_process_pool(self):
+        """
+        Terminate the worker processes executing the process steps.
+        """
+
+        with self._process_pool_lock:
+            if self._process_pool is None:
+                return
+
+            processes = getattr(self._process_pool, '_processes', None) or {}
+
+            for process in list(processes.values()):
+                process.terminate()
 
     def _join_parallel_steps(self):
         """
@@ -223,6 +1443,4 @@ class StepProcedure(Procedure):
 
         self.logger.debug('Joining parallel steps...')
 
-        for step in self._parallel_steps:
-            if step.is_alive():
-                step.join()
\ No newline at end of file
+        wait(self._parallel_steps)
\ No newline at end of file
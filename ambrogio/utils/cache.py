@@ -0,0 +1,276 @@
+import os
+import pickle
+import hashlib
+from typing import Union, Optional, Callable, Any, Tuple
+from types import CodeType
+from pathlib import Path
+from threading import Lock
+from tempfile import NamedTemporaryFile
+
+
+class StepCache:
+    """
+    Store step results on disk, using keys computed from the code of the
+    step function and its parameters. When the size of the cache exceeds
+    the maximum size, the least recently used results are removed.
+
+    :param path: The path to the cache directory.
+    :param max_size: The maximum size of the cache in bytes.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike], max_size: int):
+        self._path = Path(path)
+        self._max_size = max_size
+        self._lock = Lock()
+
+    @property
+    def path(self) -> Path:
+        """
+        The path to the cache directory.
+        """
+
+        return self._path
+
+    @property
+    def size(self) -> int:
+        """
+        The size of the cached results in bytes.
+        """
+
+        return sum(entry.stat().st_size for entry in self._iter_entries())
+
+    @classmethod
+    def get_key(
+        cls,
+        function: Callable,
+        params: dict,
+        owner: Any = None,
+        state: Any = None
+    ) -> Optional[str]:
+        """
+        Get the cache key of a function called with the given parameters.
+
+        Besides the code of the function, the key covers the contents of
+        its closure cells and, for bound methods, the object they are bound
+        to. The owner of the function, like the procedure of a step, is
+        hashed by its state instead, wherever it is referenced.
+
+        :param function: The function.
+        :param params: The parameters passed to the function.
+        :param owner: The object owning the function.
+        :param state: The state of the owner, like the parameter values of
+        a procedure.
+
+        :return: The key or None if the function, its closure or the
+        parameters can't be hashed.
+        """
+
+        bound = getattr(function, '__self__', None)
+        function = getattr(function, '__func__', function)
+        code = getattr(function, '__code__', None)
+
+        if code is None:
+            return None
+
+        digest = hashlib.sha256()
+        digest.update(
+            f'{function.__module__}.{function.__qualname__}'.encode()
+        )
+        cls._update_code_digest(digest, code)
+
+        def replace_owner(value: Any) -> Any:
+            if owner is not None and value is owner:
+                return _OWNER_MARKER
+
+            return value
+
+        try:
+            closure = [
+                replace_owner(cell.cell_contents)
+                for cell in function.__closure__ or ()
+            ]
+
+            digest.update(pickle.dumps(
+                get_canonical((
+                    params,
+                    closure,
+                    replace_owner(bound),
+                    state
+                )),
+                pickle.HIGHEST_PROTOCOL
+            ))
+
+        except Exception:
+            return None
+
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Get a cached result.
+
+        :param key: The cache key.
+
+        :return: A tuple with a bool telling if the result has been found and
+        the result itself.
+        """
+
+        entry_path = self._path / f'{key}.pickle'
+
+        try:
+            with open(entry_path, 'rb') as entry_file:
+                result = pickle.load(entry_file)
+
+            os.utime(entry_path)
+
+        except FileNotFoundError:
+            return False, None
+
+        except Exception:
+            self._remove(entry_path)
+            return False, None
+
+        return True, result
+
+    def set(self, key: str, result: Any) -> bool:
+        """
+        Store a result in the cache and remove the least recently used
+        results if the cache exceeds its maximum size.
+
+        :param key: The cache key.
+        :param result: The result to store.
+
+        :return: Whether the result has been stored.
+        """
+
+        try:
+            data = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+
+        except Exception:
+            return False
+
+        if len(data) > self._max_size:
+            return False
+
+        self._path.mkdir(parents = True, exist_ok = True)
+
+        with NamedTemporaryFile(
+            dir = self._path,
+            suffix = '.tmp',
+            delete = False
+        ) as temp_file:
+            temp_file.write(data)
+
+        os.replace(temp_file.name, self._path / f'{key}.pickle')
+
+        self._evict()
+
+        return True
+
+    def clear(self):
+        """
+        Remove all the cached results.
+        """
+
+        with self._lock:
+            for entry in self._iter_entries():
+                self._remove(entry.path)
+
+    def _evict(self):
+        """
+        Remove the least recently used results until the size of the cache
+        doesn't exceed the maximum size.
+        """
+
+        with self._lock:
+            entries = []
+
+            for entry in self._iter_entries():
+                try:
+                    stat = entry.stat()
+
+                except FileNotFoundError:
+                    continue
+
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+            size = sum(entry_size for _, entry_size, _ in entries)
+
+            for _, entry_size, entry_path in sorted(entries):
+                if size <= self._max_size:
+                    break
+
+                self._remove(entry_path)
+                size -= entry_size
+
+    def _iter_entries(self):
+        """
+        Iterate over the cached result files.
+        """
+
+        if not self._path.exists():
+            return
+
+        for entry in os.scandir(self._path):
+            if entry.name.endswith('.pickle'):
+                yield entry
+
+    @staticmethod
+    def _remove(path: Union[str, os.PathLike]):
+        """
+        Remove a cached result file, if it still exists.
+        """
+
+        try:
+            os.remove(path)
+
+        except FileNotFoundError:
+            pass
+
+    @classmethod
+    def _update_code_digest(cls, digest, code: CodeType):
+        """
+        Update a digest with a code object and its nested code objects.
+        """
+
+        digest.update(code.co_code)
+        digest.update(repr(code.co_names).encode())
+
+        for const in code.co_consts:
+            if isinstance(const, CodeType):
+                cls._update_code_digest(digest, const)
+            
+            else:
+                digest.update(repr(get_canonical(const)).encode())
+
+
+def get_canonical(value: Any) -> Any:
+    """
+    Get a copy of a value whose sets are replaced by sorted tuples, as the
+    order of their items depends on the hash seed of the interpreter, so
+    the same value is always hashed the same way.
+
+    :param value: The value.
+
+    :return: The canonical value.
+    """
+
+    if isinstance(value, (set, frozenset)):
+        items = [get_canonical(item) for item in value]
+
+        return (_SET_MARKER, tuple(sorted(items, key = repr)))
+
+    if type(value) is dict:
+        return {key: get_canonical(item) for key, item in value.items()}
+
+    if type(value) in (list, tuple):
+        return type(value)(get_canonical(item) for item in value)
+
+    return value
+
+
+# Marker of the sets replaced by tuples in canonical values
+_SET_MARKER = '__ambrogio_set__'
+
+# Marker of the references to the owner of a function in cache keys
+_OWNER_MARKER = '__ambrogio_owner__'
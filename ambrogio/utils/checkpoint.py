@@ -0,0 +1,126 @@
+import os
+import pickle
+import hashlib
+from io import BytesIO
+from typing import Union, Optional, Any
+from pathlib import Path
+from threading import Lock
+
+from ambrogio.utils.cache import get_canonical
+
+
+class Checkpoint:
+    """
+    Store the state of a procedure on disk, so an interrupted execution
+    can be resumed. The state is made of entries, like the completed steps,
+    which are appended to the checkpoint file one at a time, so storing an
+    entry doesn't write the previous ones again.
+
+    :param path: The path to the checkpoint file.
+    """
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        self._path = Path(path)
+        self._lock = Lock()
+
+    @property
+    def path(self) -> Path:
+        """
+        The path to the checkpoint file.
+        """
+
+        return self._path
+
+    def load(self) -> dict:
+        """
+        Load the stored entries. When an entry has been stored more times,
+        the last one is kept. If the checkpoint file ends with an invalid
+        entry, like when the process has been killed while storing it, the
+        file is truncated before it, so the next entries can be loaded.
+
+        :return: A dict with the entries by key, empty if no valid
+        checkpoint has been found.
+        """
+
+        entries = {}
+
+        with self._lock:
+            try:
+                with open(self._path, 'rb+') as checkpoint_file:
+                    data = checkpoint_file.read()
+                    stream = BytesIO(data)
+
+                    while stream.tell() < len(data):
+                        offset = stream.tell()
+
+                        try:
+                            key, entry = pickle.load(stream)
+
+                        except Exception:
+                            checkpoint_file.truncate(offset)
+                            break
+
+                        entries[key] = entry
+
+            except FileNotFoundError:
+                pass
+
+        return entries
+
+    def add(self, key: str, entry: Any) -> bool:
+        """
+        Store an entry, replacing the entry with the same key when the
+        checkpoint is loaded.
+
+        :param key: The key of the entry.
+        :param entry: A picklable value.
+
+        :return: Whether the entry has been stored, False if it can't be
+        pickled.
+        """
+
+        try:
+            data = pickle.dumps((key, entry), pickle.HIGHEST_PROTOCOL)
+
+        except Exception:
+            return False
+
+        with self._lock:
+            self._path.parent.mkdir(parents = True, exist_ok = True)
+
+            with open(self._path, 'ab') as checkpoint_file:
+                checkpoint_file.write(data)
+
+        return True
+
+    def remove(self):
+        """
+        Remove the stored state.
+        """
+
+        with self._lock:
+            try:
+                os.remove(self._path)
+
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def get_digest(value: Any) -> Optional[str]:
+        """
+        Get a digest of a value, like the parameters of a procedure or of
+        a step, to check that a checkpoint has been stored with the same
+        value.
+
+        :param value: The value.
+
+        :return: The hex digest or None if the value can't be pickled.
+        """
+
+        try:
+            data = pickle.dumps(get_canonical(value), pickle.HIGHEST_PROTOCOL)
+
+        except Exception:
+            return None
+
+        return hashlib.sha256(data).hexdigest()
@@ -0,0 +1,304 @@
+import os
+import ast
+import json
+import logging
+from typing import Union, Optional, Dict, List, Tuple
+from pathlib import Path
+from threading import Lock
+
+
+class ProcedureManifest:
+    """
+    An index of the procedures defined in a package, built by parsing its
+    modules without importing them and stored on disk, so only the modules
+    whose size or modification time changed are parsed again.
+
+    Procedure classes are recognized statically: they must extend a class
+    whose name ends with 'Procedure', or another procedure class of the
+    package. Procedures whose name is not defined as a string, like names
+    taken from constants or inherited from other classes, can't be indexed,
+    so their modules are listed to be imported instead.
+
+    :param path: The path to the manifest file.
+    """
+
+    version: int = 2
+
+    # The procedure types of Ambrogio, which don't define a name
+    procedure_types = (
+        'Procedure',
+        'BasicProcedure',
+        'StepProcedure',
+        'AsyncBasicProcedure',
+        'AsyncStepProcedure',
+        'PipelineProcedure'
+    )
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        self._path = Path(path)
+        self._lock = Lock()
+        self._logger = logging.getLogger('Ambrogio')
+
+    @property
+    def path(self) -> Path:
+        """
+        The path to the manifest file.
+        """
+
+        return self._path
+
+    def scan(
+        self,
+        package_path: Union[str, os.PathLike],
+        package_name: str
+    ) -> Tuple[Dict[str, Tuple[str, str]], List[str]]:
+        """
+        Find the procedures defined in the modules of a package, updating
+        the manifest.
+
+        :param package_path: The directory of the package.
+        :param package_name: The full name of the package.
+
+        :return: A tuple with the module and class names of each procedure,
+        by procedure name, and the names of the modules defining procedures
+        whose name can't be found without importing them.
+        """
+
+        package_path = Path(package_path)
+
+        with self._lock:
+            manifest = self._read()
+            modules = manifest.get('modules', {})
+            changed = False
+            scanned = {}
+
+            for file_path in self._iter_module_files(package_path):
+                relative_path = file_path.relative_to(package_path).as_posix()
+                stat = file_path.stat()
+                entry = modules.get(relative_path)
+
+                if (
+                    not entry
+                    or entry['mtime'] != stat.st_mtime_ns
+                    or entry['size'] != stat.st_size
+                ):
+                    entry = {
+                        'mtime': stat.st_mtime_ns,
+                        'size': stat.st_size,
+                        'module': self._get_module_name(
+                            relative_path,
+                            package_name
+                        ),
+                        'classes': self._parse_classes(file_path)
+                    }
+                    changed = True
+
+                scanned[relative_path] = entry
+
+            if changed or scanned.keys() != modules.keys():
+                self._write({'version': self.version, 'modules': scanned})
+
+        return self._get_procedures(scanned.values())
+
+    def _iter_module_files(self, package_path: Path) -> List[Path]:
+        """
+        Get the paths of the modules of a package and of its subpackages.
+        """
+
+        file_paths = []
+
+        for path in sorted(package_path.iterdir()):
+            if path.is_dir() and (path / '__init__.py').is_file():
+                file_paths += self._iter_module_files(path)
+
+            elif path.suffix == '.py' and path.is_file():
+                file_paths.append(path)
+
+        return file_paths
+
+    def _read(self) -> dict:
+        """
+        Read the manifest file.
+
+        :return: The manifest or an empty dict if no valid manifest has
+        been found.
+        """
+
+        try:
+            with open(self._path) as manifest_file:
+                manifest = json.load(manifest_file)
+
+        except (OSError, ValueError):
+            return {}
+
+        if (
+            not isinstance(manifest, dict)
+            or manifest.get('version') != self.version
+        ):
+            return {}
+
+        return manifest
+
+    def _write(self, manifest: dict):
+        """
+        Write the manifest file, ignoring read-only projects.
+        """
+
+        # Only imported when the manifest changes, as it imports random
+        from tempfile import NamedTemporaryFile
+
+        try:
+            self._path.parent.mkdir(parents = True, exist_ok = True)
+
+            with NamedTemporaryFile(
+                'w',
+                dir = self._path.parent,
+                suffix = '.tmp',
+                delete = False
+            ) as temp_file:
+                json.dump(manifest, temp_file)
+
+            os.replace(temp_file.name, self._path)
+
+        except OSError as e:
+            self._logger.debug(f'Procedure manifest not written: {e}')
+
+    @staticmethod
+    def _get_module_name(relative_path: str, package_name: str) -> str:
+        """
+        Get the full name of a module from its path in the package.
+        """
+
+        parts = relative_path[:-len('.py')].split('/')
+
+        if parts[-1] == '__init__':
+            parts.pop()
+
+        return '.'.join([package_name, *parts])
+
+    def _parse_classes(self, file_path: Path) -> List[dict]:
+        """
+        Parse the classes defined in a module, with their bases and, if
+        defined as a string, their procedure name.
+
+        :param file_path: The path to the module.
+
+        :return: A list of dicts with the 'class', 'bases', 'name' and
+        'named' keys, the last one telling whether the class assigns its
+        name, even if not as a string.
+        """
+
+        try:
+            tree = ast.parse(file_path.read_bytes(), str(file_path))
+
+        except (SyntaxError, ValueError) as e:
+            self._logger.warning(f"Procedures in '{file_path}' not found: {e}")
+            return []
+
+        classes = []
+
+        for node in tree.body:
+            if not isinstance(node, ast.ClassDef):
+                continue
+
+            bases = [
+                base.attr if isinstance(base, ast.Attribute) else base.id
+                for base in node.bases
+                if isinstance(base, (ast.Attribute, ast.Name))
+            ]
+
+            named, name = self._get_class_name(node)
+
+            classes.append({
+                'class': node.name,
+                'bases': bases,
+                'name': name,
+                'named': named
+            })
+
+        return classes
+
+    @staticmethod
+    def _get_class_name(node: ast.ClassDef) -> Tuple[bool, Optional[str]]:
+        """
+        Get whether a class assigns its name attribute and its value, if it
+        is a string.
+        """
+
+        for statement in node.body:
+            if isinstance(statement, ast.Assign):
+                targets = statement.targets
+
+            elif isinstance(statement, ast.AnnAssign) and statement.value:
+                targets = [statement.target]
+
+            else:
+                continue
+
+            if not any(
+                isinstance(target, ast.Name) and target.id == 'name'
+                for target in targets
+            ):
+                continue
+
+            try:
+                name = ast.literal_eval(statement.value)
+
+            except ValueError:
+                return True, None
+
+            return True, name if isinstance(name, str) else None
+
+        return False, None
+
+    @classmethod
+    def _get_procedures(
+        cls,
+        entries
+    ) -> Tuple[Dict[str, Tuple[str, str]], List[str]]:
+        """
+        Get the procedures among the classes of the scanned modules, and the
+        modules of the procedures whose name is not a string.
+        """
+
+        classes = [
+            (entry['module'], class_)
+            for entry in entries
+            for class_ in entry['classes']
+        ]
+
+        procedure_classes = set()
+        found = True
+
+        while found:
+            found = False
+
+            for _, class_ in classes:
+                if class_['class'] in procedure_classes:
+                    continue
+
+                if any(
+                    base.endswith('Procedure') or base in procedure_classes
+                    for base in class_['bases']
+                ):
+                    procedure_classes.add(class_['class'])
+                    found = True
+
+        procedures = {}
+        unresolved_modules = []
+
+        for module, class_ in classes:
+            if class_['class'] not in procedure_classes:
+                continue
+
+            if class_['name']:
+                procedures[class_['name']] = (module, class_['class'])
+
+            # Classes without a name only extending procedure types are not
+            # procedures, while the others may inherit a name
+            elif class_.get('named') or any(
+                base not in cls.procedure_types for base in class_['bases']
+            ):
+                unresolved_modules.append(module)
+
+        return procedures, list(dict.fromkeys(unresolved_modules))
@@ -0,0 +1,324 @@
+from typing import Dict, List, Optional, Callable, Any, Tuple
+from dataclasses import dataclass
+from threading import Lock, get_ident
+import os
+import sys
+import time
+
+try:
+    import resource
+
+except ImportError:
+    # Not available on Windows, where memory deltas are not measured
+    resource = None
+
+
+class Counter:
+    """
+    A counter which can be incremented from many threads without locks.
+
+    Each thread increments its own cell, so increments never contend, and
+    the value is the sum of the cells, so readers never block the threads
+    incrementing the counter. A lock is only acquired the first time a
+    thread increments the counter.
+    """
+
+    def __init__(self):
+        self._cells: Dict[int, List[int]] = {}
+        self._lock = Lock()
+
+    @property
+    def value(self) -> int:
+        """
+        The current value of the counter.
+        """
+
+        return sum(cell[0] for cell in list(self._cells.values()))
+
+    def increment(self, amount: int = 1):
+        """
+        Increment the counter.
+
+        :param amount: The amount to add to the counter.
+        """
+
+        cell = self._cells.get(get_ident())
+
+        if cell is None:
+            with self._lock:
+                cell = self._cells.setdefault(get_ident(), [0])
+
+        cell[0] += amount
+
+    def __int__(self) -> int:
+        return self.value
+
+    def __repr__(self) -> str:
+        return f'<Counter {self.value}>'
+
+
+@dataclass
+class StepProfile:
+    """
+    The resources used by an attempt of a step.
+
+    The CPU time is the one of the thread executing the step, so it doesn't
+    include the work dispatched to other threads or processes, and the
+    memory delta is the increase of the peak resident memory of the
+    process executing the step, which only grows when the step allocates
+    more memory than ever before.
+    """
+
+    step: str
+    attempt: int
+    status: str
+    wall_time: float
+    cpu_time: Optional[float] = None
+    memory_delta: Optional[int] = None
+    thread_id: Optional[int] = None
+    process_id: Optional[int] = None
+
+
+def get_peak_memory() -> Optional[int]:
+    """
+    Get the peak resident memory of the current process.
+
+    :return: The peak memory in bytes, or None if it can't be measured.
+    """
+
+    if resource is None:
+        return None
+
+    peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # The peak memory is in bytes on macOS and in kilobytes elsewhere
+    return peak_memory if sys.platform == 'darwin' else peak_memory * 1024
+
+
+def measure_call(
+    function: Callable,
+    params: dict
+) -> Tuple[Any, Optional[Exception], dict]:
+    """
+    Call a function measuring the resources it uses. The function can be
+    executed in a worker process, as long as it can be pickled.
+
+    :param function: The function to call.
+    :param params: The parameters to pass to the function.
+
+    :return: A tuple with the value returned by the function, the exception
+    it raised or None, and a dict with the wall_time, cpu_time,
+    memory_delta, thread_id and process_id of the call.
+    """
+
+    peak_memory = get_peak_memory()
+    cpu_time = time.thread_time()
+    wall_time = time.perf_counter()
+
+    result, error = None, None
+
+    try:
+        result = function(**params)
+
+    except Exception as e:
+        error = e
+
+    usage = {
+        'wall_time': time.perf_counter() - wall_time,
+        'cpu_time': time.thread_time() - cpu_time,
+        'memory_delta': (
+            get_peak_memory() - peak_memory
+            if peak_memory is not None
+            else None
+        ),
+        'thread_id': get_ident(),
+        'process_id': os.getpid()
+    }
+
+    return result, error, usage
+
+
+class ProcedureMetrics:
+    """
+    The counters of a procedure and of its steps, which can be incremented
+    by the threads executing the steps and read at any time by the
+    dashboard or by exporters. Steps sharing the same name share their
+    counters. The metrics also hold the profiles of the step attempts and
+    the max values of the sampled process performances.
+    """
+
+    def __init__(self):
+        self._counters: Dict[str, Counter] = {}
+        self._step_counters: Dict[str, Dict[str, Counter]] = {}
+        self._profiles: List[StepProfile] = []
+        self._max_performances: Dict[str, float] = {}
+        self._lock = Lock()
+
+    @property
+    def max_performances(self) -> Dict[str, float]:
+        """
+        The max values of the sampled performances, like 'memory', 'cpu'
+        and 'threads', empty if the performances have never been sampled.
+        """
+
+        return dict(self._max_performances)
+
+    def increment(self, name: str, step: Optional[str] = None, amount: int = 1):
+        """
+        Increment a counter of the procedure or of one of its steps.
+
+        :param name: The name of the counter.
+        :param step: The name of the step or None for procedure counters.
+        :param amount: The amount to add to the counter.
+        """
+
+        self._get_counter(name, step).increment(amount)
+
+    def get(self, name: str, step: Optional[str] = None) -> int:
+        """
+        Get the value of a counter of the procedure or of one of its steps.
+
+        :param name: The name of the counter.
+        :param step: The name of the step or None for procedure counters.
+
+        :return: The value of the counter, 0 if it has never been incremented.
+        """
+
+        counters = (
+            self._counters if step is None
+            else self._step_counters.get(step, {})
+        )
+
+        counter = counters.get(name)
+
+        return counter.value if counter is not None else 0
+
+    def snapshot(self) -> dict:
+        """
+        Get the values of all the counters.
+
+        :return: A dict with the 'procedure' counters and the counters of
+        each step in 'steps'.
+        """
+
+        return {
+            'procedure': {
+                name: counter.value
+                for name, counter in list(self._counters.items())
+            },
+            'steps': {
+                step: {
+                    name: counter.value
+                    for name, counter in list(counters.items())
+                }
+                for step, counters in list(self._step_counters.items())
+            }
+        }
+
+    @property
+    def profile_count(self) -> int:
+        """
+        The number of profiled step attempts.
+        """
+
+        return len(self._profiles)
+
+    def record_performances(self, performances: Dict[str, float]):
+        """
+        Record a sample of the process performances, keeping the max values.
+
+        :param performances: The sampled values, by performance name.
+        """
+
+        with self._lock:
+            for name, value in performances.items():
+                max_value = self._max_performances.get(name)
+
+                if max_value is None or value > max_value:
+                    self._max_performances[name] = value
+
+    def add_profile(self, profile: StepProfile):
+        """
+        Add the profile of a step attempt.
+
+        :param profile: The profile to add.
+        """
+
+        self._profiles.append(profile)
+
+    def get_profiles(self, step: Optional[str] = None) -> List[StepProfile]:
+        """
+        Get the profiles of the step attempts, in the order they finished.
+
+        :param step: The name of the step or None for all the steps.
+
+        :return: A list of StepProfile objects.
+        """
+
+        return [
+            profile for profile in list(self._profiles)
+            if step is None or profile.step == step
+        ]
+
+    def summarize_profiles(self) -> Dict[str, dict]:
+        """
+        Summarize the profiles of the attempts of each step.
+
+        :return: A dict with, for each step name, the number of 'attempts',
+        the total 'wall_time' and 'cpu_time', the maximum 'memory_delta',
+        the 'threads' which executed the step and the 'status' of its last
+        attempt.
+        """
+
+        summary = {}
+
+        for profile in self.get_profiles():
+            step = summary.setdefault(profile.step, {
+                'attempts': 0,
+                'wall_time': 0.0,
+                'cpu_time': 0.0,
+                'memory_delta': 0,
+                'threads': [],
+                'status': None
+            })
+
+            step['attempts'] += 1
+            step['wall_time'] += profile.wall_time
+            step['cpu_time'] += profile.cpu_time or 0.0
+            step['memory_delta'] = max(
+                step['memory_delta'],
+                profile.memory_delta or 0
+            )
+            step['status'] = profile.status
+
+            if (
+                profile.thread_id is not None
+                and profile.thread_id not in step['threads']
+            ):
+                step['threads'].append(profile.thread_id)
+
+        return summary
+
+    def _get_counter(self, name: str, step: Optional[str]) -> Counter:
+        """
+        Get a counter, creating it on first use.
+        """
+
+        counters = (
+            self._counters if step is None
+            else self._step_counters.get(step)
+        )
+
+        counter = counters.get(name) if counters is not None else None
+
+        if counter is None:
+            with self._lock:
+                if step is None:
+                    counters = self._counters
+
+                else:
+                    counters = self._step_counters.setdefault(step, {})
+
+                counter = counters.setdefault(name, Counter())
+
+        return counter
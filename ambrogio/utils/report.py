@@ -0,0 +1,294 @@
+import os
+import html
+from typing import Union, Optional, List, Dict
+from dataclasses import dataclass
+from statistics import median
+from pathlib import Path
+
+from ambrogio.utils.memory import format_bytes
+
+
+@dataclass
+class Regression:
+    """
+    A measure of a run which got worse than in the baseline.
+
+    :param metric: Either 'elapsed', 'max_memory' or 'latency'.
+    :param baseline: The value in the baseline.
+    :param current: The value in the compared run.
+    :param step: The name of the step, for latencies.
+    """
+
+    metric: str
+    baseline: float
+    current: float
+    step: Optional[str] = None
+
+    @property
+    def change(self) -> float:
+        """
+        The relative increase of the value, like 0.5 for 50 % more.
+        """
+
+        return self.current / self.baseline - 1 if self.baseline else 0.0
+
+    def __str__(self) -> str:
+        if self.metric == 'max_memory':
+            values = (
+                f'{format_bytes(self.baseline)}'
+                f' -> {format_bytes(self.current)}'
+            )
+
+        else:
+            values = f'{self.baseline:.3f} s -> {self.current:.3f} s'
+
+        subject = {
+            'elapsed': 'Duration',
+            'max_memory': 'Max memory',
+            'latency': f"Step '{self.step}'"
+        }[self.metric]
+
+        return f'{subject} increased by {self.change:.1%}: {values}'
+
+
+def get_step_latencies(run: dict) -> Dict[str, float]:
+    """
+    Get the mean wall time of the attempts of each profiled step of a run.
+
+    :param run: A run record, as stored by RunTelemetry.
+
+    :return: The latencies in seconds, by step name.
+    """
+
+    return {
+        name: step['wall_time'] / step['attempts']
+        for name, step in run.get('steps', {}).items()
+        if step.get('attempts')
+    }
+
+
+def get_baseline(
+    runs: List[dict],
+    run_id: Optional[str] = None,
+    window: int = 10
+) -> Optional[dict]:
+    """
+    Get the baseline to compare the last completed run with: either the
+    run with the given id, or the median values of the completed runs
+    preceding the last one.
+
+    :param runs: The run records, sorted by start time.
+    :param run_id: The id of the baseline run.
+    :param window: The maximum number of preceding runs to use.
+
+    :return: A dict with the 'elapsed' time, the 'max_memory' and the
+    'latencies' of the steps, or None if there are no runs to compare with.
+
+    :raises KeyError: If the baseline run is not found.
+    """
+
+    if run_id is not None:
+        baseline_runs = [run for run in runs if run['run_id'] == run_id]
+
+        if not baseline_runs:
+            raise KeyError(f'Run not found: {run_id}')
+
+    else:
+        completed = [run for run in runs if run['status'] == 'completed']
+        baseline_runs = completed[:-1][-window:]
+
+        if not baseline_runs:
+            return None
+
+    def get_median(values: list) -> Optional[float]:
+        values = [value for value in values if value is not None]
+        return median(values) if values else None
+
+    step_latencies = [get_step_latencies(run) for run in baseline_runs]
+    step_names = dict.fromkeys(
+        name for latencies in step_latencies for name in latencies
+    )
+
+    return {
+        'elapsed': get_median([run.get('elapsed') for run in baseline_runs]),
+        'max_memory': get_median([
+            run.get('max_memory') for run in baseline_runs
+        ]),
+        'latencies': {
+            name: get_median([
+                latencies.get(name) for latencies in step_latencies
+            ])
+            for name in step_names
+        }
+    }
+
+
+def find_regressions(
+    run: dict,
+    baseline: dict,
+    threshold: float = 0.2,
+    min_delta: float = 0.01
+) -> List[Regression]:
+    """
+    Compare a run with a baseline, finding the duration, the max memory
+    and the step latencies which increased more than the threshold.
+
+    :param run: The run record to compare.
+    :param baseline: The baseline, as returned by get_baseline.
+    :param threshold: The relative increase to report, like 0.2 for 20 %.
+    :param min_delta: The minimum increase of a time to report, in
+    seconds, so the noise of the fastest steps is ignored.
+
+    :return: A list of Regression objects, the worst first.
+    """
+
+    regressions = []
+
+    measures = [
+        ('elapsed', None, baseline['elapsed'], run.get('elapsed')),
+        ('max_memory', None, baseline['max_memory'], run.get('max_memory'))
+    ]
+
+    latencies = get_step_latencies(run)
+
+    for name, baseline_latency in baseline['latencies'].items():
+        measures.append(
+            ('latency', name, baseline_latency, latencies.get(name))
+        )
+
+    for metric, step, baseline_value, value in measures:
+        if not baseline_value or value is None:
+            continue
+
+        if metric != 'max_memory' and value - baseline_value < min_delta:
+            continue
+
+        if value > baseline_value * (1 + threshold):
+            regressions.append(Regression(metric, baseline_value, value, step))
+
+    return sorted(
+        regressions,
+        key = lambda regression: regression.change,
+        reverse = True
+    )
+
+
+def write_report(
+    procedure_name: str,
+    runs: List[dict],
+    regressions: List[Regression],
+    path: Union[str, os.PathLike]
+) -> Path:
+    """
+    Write a self-contained HTML report with the trends of the duration, the
+    memory and the step latencies of the runs of a procedure, and
+    with the regressions of its last run. The report can be opened
+    offline, as the plotly library is embedded in it.
+
+    :param procedure_name: The name of the procedure.
+    :param runs: The run records, sorted by start time.
+    :param regressions: The regressions of the last run.
+    :param path: The path to the HTML file.
+
+    :return: The path to the written file.
+    """
+
+    from plotly import graph_objects as go
+
+    started = [run['started'] for run in runs]
+    hover = [f"{run['run_id']} ({run['status']})" for run in runs]
+
+    def get_figure(title: str, y_title: str) -> 'go.Figure':
+        figure = go.Figure()
+        figure.update_layout(
+            title = title,
+            xaxis_title = 'Run start',
+            yaxis_title = y_title,
+            hovermode = 'x unified'
+        )
+
+        return figure
+
+    duration = get_figure('Duration', 'Seconds')
+    duration.add_trace(go.Scatter(
+        x = started,
+        y = [run.get('elapsed') for run in runs],
+        text = hover,
+        mode = 'lines+markers',
+        name = 'Duration'
+    ))
+
+    memory = get_figure('Memory', 'MB')
+
+    for key, name in (
+        ('max_memory', 'Max sampled'),
+        ('process_peak_memory', 'Process peak')
+    ):
+        memory.add_trace(go.Scatter(
+            x = started,
+            y = [
+                run[key] / 1024 ** 2 if run.get(key) is not None else None
+                for run in runs
+            ],
+            text = hover,
+            mode = 'lines+markers',
+            name = name
+        ))
+
+    latencies = get_figure('Step latency', 'Seconds')
+    run_latencies = [get_step_latencies(run) for run in runs]
+    step_names = dict.fromkeys(
+        name for step_latencies in run_latencies for name in step_latencies
+    )
+
+    for name in step_names:
+        latencies.add_trace(go.Scatter(
+            x = started,
+            y = [step_latencies.get(name) for step_latencies in run_latencies],
+            text = hover,
+            mode = 'lines+markers',
+            name = name
+        ))
+
+    if regressions:
+        items = ''.join(
+            f'<li>{html.escape(str(regression))}</li>'
+            for regression in regressions
+        )
+        summary = f'<ul class="regressions">{items}</ul>'
+
+    else:
+        summary = '<p>No regressions found in the last run.</p>'
+
+    figures = ''.join(
+        figure.to_html(
+            full_html = False,
+            include_plotlyjs = index == 0
+        )
+        for index, figure in enumerate((duration, memory, latencies))
+    )
+
+    title = html.escape(f'{procedure_name} performances')
+
+    path = Path(path)
+    path.parent.mkdir(parents = True, exist_ok = True)
+    path.write_text(
+        '<!DOCTYPE html>\n'
+        '<html>\n'
+        '<head>\n'
+        '<meta charset="utf-8">\n'
+        f'<title>{title}</title>\n'
+        '<style>.regressions { color: #c0392b; }</style>\n'
+        '</head>\n'
+        '<body>\n'
+        f'<h1>{title}</h1>\n'
+        f'<p>{len(runs)} runs, from {html.escape(started[0])}'
+        f' to {html.escape(started[-1])}</p>\n'
+        f'{summary}\n'
+        f'{figures}\n'
+        '</body>\n'
+        '</html>\n',
+        encoding = 'utf-8'
+    )
+
+    return path
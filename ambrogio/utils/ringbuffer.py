@@ -0,0 +1,129 @@
+from typing import Optional, List
+from array import array
+
+
+class RingBuffer:
+    """
+    A fixed-size buffer of numbers backed by an array, overwriting the
+    oldest value when it is full, so a long series can be kept in constant
+    memory without allocating an object for each value.
+
+    :param size: The number of values kept.
+    :param typecode: The array type code of the values, 'd' for floats.
+
+    :raises ValueError: If size is not greater than 0.
+    """
+
+    def __init__(self, size: int, typecode: str = 'd'):
+        if size <= 0:
+            raise ValueError('size must be greater than 0')
+
+        self._values = array(typecode, [0] * size)
+        self._size = size
+        self._start = 0
+        self._length = 0
+
+    @property
+    def size(self) -> int:
+        """
+        The number of values the buffer can keep.
+        """
+
+        return self._size
+
+    @property
+    def latest(self) -> Optional[float]:
+        """
+        The last appended value or None if the buffer is empty.
+        """
+
+        if not self._length:
+            return None
+
+        return self._values[(self._start + self._length - 1) % self._size]
+
+    def __len__(self) -> int:
+        return self._length
+
+    def append(self, value: float):
+        """
+        Append a value, overwriting the oldest one if the buffer is full.
+
+        :param value: The value to append.
+        """
+
+        if self._length < self._size:
+            self._values[(self._start + self._length) % self._size] = value
+            self._length += 1
+
+        else:
+            self._values[self._start] = value
+            self._start = (self._start + 1) % self._size
+
+    def clear(self):
+        """
+        Remove all the values.
+        """
+
+        self._start = 0
+        self._length = 0
+
+    def values(self, window: Optional[int] = None) -> List[float]:
+        """
+        Get the kept values, from the oldest to the newest.
+
+        :param window: The number of most recent values to get, or None to
+        get all of them.
+
+        :return: A list of values.
+        """
+
+        length = self._length if window is None else min(window, self._length)
+        start = (self._start + self._length - length) % self._size
+        end = start + length
+
+        if end <= self._size:
+            return self._values[start:end].tolist()
+
+        return (
+            self._values[start:].tolist()
+            + self._values[:end - self._size].tolist()
+        )
+
+
+def get_percentiles(
+    values: List[float],
+    percents: List[float]
+) -> List[Optional[float]]:
+    """
+    Get percentiles of some values, sorting them only once and
+    interpolating between the two nearest values.
+
+    :param values: The values.
+    :param percents: The percentiles, between 0 and 100.
+
+    :return: The list of percentiles, None if there are no values.
+
+    :raises ValueError: If a percent is not between 0 and 100.
+    """
+
+    for percent in percents:
+        if not 0 <= percent <= 100:
+            raise ValueError('percent must be between 0 and 100')
+
+    if not values:
+        return [None] * len(percents)
+
+    values = sorted(values)
+    percentiles = []
+
+    for percent in percents:
+        position = (len(values) - 1) * percent / 100
+        lower = int(position)
+        upper = min(lower + 1, len(values) - 1)
+
+        percentiles.append(
+            values[lower] + (values[upper] - values[lower]) * (position - lower)
+        )
+
+    return percentiles
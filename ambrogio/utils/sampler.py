@@ -0,0 +1,341 @@
+import os
+import time
+from typing import Optional, Callable, List, Dict, Tuple, Any
+from threading import Thread, Event, Lock, current_thread
+
+from ambrogio.utils.ringbuffer import RingBuffer, get_percentiles
+
+
+class PerformanceSampler:
+    """
+    Sample the memory, the CPU usage, the threads and the disk IO of the
+    current process in a background thread, keeping the last samples of
+    each performance in a fixed-size ring buffer, so reading the
+    performances never waits for the system calls and a long run doesn't
+    keep an unbounded history.
+
+    :param interval: The seconds between two samples.
+    :param size: The number of samples kept.
+    :param callback: A function called with each sample, from the
+    sampling thread.
+
+    :raises ValueError: If interval or size are not greater than 0.
+    """
+
+    def __init__(
+        self,
+        interval: float = 1.0,
+        size: int = 120,
+        callback: Optional[Callable[[Dict[str, float]], Any]] = None
+    ):
+        if interval <= 0:
+            raise ValueError('interval must be greater than 0')
+
+        if size <= 0:
+            raise ValueError('size must be greater than 0')
+
+        import psutil
+
+        self.interval = interval
+        self.callback = callback
+
+        self._process = psutil.Process(os.getpid())
+        self._io_counters = self._get_io_counters()
+
+        self.performances: Tuple[str, ...] = ('memory', 'cpu', 'threads')
+
+        if self._io_counters is not None:
+            self.performances += ('io',)
+
+        self._buffers = {
+            performance: RingBuffer(size)
+            for performance in self.performances
+        }
+        self._count = 0
+        self._lock = Lock()
+        self._stop_event = None
+        self._thread = None
+
+    @property
+    def size(self) -> int:
+        """
+        The number of samples kept.
+        """
+
+        return self._buffers['memory'].size
+
+    @property
+    def count(self) -> int:
+        """
+        The number of samples taken, which changes at each new sample.
+        """
+
+        return self._count
+
+    @property
+    def latest(self) -> Optional[Dict[str, float]]:
+        """
+        The last sample or None if no sample has been taken.
+        """
+
+        with self._lock:
+            if not self._count:
+                return None
+
+            return {
+                performance: buffer.latest
+                for performance, buffer in self._buffers.items()
+            }
+
+    @property
+    def samples(self) -> List[Dict[str, float]]:
+        """
+        The kept samples, from the oldest to the newest.
+        """
+
+        with self._lock:
+            values = [buffer.values() for buffer in self._buffers.values()]
+
+        return [
+            dict(zip(self.performances, sample))
+            for sample in zip(*values)
+        ]
+
+    @property
+    def running(self) -> bool:
+        """
+        Whether the sampling thread is running.
+        """
+
+        return self._stop_event is not None
+
+    def get_values(
+        self,
+        performance: str,
+        window: Optional[int] = None
+    ) -> List[float]:
+        """
+        Get the kept values of a performance, from the oldest to the newest.
+
+        :param performance: The name of the performance, like 'memory'.
+        :param window: The number of most recent values to get, or None to
+        get all of them.
+
+        :return: A list of values.
+
+        :raises KeyError: If the performance is not sampled.
+        """
+
+        with self._lock:
+            return self._buffers[performance].values(window)
+
+    def summarize(
+        self,
+        performance: str,
+        window: Optional[int] = None
+    ) -> Optional[Dict[str, float]]:
+        """
+        Summarize the most recent values of a performance.
+
+        :param performance: The name of the performance, like 'memory'.
+        :param window: The number of most recent values to summarize, or
+        None to summarize all the kept ones.
+
+        :return: A dict with the 'current', 'mean', 'p50', 'p95' and 'max'
+        values, or None if no sample has been taken.
+
+        :raises KeyError: If the performance is not sampled.
+        """
+
+        values = self.get_values(performance, window)
+
+        if not values:
+            return None
+
+        p50, p95 = get_percentiles(values, [50, 95])
+
+        return {
+            'current': values[-1],
+            'mean': sum(values) / len(values),
+            'p50': p50,
+            'p95': p95,
+            'max': max(values)
+        }
+
+    def sample(self) -> Dict[str, float]:
+        """
+        Take a sample of the process performances and store it.
+
+        :return: A dict with the 'memory' in bytes, the 'cpu' percentage
+        and the 'io' bytes read and written per second since the previous
+        sample, and the number of 'threads'. The 'io' is missing where the
+        IO counters of the process are not available.
+        """
+
+        with self._process.oneshot():
+            sample = {
+                'memory': self._process.memory_info().rss,
+                'cpu': self._process.cpu_percent(),
+                'threads': self._process.num_threads()
+            }
+
+            if self._io_counters is not None:
+                sample['io'] = self._get_io_rate()
+
+        with self._lock:
+            for performance, value in sample.items():
+                self._buffers[performance].append(value)
+
+            self._count += 1
+
+        if self.callback is not None:
+            self.callback(sample)
+
+        return sample
+
+    def start(self):
+        """
+        Take a first sample and start sampling in a background thread,
+        until stop is called.
+        """
+
+        self.stop()
+        self.sample()
+
+        self._stop_event = stop_event = Event()
+
+        def sample_performances():
+            while not stop_event.wait(self.interval):
+                self.sample()
+
+        self._thread = Thread(
+            target = sample_performances,
+            name = 'AmbrogioSampler',
+            daemon = True
+        )
+        self._thread.start()
+
+    def stop(self):
+        """
+        Stop sampling, waiting for the sample being taken, if any.
+        """
+
+        if self._stop_event is not None:
+            self._stop_event.set()
+            self._stop_event = None
+
+        thread, self._thread = self._thread, None
+
+        if thread is not None and thread is not current_thread():
+            thread.join()
+
+    def _get_io_counters(self) -> Optional[Tuple[float, int]]:
+        """
+        Get the time and the total bytes read and written by the process,
+        or None if the IO counters are not available, like on macOS.
+        """
+
+        import psutil
+
+        try:
+            counters = self._process.io_counters()
+
+        except (AttributeError, NotImplementedError, psutil.Error):
+            return None
+
+        return time.monotonic(), counters.read_bytes + counters.write_bytes
+
+    def _get_io_rate(self) -> float:
+        """
+        Get the bytes read and written per second since the previous
+        sample.
+        """
+
+        previous_time, previous_bytes = self._io_counters
+        io_counters = self._get_io_counters()
+
+        if io_counters is None:
+            return 0.0
+
+        self._io_counters = io_counters
+        current_time, current_bytes = io_counters
+        elapsed = current_time - previous_time
+
+        return (current_bytes - previous_bytes) / elapsed if elapsed else 0.0
+
+
+class RunSampler:
+    """
+    Sample the performances of the process while a procedure runs, passing
+    each sample to a callback, like the one keeping the max values in the
+    procedure metrics.
+
+    The sampling starts after the first interval, so runs shorter than it,
+    like most headless commands, are not sampled and don't import psutil.
+    A last sample is taken when the sampling is stopped.
+
+    :param interval: The seconds between two samples.
+    :param callback: A function called with each sample, from the
+    sampling thread.
+
+    :raises ValueError: If interval is not greater than 0.
+    """
+
+    def __init__(
+        self,
+        interval: float = 1.0,
+        callback: Optional[Callable[[Dict[str, float]], Any]] = None
+    ):
+        if interval <= 0:
+            raise ValueError('interval must be greater than 0')
+
+        self.interval = interval
+        self.callback = callback
+
+        self._sampler: Optional[PerformanceSampler] = None
+        self._stop_event = Event()
+        self._lock = Lock()
+
+    @property
+    def sampled(self) -> bool:
+        """
+        Whether the sampling has started.
+        """
+
+        return self._sampler is not None
+
+    def start(self):
+        """
+        Start sampling in a background thread after the first interval,
+        until stop is called.
+        """
+
+        def start_sampler():
+            if self._stop_event.wait(self.interval):
+                return
+
+            # Only the max values are kept by the callback
+            sampler = PerformanceSampler(self.interval, 1, self.callback)
+
+            with self._lock:
+                if not self._stop_event.is_set():
+                    self._sampler = sampler
+                    sampler.start()
+
+        Thread(
+            target = start_sampler,
+            name = 'AmbrogioRunSampler',
+            daemon = True
+        ).start()
+
+    def stop(self):
+        """
+        Take a last sample, if the sampling has started, and stop sampling.
+        """
+
+        with self._lock:
+            self._stop_event.set()
+
+            if self._sampler is not None:
+                self._sampler.stop()
+                self._sampler.sample()
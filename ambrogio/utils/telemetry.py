@@ -0,0 +1,223 @@
+import os
+import re
+import json
+import logging
+import platform
+from typing import Union, Optional, List, Any, TYPE_CHECKING
+from pathlib import Path
+from threading import Lock
+from datetime import datetime, timezone
+
+from ambrogio.utils.metrics import get_peak_memory
+
+if TYPE_CHECKING:
+    from ambrogio.procedures import Procedure
+
+
+class RunTelemetry:
+    """
+    Store the telemetry of procedure runs as JSON lines, one file for each
+    procedure, so the performances of a procedure can be compared across
+    runs and machines.
+
+    :param path: The directory of the telemetry files.
+    """
+
+    version: int = 2
+
+    def __init__(self, path: Union[str, os.PathLike]):
+        self._path = Path(path)
+        self._lock = Lock()
+        self._logger = logging.getLogger('Ambrogio')
+
+    @property
+    def path(self) -> Path:
+        """
+        The directory of the telemetry files.
+        """
+
+        return self._path
+
+    def get_file_path(self, procedure_name: str) -> Path:
+        """
+        Get the path to the telemetry file of a procedure.
+
+        :param procedure_name: The name of the procedure.
+
+        :return: The path to the file.
+        """
+
+        file_name = re.sub(r'\W+', '_', procedure_name).strip('_').lower()
+
+        return self._path / f'{file_name or "procedure"}.jsonl'
+
+    def write(self, record: dict) -> Optional[Path]:
+        """
+        Append the record of a run to the file of its procedure, ignoring
+        read-only projects.
+
+        :param record: The record, as returned by get_run_record.
+
+        :return: The path to the file or None if it can't be written.
+        """
+
+        file_path = self.get_file_path(record['procedure'])
+        line = json.dumps(record, default = str, separators = (',', ':'))
+
+        try:
+            with self._lock:
+                self._path.mkdir(parents = True, exist_ok = True)
+
+                # A single write keeps the lines of concurrent processes whole
+                with open(file_path, 'a') as telemetry_file:
+                    telemetry_file.write(line + '\n')
+
+        except OSError as e:
+            self._logger.debug(f'Run telemetry not written: {e}')
+            return None
+
+        return file_path
+
+    def read(self, procedure_name: Optional[str] = None) -> List[dict]:
+        """
+        Read the stored runs, skipping the lines which are not valid.
+
+        :param procedure_name: The name of the procedure or None for the
+        runs of all the procedures.
+
+        :return: A list of records, sorted by start time.
+        """
+
+        if procedure_name is not None:
+            file_paths = [self.get_file_path(procedure_name)]
+
+        else:
+            file_paths = sorted(self._path.glob('*.jsonl'))
+
+        records = []
+
+        for file_path in file_paths:
+            try:
+                with open(file_path) as telemetry_file:
+                    lines = telemetry_file.readlines()
+
+            except OSError:
+                continue
+
+            for line in lines:
+                try:
+                    record = json.loads(line)
+
+                except ValueError:
+                    continue
+
+                if (
+                    isinstance(record, dict)
+                    and record.get('version') == self.version
+                    and (
+                        procedure_name is None
+                        or record.get('procedure') == procedure_name
+                    )
+                ):
+                    records.append(record)
+
+        return sorted(records, key = lambda record: record['started'])
+
+
+def get_run_record(
+    procedure: 'Procedure',
+    started: float,
+    elapsed: float,
+    cpu_time: float,
+    memory_delta: Optional[int] = None,
+    error: Optional[BaseException] = None
+) -> dict:
+    """
+    Get the record of a procedure run, with the run status, timings and
+    resources, the counters of the procedure and the counters and profiles
+    of its steps.
+
+    The CPU time, the memory delta and the max values are measured during
+    the run, but for the whole process, so they include the other
+    procedures running at the same time. The max values are sampled during
+    the run, and are None if it was too short to be sampled. The process
+    peak memory is the one of the whole life of the process, so it only
+    grows across the runs of a batch or of a session.
+
+    :param procedure: The executed procedure.
+    :param started: The timestamp of the start of the run.
+    :param elapsed: The wall time of the run, in seconds.
+    :param cpu_time: The CPU time used by the process during the run.
+    :param memory_delta: The increase of the process peak memory during
+    the run, in bytes.
+    :param error: The exception raised by the procedure, if any.
+
+    :return: A JSON serializable dict.
+    """
+
+    if error is not None:
+        status = 'failed'
+
+    elif procedure.finished:
+        status = 'completed'
+
+    else:
+        status = 'cancelled'
+
+    snapshot = procedure.metrics.snapshot()
+    profiles = procedure.metrics.summarize_profiles()
+    max_performances = procedure.metrics.max_performances
+
+    procedure_class = type(procedure)
+
+    steps = {
+        name: {**snapshot['steps'].get(name, {}), **profiles.get(name, {})}
+        for name in dict.fromkeys([*snapshot['steps'], *profiles])
+    }
+
+    return {
+        'version': RunTelemetry.version,
+        'run_id': os.urandom(8).hex(),
+        'procedure': procedure.name,
+        'class': f'{procedure_class.__module__}.{procedure_class.__name__}',
+        'params': {
+            param.name: _to_json(param.value)
+            for param in procedure.params
+        },
+        'status': status,
+        'error': str(error) if error is not None else None,
+        'started': datetime.fromtimestamp(started, timezone.utc).isoformat(),
+        'elapsed': elapsed,
+        'cpu_time': cpu_time,
+        'memory_delta': memory_delta,
+        'process_peak_memory': get_peak_memory(),
+        'max_memory': max_performances.get('memory'),
+        'max_cpu': max_performances.get('cpu'),
+        'max_threads': max_performances.get('threads'),
+        'max_io': max_performances.get('io'),
+        'host': {
+            'name': platform.node(),
+            # platform.platform also looks up the processor and the libc
+            # version, spawning a process and reading the interpreter
+            'platform': '-'.join((
+                platform.system(),
+                platform.release(),
+                platform.machine()
+            )),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count()
+        },
+        'counters': snapshot['procedure'],
+        'steps': steps
+    }
+
+
+def _to_json(value: Any) -> Any:
+    """
+    Get a JSON serializable version of a parameter value.
+    """
+
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+
+    return str(value)
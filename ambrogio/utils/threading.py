@@ -1,12 +1,389 @@
-from threading import Event
-from time import sleep
+import os
+import signal
+from typing import Optional, Callable, List, Tuple, Any
+from itertools import count
+from time import perf_counter
+from threading import Event, Thread, Lock, Semaphore, Condition
+from weakref import WeakSet
+from queue import SimpleQueue
+from collections import deque
+from concurrent.futures import Future
 
 
+class SharedEvent:
+    """
+    An event which can be shared with worker processes.
+    Once shared, setting or clearing the event in the main process is
+    reflected in the worker processes.
+    """
+
+    def __init__(self):
+        self._event = Event()
+        self._shared = None
+        self._tokens = WeakSet()
+
+    def link(self, token: 'CancellationToken'):
+        """
+        Cancel the given token when the event is set.
+
+        :param token: The token to cancel.
+        """
+
+        self._tokens.add(token)
+
+        if self.is_set():
+            token.cancel()
+
+    def share(self):
+        """
+        Get a multiprocessing event mirroring this event.
+
+        :return: A multiprocessing.Event object.
+        """
+
+        if self._shared is None:
+            import multiprocessing
+
+            self._shared = multiprocessing.Event()
+
+            if self._event.is_set():
+                self._shared.set()
+
+        return self._shared
+
+    def attach(self, shared):
+        """
+        Make this event follow a shared event, from a worker process.
+
+        :param shared: The multiprocessing event returned by share.
+        """
+
+        self._event = shared
+        self._shared = None
+
+    def is_set(self) -> bool:
+        return self._event.is_set()
+
+    def set(self):
+        self._event.set()
+
+        if self._shared is not None:
+            self._shared.set()
+
+        for token in list(self._tokens):
+            token.cancel()
+
+    def clear(self):
+        self._event.clear()
+
+        if self._shared is not None:
+            self._shared.clear()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._event.wait(timeout)
+
+
+class PauseEvent(SharedEvent):
+    """
+    An event used to pause threads, paired with a running event which is
+    set while the pause event is cleared, so threads can block until they
+    are resumed instead of polling.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._running = SharedEvent()
+        self._running.set()
+        self._lock = Lock()
+
+    def share(self):
+        """
+        Get the multiprocessing events mirroring the pause and running events.
+
+        :return: A tuple of multiprocessing.Event objects.
+        """
+
+        return super().share(), self._running.share()
+
+    def attach(self, shared):
+        """
+        Make this event follow the shared events, from a worker process.
+
+        :param shared: The tuple of multiprocessing events returned by share.
+        """
+
+        shared_pause, shared_running = shared
+
+        super().attach(shared_pause)
+        self._running.attach(shared_running)
+
+    def set(self):
+        with self._lock:
+            super().set()
+            self._running.clear()
+
+    def clear(self):
+        with self._lock:
+            self._running.set()
+            super().clear()
+
+    def wait_resume(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the event is cleared.
+
+        :param timeout: The maximum number of seconds to wait.
+
+        :return: Whether the event has been cleared.
+        """
+
+        return self._running.wait(timeout)
+
+
+class StepCancelledError(Exception):
+    'The step has been cancelled'
+    pass
+
+
+class StepTimeoutError(TimeoutError):
+    'The step has timed out'
+    pass
+
+
+class CancellationToken:
+    """
+    A token telling running steps that they should stop as soon as possible.
+    It is cancelled when its cancel method is called, when its parent token
+    is cancelled or, for tokens without a parent, when the exit event is set.
+
+    Tokens sent to worker processes follow the token of their procedure,
+    which shares its state with the processes through init_worker_process,
+    so they are cancelled when the procedure or the token is cancelled.
+
+    :param parent: The parent token.
+    """
+
+    # The number of cancelled tokens remembered by the shared state
+    shared_size = 64
+
+    def __init__(self, parent: Optional['CancellationToken'] = None):
+        self._event = Event()
+        self._id = next(_token_ids)
+        self._root = self if parent is None else parent._root
+        self._shared = None
+        self._following = False
+        self._children = WeakSet()
+        self._callbacks = []
+        self._lock = Lock()
+
+        if parent is not None:
+            parent._add_child(self)
+
+        else:
+            exit_event.link(self)
+
+    @property
+    def cancelled(self) -> bool:
+        """
+        Whether the token has been cancelled.
+        """
+
+        if self._event.is_set():
+            return True
+
+        if self._following:
+            cancelled_ids = worker_cancel_state[1]
+
+            with cancelled_ids.get_lock():
+                return self._id in cancelled_ids[1:]
+
+        return False
+
+    def cancel(self):
+        """
+        Cancel the token and its children.
+        """
+
+        with self._lock:
+            self._event.set()
+            children = list(self._children)
+            callbacks, self._callbacks = self._callbacks, []
+
+        self._share_cancellation()
+
+        for child in children:
+            child.cancel()
+
+        for callback in callbacks:
+            callback()
+
+    def add_callback(self, callback: Callable[[], Any]):
+        """
+        Call a function when the token is cancelled, from the thread
+        cancelling it, or immediately if it has already been cancelled.
+
+        :param callback: The function to call, without arguments.
+        """
+
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+
+        callback()
+
+    def remove_callback(self, callback: Callable[[], Any]):
+        """
+        Stop calling a function when the token is cancelled.
+
+        :param callback: The function passed to add_callback.
+        """
+
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def check(self):
+        """
+        Raise an exception if the token has been cancelled.
+
+        :raises StepCancelledError: If the token has been cancelled.
+        """
+
+        if self.cancelled:
+            raise StepCancelledError('The step has been cancelled')
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until the token is cancelled.
+
+        :param timeout: The maximum number of seconds to wait.
+
+        :return: Whether the token has been cancelled.
+        """
+
+        if not self._following:
+            return self._event.wait(timeout)
+
+        # Only the procedure event can be waited for, so the token
+        # is checked at short intervals
+        deadline = None if timeout is None else perf_counter() + timeout
+
+        while not self.cancelled:
+            remaining = 0.05
+
+            if deadline is not None:
+                remaining = min(remaining, deadline - perf_counter())
+
+                if remaining <= 0:
+                    return False
+
+            self._event.wait(remaining)
+
+        return True
+
+    def sleep(self, seconds: float):
+        """
+        Sleep for the given number of seconds, unless the token is cancelled.
+
+        :param seconds: The number of seconds to sleep.
+
+        :raises StepCancelledError: If the token is cancelled.
+        """
+
+        if self.wait(seconds):
+            raise StepCancelledError('The step has been cancelled')
+
+    def share(self) -> Tuple[Any, Any]:
+        """
+        Get the state of the token shared with worker processes: an event
+        set when the token is cancelled, and the ids of its last cancelled
+        descendants, like the steps which timed out.
+
+        :return: A tuple with a multiprocessing.Event object and a
+        multiprocessing.Array object, whose first item counts the ids.
+        """
+
+        with self._lock:
+            if self._shared is None:
+                import multiprocessing
+
+                self._shared = (
+                    multiprocessing.Event(),
+                    multiprocessing.Array('q', [0] + [-1] * self.shared_size)
+                )
+
+                if self._event.is_set():
+                    self._shared[0].set()
+
+            return self._shared
+
+    def _share_cancellation(self):
+        """
+        Tell the worker processes following the root token that the token
+        has been cancelled.
+        """
+
+        shared = self._root._shared
+
+        if shared is None:
+            return
+
+        shared_event, cancelled_ids = shared
+
+        if self._root is self:
+            shared_event.set()
+
+        elif not shared_event.is_set():
+            with cancelled_ids.get_lock():
+                total = cancelled_ids[0]
+                cancelled_ids[1 + total % self.shared_size] = self._id
+                cancelled_ids[0] = total + 1
+
+    def _add_child(self, child: 'CancellationToken'):
+        with self._lock:
+            self._children.add(child)
+            cancelled = self.cancelled
+
+        if cancelled:
+            child.cancel()
+
+    def __reduce__(self):
+        return (_get_worker_token, (self._id,))
+
+
+def _get_worker_token(token_id: int) -> CancellationToken:
+    """
+    Get a token received by a worker process, following the token with the
+    given id if the process shares the state of its procedure token.
+
+    :param token_id: The id of the token in the main process.
+    """
+
+    token = CancellationToken()
+
+    if worker_cancel_state is not None:
+        token._event = worker_cancel_state[0]
+        token._id = token_id
+        token._following = True
+
+    return token
+
+
+# Ids of the cancellation tokens
+_token_ids = count()
+
 # Event used to interrupt threads when exceptions are raised
-exit_event = Event()
+exit_event = SharedEvent()
 
 # Event used to pause threads
-pause_event = Event()
+pause_event = PauseEvent()
+
+# Event set while no live display is rendering, so prompts can be shown
+display_idle_event = Event()
+display_idle_event.set()
+
+# Shared state of the procedure token, in the worker processes of a procedure
+worker_cancel_state = None
 
 
 def wait_resume():
@@ -14,8 +391,19 @@ def wait_resume():
     Wait for the pause event to be cleared.
     """
 
-    while pause_event.is_set():
-        sleep(1/4)
+    pause_event.wait_resume()
+
+
+async def async_wait_resume():
+    """
+    Wait for the pause event to be cleared, without blocking the event loop.
+    """
+
+    if pause_event.is_set():
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, wait_resume)
 
 
 def check_events() -> bool:
@@ -23,4 +411,313 @@ def check_events() -> bool:
     Check if the exit and pause events are not set.
     """
 
-    return not exit_event.is_set() and not pause_event.is_set()
\ No newline at end of file
+    return not exit_event.is_set() and not pause_event.is_set()
+
+
+def init_worker_process(
+    shared_exit_event,
+    shared_pause_event,
+    shared_cancel_state = None
+):
+    """
+    Initialize a worker process, making the exit and pause events follow
+    the ones of the main process. SIGINT is ignored, as it is handled by
+    the main process.
+
+    :param shared_exit_event: The shared exit event.
+    :param shared_pause_event: The shared pause event.
+    :param shared_cancel_state: The shared state of the token of the
+    procedure executing its steps in the process, followed by the tokens
+    received by the process.
+    """
+
+    global worker_cancel_state
+
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    exit_event.attach(shared_exit_event)
+    pause_event.attach(shared_pause_event)
+    worker_cancel_state = shared_cancel_state
+
+
+class WorkerPool:
+    """
+    A pool of reusable daemon threads executing the submitted tasks.
+    Threads are started only when no idle thread is available, up to
+    the maximum number of workers, and excess tasks are queued.
+
+    :param max_workers: The maximum number of threads. If not set, the
+    same default of concurrent.futures.ThreadPoolExecutor is used.
+    :param name: The prefix of the thread names.
+
+    :raises ValueError: If max_workers is not greater than 0.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        name: str = 'AmbrogioWorker'
+    ):
+        if max_workers is None:
+            max_workers = min(32, (os.cpu_count() or 1) + 4)
+
+        if max_workers <= 0:
+            raise ValueError('max_workers must be greater than 0')
+
+        self._max_workers = max_workers
+        self._name = name
+
+        self._queue = SimpleQueue()
+        self._threads: List[Thread] = []
+        self._threads_lock = Lock()
+        self._idle_semaphore = Semaphore(0)
+
+    @property
+    def max_workers(self) -> int:
+        """
+        The maximum number of threads.
+        """
+
+        return self._max_workers
+
+    @property
+    def threads(self) -> int:
+        """
+        The number of threads started by the pool.
+        """
+
+        return len(self._threads)
+
+    def submit(self, function: Callable, *args, **kwargs) -> Future:
+        """
+        Submit a task to the pool.
+
+        :param function: The function to be executed.
+        :param args: The positional arguments to pass to the function.
+        :param kwargs: The keyword arguments to pass to the function.
+
+        :return: The future of the task.
+        """
+
+        future = _PoolFuture(function, args, kwargs)
+
+        self._queue.put(future)
+        self._adjust_threads()
+
+        return future
+
+    def run_or_wait(self, future: Future) -> Any:
+        """
+        Get the result of a task submitted to the pool, executing it in the
+        calling thread if no worker has started it yet. This allows tasks
+        executed by the pool to wait for other tasks without deadlocks.
+
+        :param future: The future returned by submit.
+
+        :return: The result of the task.
+
+        :raises Exception: If the task raises an exception.
+        """
+
+        if isinstance(future, _PoolFuture):
+            self._run_task(future)
+
+        return future.result()
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stop the threads once the queued tasks have been executed.
+
+        :param wait: If the method must wait for the threads to stop.
+        """
+
+        with self._threads_lock:
+            threads = list(self._threads)
+
+        for _ in threads:
+            self._queue.put(None)
+
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def _adjust_threads(self):
+        """
+        Start a new thread if no idle thread is available.
+        """
+
+        if self._idle_semaphore.acquire(timeout = 0):
+            return
+
+        with self._threads_lock:
+            if len(self._threads) < self._max_workers:
+                thread = Thread(
+                    target = self._work,
+                    name = f'{self._name}-{len(self._threads)}',
+                    daemon = True
+                )
+
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        """
+        Execute the queued tasks until the pool is shut down.
+        """
+
+        while True:
+            future = self._queue.get()
+
+            if future is None:
+                return
+
+            self._run_task(future)
+            self._idle_semaphore.release()
+
+    @staticmethod
+    def _run_task(future: '_PoolFuture'):
+        """
+        Execute a task and set the result of its future, unless the task
+        has been cancelled or is already being executed by another thread.
+        """
+
+        if not future.claim() or not future.set_running_or_notify_cancel():
+            return
+
+        try:
+            result = future.function(*future.args, **future.kwargs)
+
+        except BaseException as e:
+            future.set_exception(e)
+
+        else:
+            future.set_result(result)
+
+        finally:
+            del future.function, future.args, future.kwargs
+
+
+class _PoolFuture(Future):
+    """
+    The future of a task submitted to a WorkerPool, holding the task itself.
+    """
+
+    def __init__(self, function: Callable, args: tuple, kwargs: dict):
+        super().__init__()
+
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+
+        self._claimed = False
+        self._claim_lock = Lock()
+
+    def claim(self) -> bool:
+        """
+        Mark the task as taken by a thread.
+
+        :return: False if another thread already took the task.
+        """
+
+        with self._claim_lock:
+            if self._claimed:
+                return False
+
+            self._claimed = True
+            return True
+
+
+class PipeQueue:
+    """
+    A bounded FIFO queue connecting the stages of a pipeline. Producers
+    block while the queue is full, while consumers iterate over the items
+    until the queue is finished. Closing the queue wakes up both sides.
+
+    :param maxsize: The maximum number of items in the queue.
+
+    :raises ValueError: If maxsize is not greater than 0.
+    """
+
+    def __init__(self, maxsize: int):
+        if maxsize <= 0:
+            raise ValueError('maxsize must be greater than 0')
+
+        self._maxsize = maxsize
+        self._items = deque()
+        self._finished = False
+        self._closed = False
+
+        self._lock = Lock()
+        self._not_empty = Condition(self._lock)
+        self._not_full = Condition(self._lock)
+
+    @property
+    def maxsize(self) -> int:
+        """
+        The maximum number of items in the queue.
+        """
+
+        return self._maxsize
+
+    def put(self, item: Any):
+        """
+        Add an item to the queue, waiting for a free slot.
+
+        :param item: The item to add.
+
+        :raises StepCancelledError: If the queue has been closed.
+        """
+
+        with self._not_full:
+            while len(self._items) >= self._maxsize and not self._closed:
+                self._not_full.wait()
+
+            if self._closed:
+                raise StepCancelledError('The queue has been closed')
+
+            self._items.append(item)
+            self._not_empty.notify()
+
+    def finish(self):
+        """
+        Tell the consumer that no more items will be added.
+        """
+
+        with self._lock:
+            self._finished = True
+            self._not_empty.notify_all()
+
+    def close(self):
+        """
+        Discard the items and wake up producers and consumers.
+        """
+
+        with self._lock:
+            self._closed = True
+            self._items.clear()
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+    def __iter__(self):
+        while True:
+            with self._not_empty:
+                while (
+                    not self._items
+                    and not self._finished
+                    and not self._closed
+                ):
+                    self._not_empty.wait()
+
+                if self._closed:
+                    raise StepCancelledError('The queue has been closed')
+
+                if not self._items:
+                    return
+
+                item = self._items.popleft()
+                self._not_full.notify()
+
+            yield item
+
+    def __len__(self) -> int:
+        return len(self._items)
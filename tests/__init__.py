@@ -9,6 +9,7 @@ from pathlib import Path
 from ambrogio.procedures.loader import ProcedureLoader
 from ambrogio.utils.project import create_project
 from ambrogio.environment import init_env
+from ambrogio.utils.threading import exit_event
 
 
 def create_test_project(
@@ -53,11 +54,11 @@ class AmbrogioTestCase(unittest.TestCase):
         ) = create_test_project()
     
     def tearDown(self):
-        try:
-            del sys.modules['procedures']
-        
-        except KeyError:
-            pass
+        exit_event.clear()
+
+        for module in list(sys.modules):
+            if module == 'procedures' or module.startswith('procedures.'):
+                del sys.modules[module]
 
         if self.test_directory:
             self.test_directory.cleanup()
@@ -0,0 +1,216 @@
+import unittest
+import asyncio
+from time import sleep, perf_counter
+from threading import Timer, active_count, current_thread
+
+from ambrogio.utils.project import create_procedure
+from ambrogio.procedures.async_step import AsyncStepProcedure
+from ambrogio.utils.threading import exit_event
+
+from . import AmbrogioTestCase
+
+
+class TestAsyncProcedure(AmbrogioTestCase):
+    """
+    Test the async procedures.
+    """
+
+    def test_async_basic_procedure(self):
+        """
+        Test the async basic procedure.
+        """
+
+        name = 'Test async basic procedure'
+        
+        create_procedure(
+            name,
+            'async_basic',
+            self.project_path
+        )
+
+        self.procedure_loader._load_all_procedures()
+
+        procedure = self.procedure_loader.run(name)
+        self.assertTrue(procedure.finished)
+
+    def test_async_step_procedure(self):
+        """
+        Test the async step procedure.
+        """
+
+        name = 'Test async step procedure'
+        
+        create_procedure(
+            name,
+            'async_step',
+            self.project_path
+        )
+
+        self.procedure_loader._load_all_procedures()
+
+        procedure: AsyncStepProcedure = self.procedure_loader.load(name)(
+            self.config
+        )
+
+        threads = active_count()
+        counters = {'running': 0, 'max_running': 0, 'errors': 0}
+
+        async def wait():
+            counters['running'] += 1
+            counters['max_running'] = max(
+                counters['running'],
+                counters['max_running']
+            )
+
+            await asyncio.sleep(0.05)
+            counters['running'] -= 1
+
+        async def raise_error():
+            counters['errors'] += 1
+            raise Exception('Test error')
+
+        async def check_threads():
+            self.assertEqual(active_count(), threads)
+
+        for _ in range(200):
+            procedure.add_step(wait, parallel = True)
+
+        procedure.add_step(raise_error, blocking = False)
+        procedure.add_step(check_threads)
+        procedure.add_step(raise_error)
+
+        with self.assertRaises(Exception):
+            procedure._execute()
+
+        self.assertEqual(counters['max_running'], 200)
+        self.assertEqual(counters['errors'], 2)
+        self.assertEqual(procedure.completed_steps, 201)
+        self.assertEqual(procedure.failed_steps, 2)
+        self.assertFalse(procedure.finished)
+
+        wait_profiles = procedure.get_step_profiles('wait')
+        self.assertEqual(len(wait_profiles), 200)
+        self.assertGreaterEqual(
+            min(profile.wall_time for profile in wait_profiles),
+            0.05
+        )
+        self.assertEqual(
+            [
+                profile.status
+                for profile in procedure.get_step_profiles('raise_error')
+            ],
+            ['failed', 'failed']
+        )
+
+    def test_async_thread_steps(self):
+        """
+        Test that the steps which aren't coroutines are executed by the
+        bounded worker pool of the procedure.
+        """
+
+        name = 'Test async thread steps procedure'
+
+        create_procedure(name, 'async_step', self.project_path)
+        self.procedure_loader._load_all_procedures()
+
+        procedure: AsyncStepProcedure = self.procedure_loader.load(name)(
+            self.config
+        )
+        procedure.max_workers = 2
+        threads = set()
+
+        def record_thread():
+            sleep(0.01)
+            threads.add(current_thread().name)
+
+        for _ in range(20):
+            procedure.add_step(record_thread, parallel = True)
+
+        procedure._execute()
+
+        # The steps of the template are completed too
+        self.assertEqual(procedure.completed_steps, 24)
+        self.assertLessEqual(len(threads), 2)
+        self.assertLessEqual(procedure._worker_pool.threads, 2)
+
+    def test_async_sequential_step_dependencies(self):
+        """
+        Test that a sequential step with explicit dependencies doesn't delay
+        the steps which don't depend on it.
+        """
+
+        name = 'Test async sequential dependencies procedure'
+
+        create_procedure(name, 'async_step', self.project_path)
+        self.procedure_loader._load_all_procedures()
+
+        procedure: AsyncStepProcedure = self.procedure_loader.load(name)(
+            self.config
+        )
+        procedure.set_up = lambda: None
+        started_at = perf_counter()
+        started = {}
+
+        async def record(event, delay = 0):
+            started[event] = perf_counter() - started_at
+            await asyncio.sleep(delay)
+
+        for step_name, parallel, delay, depends_on in (
+            ('a', True, 0.2, []),
+            ('b', False, 1, []),
+            ('c', True, 0, ['a'])
+        ):
+            procedure.add_step(
+                record,
+                step_name,
+                parallel = parallel,
+                params = {'event': step_name, 'delay': delay},
+                depends_on = depends_on
+            )
+
+        procedure._execute()
+
+        self.assertEqual(procedure.completed_steps, 3)
+        self.assertLess(started['c'], 0.5)
+
+    def test_async_stubborn_cancellation(self):
+        """
+        Test that an async procedure returns soon after it is cancelled or
+        the exit event is set, even if its running steps ignore their token.
+        """
+
+        name = 'Test async stubborn cancellation procedure'
+
+        create_procedure(name, 'async_step', self.project_path)
+        self.procedure_loader._load_all_procedures()
+
+        for stop in ('cancel', 'exit'):
+            procedure: AsyncStepProcedure = self.procedure_loader.load(name)(
+                self.config
+            )
+            procedure.set_up = lambda: None
+
+            async def wait():
+                await asyncio.sleep(5)
+
+            procedure.add_step(wait, parallel = True)
+
+            Timer(
+                0.2,
+                procedure.cancel if stop == 'cancel' else exit_event.set
+            ).start()
+
+            started_at = perf_counter()
+
+            try:
+                procedure._execute()
+
+            finally:
+                exit_event.clear()
+
+            self.assertLess(perf_counter() - started_at, 1, stop)
+            self.assertFalse(procedure.finished)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+import unittest
+import os
+from time import sleep, perf_counter
+from threading import Lock, Timer
+
+from ambrogio.procedures.param import ProcedureParam
+from ambrogio.procedures.batch import summarize_results
+from ambrogio.utils.project import create_procedure
+from ambrogio.utils.threading import exit_event
+
+from . import AmbrogioTestCase
+
+
+class TestBatch(AmbrogioTestCase):
+    """
+    Test the batch execution of procedures.
+    """
+
+    def test_batch(self):
+        """
+        Test that procedures are executed at the same time, with their own
+        parameters and within the concurrency limit.
+        """
+
+        name = 'Test batch procedure'
+
+        create_procedure(name, 'basic', self.project_path)
+        self.procedure_loader._load_all_procedures()
+
+        procedure_class = self.procedure_loader.load(name)
+        procedure_class.params = [ProcedureParam('value', int, value = 0)]
+
+        lock = Lock()
+        counters = {'running': 0, 'max_running': 0}
+        values = []
+
+        def execute(procedure):
+            with lock:
+                counters['running'] += 1
+                counters['max_running'] = max(
+                    counters['max_running'],
+                    counters['running']
+                )
+
+            sleep(0.1)
+
+            with lock:
+                counters['running'] -= 1
+
+            value = procedure.get_param('value').value
+            values.append(value)
+
+            if value < 0:
+                raise ValueError('Test error')
+
+        procedure_class.execute = execute
+
+        results = self.procedure_loader.run_batch(
+            [(name, {'value': value}) for value in (1, 2, '3', -1)],
+            max_concurrency = 2
+        )
+
+        self.assertEqual(counters['max_running'], 2)
+        self.assertEqual(sorted(values), [-1, 1, 2, 3])
+        self.assertEqual(procedure_class.get_param('value').value, 0)
+
+        self.assertEqual(
+            [result.status for result in results],
+            ['completed', 'completed', 'completed', 'failed']
+        )
+        self.assertEqual(results[2].params, {'value': '3'})
+        self.assertIsInstance(results[3].error, ValueError)
+
+        with self.assertRaises(KeyError):
+            self.procedure_loader.run_batch([(name, {'missing': 1})])
+
+    def test_sweep(self):
+        """
+        Test that a procedure is executed with all the combinations of the
+        parameter values, both in threads and in processes.
+        """
+
+        (self.project_path / 'procedures' / 'test_sweep.py').write_text(
+            'import os\n'
+            'from ambrogio.procedures.basic import BasicProcedure\n'
+            'from ambrogio.procedures.param import ProcedureParam\n'
+            '\n'
+            'class TestSweepProcedure(BasicProcedure):\n'
+            '    name = "Test sweep procedure"\n'
+            '    params = [\n'
+            '        ProcedureParam("a", int, value = 1),\n'
+            '        ProcedureParam("b", float, value = 1.0)\n'
+            '    ]\n'
+            '\n'
+            '    def execute(self):\n'
+            '        a = self.get_param("a").value\n'
+            '        b = self.get_param("b").value\n'
+            '        return a * b, os.getpid()\n'
+        )
+
+        self.procedure_loader._load_all_procedures()
+
+        for executor in ('thread', 'process'):
+            results = self.procedure_loader.run_sweep(
+                'Test sweep procedure',
+                {'a': range(1, 4), 'b': [0.5, 2]},
+                max_concurrency = 2,
+                executor = executor
+            )
+
+            self.assertEqual(
+                [result.params for result in results],
+                [
+                    {'a': a, 'b': b}
+                    for a in range(1, 4) for b in (0.5, 2)
+                ]
+            )
+            self.assertEqual(
+                [result.result[0] for result in results],
+                [0.5, 2, 1, 4, 1.5, 6]
+            )
+
+            pids = {result.result[1] for result in results}
+
+            if executor == 'process':
+                self.assertNotIn(os.getpid(), pids)
+                self.assertIsNone(results[0].procedure)
+
+            else:
+                self.assertEqual(pids, {os.getpid()})
+
+            summary = summarize_results(results)
+
+            self.assertEqual(summary['total'], 6)
+            self.assertEqual(summary['completed'], 6)
+
+    def test_process_cancellation(self):
+        """
+        Test that the procedures running in worker processes are cancelled
+        when the exit event is set, like on SIGINT.
+        """
+
+        (self.project_path / 'procedures' / 'test_stopped.py').write_text(
+            'import time\n'
+            'from ambrogio.procedures.basic import BasicProcedure\n'
+            '\n'
+            'class TestStoppedProcedure(BasicProcedure):\n'
+            '    name = "Test stopped procedure"\n'
+            '\n'
+            '    def execute(self):\n'
+            '        deadline = time.perf_counter() + 10\n'
+            '\n'
+            '        while (\n'
+            '            not self.cancelled\n'
+            '            and time.perf_counter() < deadline\n'
+            '        ):\n'
+            '            time.sleep(0.01)\n'
+            '\n'
+            '        return self.cancelled\n'
+        )
+
+        self.procedure_loader._load_all_procedures()
+
+        Timer(0.5, exit_event.set).start()
+        started_at = perf_counter()
+
+        result, = self.procedure_loader.run_batch(
+            ['Test stopped procedure'],
+            executor = 'process'
+        )
+
+        self.assertLess(perf_counter() - started_at, 5)
+        self.assertTrue(result.started)
+        self.assertIs(result.result, True)
+
+
+if __name__ == '__main__':
+    unittest.main()
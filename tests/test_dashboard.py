@@ -0,0 +1,211 @@
+import unittest
+import io
+import time
+
+from rich.console import Console
+from rich.live import Live
+
+from ambrogio.cli.dashboard import Dashboard
+from ambrogio.cli.widgets import get_sparkline
+from ambrogio.procedures.step import StepProcedure
+from ambrogio.utils.ringbuffer import RingBuffer, get_percentiles
+from ambrogio.utils.sampler import PerformanceSampler
+
+
+# Maximum share of a CPU used by sampling and rendering the dashboard at
+# the default interval
+CPU_BUDGET = 0.01
+
+
+class DashboardProcedure(StepProcedure):
+    name = 'Dashboard procedure'
+    telemetry = False
+    dashboard_samples = 10
+
+
+class TestDashboard(unittest.TestCase):
+    """
+    Test the sampling and the rendering of the dashboard.
+    """
+
+    def create_dashboard(self) -> Dashboard:
+        procedure = DashboardProcedure()
+
+        for index in range(30):
+            procedure.add_step(lambda: None, f'step_{index}', parallel = True)
+
+        console = Console(file = io.StringIO(), width = 160)
+
+        return Dashboard(procedure, console)
+
+    def test_ring_buffer(self):
+        """
+        Test that the ring buffer keeps the most recent values.
+        """
+
+        buffer = RingBuffer(4)
+
+        self.assertIsNone(buffer.latest)
+        self.assertEqual(buffer.values(), [])
+
+        for value in range(1, 7):
+            buffer.append(value)
+
+        self.assertEqual(len(buffer), 4)
+        self.assertEqual(buffer.latest, 6)
+        self.assertEqual(buffer.values(), [3, 4, 5, 6])
+        self.assertEqual(buffer.values(3), [4, 5, 6])
+        self.assertEqual(buffer.values(10), [3, 4, 5, 6])
+        self.assertEqual(buffer.values(0), [])
+
+        buffer.clear()
+        buffer.append(7)
+        self.assertEqual(buffer.values(), [7])
+
+        self.assertEqual(
+            get_percentiles([4, 1, 3, 2], [0, 50, 100]),
+            [1, 2.5, 4]
+        )
+        self.assertEqual(get_percentiles([], [95]), [None])
+
+        with self.assertRaises(ValueError):
+            get_percentiles([1], [101])
+
+        with self.assertRaises(ValueError):
+            RingBuffer(0)
+
+    def test_sparkline(self):
+        """
+        Test that the sparkline is scaled between the min and max values.
+        """
+
+        self.assertEqual(get_sparkline([0, 2, 14, 2]), '▁▂█▂')
+        self.assertEqual(get_sparkline([5, 5, 5]), '▁▁▁')
+        self.assertEqual(get_sparkline(list(range(8)), 2), '▁█')
+        self.assertEqual(get_sparkline([]), '')
+
+    def test_sampler(self):
+        """
+        Test that the sampler keeps the last samples in a ring buffer.
+        """
+
+        samples = []
+        sampler = PerformanceSampler(0.01, 3, samples.append)
+
+        for _ in range(5):
+            sampler.sample()
+
+        self.assertEqual(sampler.count, 5)
+        self.assertEqual(sampler.samples, samples[-3:])
+        self.assertEqual(sampler.latest, samples[-1])
+        self.assertGreater(sampler.latest['memory'], 0)
+        self.assertEqual(
+            sampler.get_values('threads'),
+            [sample['threads'] for sample in samples[-3:]]
+        )
+
+        summary = sampler.summarize('memory', 2)
+        memory = [sample['memory'] for sample in samples[-2:]]
+
+        self.assertEqual(summary['current'], memory[-1])
+        self.assertEqual(summary['mean'], sum(memory) / 2)
+        self.assertEqual(summary['max'], max(memory))
+        self.assertLessEqual(summary['p50'], summary['p95'])
+        self.assertIsNone(PerformanceSampler().summarize('cpu'))
+
+        sampler.start()
+        self.assertTrue(sampler.running)
+
+        time.sleep(0.1)
+        sampler.stop()
+
+        count = sampler.count
+        self.assertGreater(count, 6)
+        self.assertFalse(sampler.running)
+
+        time.sleep(0.05)
+        self.assertEqual(sampler.count, count)
+
+        with self.assertRaises(ValueError):
+            PerformanceSampler(0)
+
+    def test_incremental_rendering(self):
+        """
+        Test that the widgets are rendered again only when they change.
+        """
+
+        dashboard = self.create_dashboard()
+        procedure = dashboard.procedure
+        console = dashboard._console
+
+        dashboard.sampler.sample()
+        console.print(dashboard._generate_dashboard())
+
+        progress_widget, = procedure._dashboard_widgets
+        progress_lines = progress_widget._lines
+        performances_lines = dashboard._performances_widget._lines
+
+        console.print(dashboard._generate_dashboard())
+
+        self.assertIs(progress_widget._lines, progress_lines)
+        self.assertIs(
+            dashboard._performances_widget._lines,
+            performances_lines
+        )
+
+        dashboard.sampler.sample()
+        procedure.metrics.increment('completed')
+        console.print(dashboard._generate_dashboard())
+
+        self.assertIs(procedure._dashboard_widgets[0], progress_widget)
+        self.assertIsNot(progress_widget._lines, progress_lines)
+        self.assertIsNot(
+            dashboard._performances_widget._lines,
+            performances_lines
+        )
+        self.assertEqual(
+            dashboard.max_performances,
+            procedure.metrics.max_performances
+        )
+        output = console.file.getvalue()
+
+        self.assertEqual(dashboard.sampler.size, 10)
+        self.assertIn('Performances', output)
+        self.assertIn('p95', output)
+        self.assertIn('▁', output)
+
+    def test_overhead(self):
+        """
+        Test that sampling and rendering the dashboard at the default
+        interval uses less than 1 % of a CPU.
+        """
+
+        dashboard = self.create_dashboard()
+        interval = dashboard.sampler.interval
+
+        self.assertEqual(interval, 1.0)
+
+        dashboard.sampler.sample()
+
+        with Live(
+            dashboard._generate_dashboard(),
+            console = dashboard._console,
+            auto_refresh = False
+        ) as live:
+            refresh_times = []
+
+            # Each refresh takes a new sample, like at each interval
+            for _ in range(3):
+                cpu_time = time.thread_time()
+
+                for _ in range(10):
+                    dashboard.sampler.sample()
+                    live.update(dashboard._generate_dashboard(), refresh = True)
+
+                refresh_times.append((time.thread_time() - cpu_time) / 10)
+
+        self.assertLess(min(refresh_times) / interval, CPU_BUDGET)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+import os
+from threading import Thread, get_ident
+
+from ambrogio.utils.metrics import (
+    Counter,
+    ProcedureMetrics,
+    StepProfile,
+    measure_call
+)
+
+
+class TestMetrics(unittest.TestCase):
+    """
+    Test the procedure metrics.
+    """
+
+    def test_counter(self):
+        """
+        Test that concurrent increments are never lost.
+        """
+
+        counter = Counter()
+
+        def increment():
+            for _ in range(10000):
+                counter.increment()
+
+        threads = [Thread(target = increment) for _ in range(8)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(counter.value, 80000)
+
+        counter.increment(5)
+        self.assertEqual(int(counter), 80005)
+
+    def test_procedure_metrics(self):
+        """
+        Test procedure and step counters.
+        """
+
+        metrics = ProcedureMetrics()
+
+        def complete(step):
+            for _ in range(1000):
+                metrics.increment('completed')
+                metrics.increment('completed', step)
+
+        threads = [
+            Thread(target = complete, args = (f'step_{index % 2}',))
+            for index in range(4)
+        ]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(metrics.get('completed'), 4000)
+        self.assertEqual(metrics.get('completed', 'step_0'), 2000)
+        self.assertEqual(metrics.get('failed'), 0)
+        self.assertEqual(metrics.get('completed', 'missing'), 0)
+
+        self.assertEqual(metrics.snapshot(), {
+            'procedure': {'completed': 4000},
+            'steps': {
+                'step_0': {'completed': 2000},
+                'step_1': {'completed': 2000}
+            }
+        })
+
+    def test_step_profiles(self):
+        """
+        Test the measure of the step attempts and their summary.
+        """
+
+        result, error, usage = measure_call(dict, {'a': 1})
+        self.assertEqual((result, error), ({'a': 1}, None))
+        self.assertEqual(usage['thread_id'], get_ident())
+        self.assertEqual(usage['process_id'], os.getpid())
+        self.assertGreaterEqual(usage['wall_time'], 0)
+
+        result, error, usage = measure_call(int, {'x': 'one'})
+        self.assertIsInstance(error, TypeError)
+
+        metrics = ProcedureMetrics()
+        metrics.add_profile(StepProfile('a', 1, 'failed', 0.5, 0.25, 10, 1))
+        metrics.add_profile(StepProfile('b', 1, 'completed', 1.0))
+        metrics.add_profile(StepProfile('a', 2, 'completed', 0.5, 0.5, 5, 2))
+
+        self.assertEqual(len(metrics.get_profiles()), 3)
+        self.assertEqual(
+            [profile.attempt for profile in metrics.get_profiles('a')],
+            [1, 2]
+        )
+        self.assertEqual(metrics.summarize_profiles(), {
+            'a': {
+                'attempts': 2,
+                'wall_time': 1.0,
+                'cpu_time': 0.75,
+                'memory_delta': 10,
+                'threads': [1, 2],
+                'status': 'completed'
+            },
+            'b': {
+                'attempts': 1,
+                'wall_time': 1.0,
+                'cpu_time': 0.0,
+                'memory_delta': 0,
+                'threads': [],
+                'status': 'completed'
+            }
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
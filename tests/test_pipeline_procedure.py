@@ -0,0 +1,136 @@
+import unittest
+from itertools import islice
+from threading import Thread
+
+from ambrogio.utils.project import create_procedure
+from ambrogio.procedures.pipeline import PipelineProcedure
+
+from . import AmbrogioTestCase
+
+
+class TestPipelineProcedure(AmbrogioTestCase):
+    """
+    Test the pipeline procedure.
+    """
+
+    def create_pipeline_procedure(self, name: str) -> PipelineProcedure:
+        create_procedure(
+            name,
+            'pipeline',
+            self.project_path
+        )
+
+        self.procedure_loader._load_all_procedures()
+
+        procedure: PipelineProcedure = self.procedure_loader.load(name)(
+            self.config
+        )
+
+        procedure.set_up = lambda: None
+
+        return procedure
+
+    def test_pipeline_procedure(self):
+        """
+        Test that items stream through the stages with bounded queues.
+        """
+
+        procedure = self.create_pipeline_procedure('Test pipeline procedure')
+        produced = []
+
+        def produce(count):
+            for item in range(count):
+                produced.append(item)
+                yield item
+
+        def double(items):
+            for item in items:
+                yield item * 2
+
+        def total(items):
+            result = 0
+
+            for item in items:
+                # The producer is never more than the queued items ahead
+                self.assertLessEqual(len(produced) - item // 2, 3 + 3 + 3)
+                result += item
+
+            return result
+
+        procedure.add_stage(produce, params = {'count': 1000}, queue_size = 3)
+        procedure.add_stage(double, queue_size = 3)
+        procedure.add_stage(total)
+
+        self.assertEqual(procedure._execute(), sum(range(1000)) * 2)
+        self.assertEqual(procedure.result, sum(range(1000)) * 2)
+        self.assertTrue(procedure.finished)
+
+        self.assertEqual(procedure.metrics.get('items_out', 'produce'), 1000)
+        self.assertEqual(procedure.metrics.get('items_in', 'double'), 1000)
+        self.assertEqual(procedure.metrics.get('items_in', 'total'), 1000)
+
+    def test_pipeline_early_stop(self):
+        """
+        Test that a stage reading only part of its input stops the
+        previous stages without failing the procedure.
+        """
+
+        procedure = self.create_pipeline_procedure('Test early stop pipeline')
+        results = []
+
+        def produce():
+            yield from range(1000)
+
+        def double(items):
+            for item in items:
+                yield item * 2
+
+        procedure.add_stage(produce, queue_size = 10)
+        procedure.add_stage(double, queue_size = 10)
+        procedure.add_stage(lambda items: list(islice(items, 5)), 'take')
+
+        thread = Thread(
+            target = lambda: results.append(procedure._execute()),
+            daemon = True
+        )
+        thread.start()
+        thread.join(5)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(results, [[0, 2, 4, 6, 8]])
+        self.assertTrue(procedure.finished)
+        self.assertLess(procedure.metrics.get('items_out', 'produce'), 1000)
+
+    def test_pipeline_failure(self):
+        """
+        Test that a failing stage stops the other stages.
+        """
+
+        procedure = self.create_pipeline_procedure('Test failing pipeline')
+
+        def produce():
+            item = 0
+
+            while True:
+                yield item
+                item += 1
+
+        def fail(items):
+            for item in items:
+                if item == 10:
+                    raise ValueError('Test error')
+
+                yield item
+
+        procedure.add_stage(produce)
+        procedure.add_stage(fail)
+        procedure.add_stage(lambda items: sum(items), 'consume')
+
+        with self.assertRaises(ValueError):
+            procedure._execute()
+
+        self.assertFalse(procedure.finished)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,268 @@
+import unittest
+import sys
+from threading import Event
+
+from ambrogio.utils.project import create_procedure
+
+from . import AmbrogioTestCase
+
+
+class TestProcedureLoader(AmbrogioTestCase):
+    """
+    Test the lazy loading of procedures.
+    """
+
+    def test_lazy_loading(self):
+        """
+        Test that procedures are listed without importing their modules and
+        that the manifest is updated when a module changes.
+        """
+
+        heavy_path = self.project_path / 'procedures' / 'heavy.py'
+        heavy_path.write_text(
+            'import missing_heavy_dependency\n'
+            'from ambrogio.procedures.basic import BasicProcedure\n'
+            '\n'
+            'class HeavyProcedure(BasicProcedure):\n'
+            '    name = "Heavy procedure"\n'
+        )
+
+        (self.project_path / 'procedures' / 'base.py').write_text(
+            'from ambrogio.procedures.step import StepProcedure\n'
+            '\n'
+            'class Base(StepProcedure):\n'
+            '    pass\n'
+            '\n'
+            'class Helper:\n'
+            '    name = "Not a procedure"\n'
+        )
+
+        (self.project_path / 'procedures' / 'derived.py').write_text(
+            'from procedures.base import Base\n'
+            '\n'
+            'class DerivedProcedure(Base):\n'
+            '    name: str = "Derived procedure"\n'
+        )
+
+        create_procedure('Light procedure', 'basic', self.project_path)
+
+        self.procedure_loader._load_all_procedures()
+
+        self.assertEqual(
+            sorted(self.procedure_loader.list()),
+            ['Derived procedure', 'Heavy procedure', 'Light procedure']
+        )
+        self.assertNotIn('procedures.heavy', sys.modules)
+
+        self.procedure_loader.run('Light procedure')
+        self.assertEqual(
+            self.procedure_loader.load('Derived procedure').__name__,
+            'DerivedProcedure'
+        )
+        self.assertNotIn('procedures.heavy', sys.modules)
+
+        with self.assertRaises(ImportError):
+            self.procedure_loader.load('Heavy procedure')
+
+        manifest_path = self.project_path / '.ambrogio' / 'manifest.json'
+        manifest_mtime = manifest_path.stat().st_mtime_ns
+
+        self.procedure_loader._load_all_procedures()
+        self.assertEqual(manifest_path.stat().st_mtime_ns, manifest_mtime)
+
+        heavy_path.write_text(
+            heavy_path.read_text().replace('Heavy', 'Renamed')
+        )
+
+        self.procedure_loader._load_all_procedures()
+
+        self.assertIn('Renamed procedure', self.procedure_loader.list())
+        self.assertNotIn('Heavy procedure', self.procedure_loader.list())
+
+    def test_unresolved_names(self):
+        """
+        Test that procedures whose name is not a string are found by
+        importing their modules.
+        """
+
+        (self.project_path / 'procedures' / 'constant.py').write_text(
+            'from ambrogio.procedures.basic import BasicProcedure\n'
+            '\n'
+            'NAME = "Constant procedure"\n'
+            '\n'
+            'class ConstantProcedure(BasicProcedure):\n'
+            '    name = NAME\n'
+        )
+
+        (self.project_path / 'procedures' / 'mixin.py').write_text(
+            'from ambrogio.procedures.basic import BasicProcedure\n'
+            '\n'
+            'class NameMixin:\n'
+            '    name = "Mixin procedure"\n'
+            '\n'
+            'class MixinProcedure(NameMixin, BasicProcedure):\n'
+            '    pass\n'
+        )
+
+        create_procedure('Light procedure', 'basic', self.project_path)
+
+        self.procedure_loader._load_all_procedures()
+
+        self.assertEqual(
+            self.procedure_loader.load('Constant procedure').__name__,
+            'ConstantProcedure'
+        )
+        self.assertEqual(
+            sorted(self.procedure_loader.list()),
+            ['Constant procedure', 'Light procedure', 'Mixin procedure']
+        )
+        self.assertNotIn('procedures.light_procedure', sys.modules)
+
+        with self.assertRaises(KeyError):
+            self.procedure_loader.load('Missing procedure')
+
+    def test_reload(self):
+        """
+        Test that only the changed modules and the ones depending on them
+        are reloaded, and that deleted modules are removed.
+        """
+
+        base_path = self.project_path / 'procedures' / 'reload_base.py'
+        base_path.write_text(
+            'from ambrogio.procedures.basic import BasicProcedure\n'
+            '\n'
+            'class ReloadBase(BasicProcedure):\n'
+            '    name = "Reload base"\n'
+            '    value = 1\n'
+        )
+
+        (self.project_path / 'procedures' / 'reload_derived.py').write_text(
+            'from procedures.reload_base import ReloadBase\n'
+            '\n'
+            'class ReloadDerived(ReloadBase):\n'
+            '    name = "Reload derived"\n'
+        )
+
+        create_procedure('Unchanged procedure', 'basic', self.project_path)
+
+        self.procedure_loader._load_all_procedures()
+
+        unchanged = self.procedure_loader.load('Unchanged procedure')
+        derived = self.procedure_loader.load('Reload derived')
+        self.assertEqual(derived.value, 1)
+        self.assertEqual(self.procedure_loader.reload(), [])
+
+        base_path.write_text(base_path.read_text().replace('1', '20'))
+
+        self.assertEqual(
+            self.procedure_loader.reload(),
+            ['procedures.reload_base', 'procedures.reload_derived']
+        )
+        self.assertEqual(
+            self.procedure_loader.load('Reload derived').value,
+            20
+        )
+        self.assertIs(
+            self.procedure_loader.load('Unchanged procedure'),
+            unchanged
+        )
+
+        base_path.write_text(base_path.read_text() + '    def (\n')
+
+        self.assertEqual(
+            self.procedure_loader.reload(),
+            ['procedures.reload_base', 'procedures.reload_derived']
+        )
+        self.assertEqual(self.procedure_loader.load('Reload base').value, 20)
+
+        base_path.unlink()
+        (self.project_path / 'procedures' / 'reload_derived.py').unlink()
+
+        self.procedure_loader.reload()
+
+        self.assertNotIn('Reload base', self.procedure_loader.list())
+        self.assertNotIn('Reload derived', self.procedure_loader.list())
+
+        with self.assertRaises(KeyError):
+            self.procedure_loader.load('Reload base')
+
+    def test_reload_helpers(self):
+        """
+        Test that the modules of the project imported by the procedures are
+        reloaded when they change, together with the modules importing them.
+        """
+
+        helpers_path = self.project_path / 'procedures' / 'helpers.py'
+        helpers_path.write_text('def get_value():\n    return 1\n')
+
+        (self.project_path / 'procedures' / 'hello.py').write_text(
+            'from ambrogio.procedures.basic import BasicProcedure\n'
+            'from procedures.helpers import get_value\n'
+            '\n'
+            'class Hello(BasicProcedure):\n'
+            '    name = "Hello"\n'
+            '\n'
+            '    def get_value(self):\n'
+            '        return get_value()\n'
+        )
+
+        create_procedure('Unchanged procedure', 'basic', self.project_path)
+
+        self.procedure_loader._load_all_procedures()
+
+        unchanged = self.procedure_loader.load('Unchanged procedure')
+        hello = self.procedure_loader.load('Hello')
+        self.assertEqual(hello.get_value(None), 1)
+
+        helpers_path.write_text('def get_value():\n    return 20\n')
+
+        self.assertEqual(
+            self.procedure_loader.reload(),
+            ['procedures.helpers', 'procedures.hello']
+        )
+        self.assertEqual(
+            self.procedure_loader.load('Hello').get_value(None),
+            20
+        )
+        self.assertIs(
+            self.procedure_loader.load('Unchanged procedure'),
+            unchanged
+        )
+
+    def test_watch(self):
+        """
+        Test that a watched module is reloaded when it changes.
+        """
+
+        create_procedure('Watched procedure', 'basic', self.project_path)
+        procedure_path = (
+            self.project_path / 'procedures' / 'watched_procedure.py'
+        )
+
+        self.procedure_loader._load_all_procedures()
+        self.procedure_loader.load('Watched procedure')
+
+        reloaded = []
+        reloaded_event = Event()
+
+        def callback(module_names):
+            reloaded.extend(module_names)
+            reloaded_event.set()
+
+        self.procedure_loader.watch(0.05, callback)
+
+        try:
+            procedure_path.write_text(
+                procedure_path.read_text() + '\n# Changed\n'
+            )
+
+            self.assertTrue(reloaded_event.wait(5))
+
+        finally:
+            self.procedure_loader.unwatch()
+
+        self.assertEqual(reloaded, ['procedures.watched_procedure'])
+
+
+if __name__ == '__main__':
+    unittest.main()
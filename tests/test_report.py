@@ -0,0 +1,136 @@
+import unittest
+import os
+
+from ambrogio.cli.report import (
+    report,
+    EXIT_SUCCESS,
+    EXIT_REGRESSION,
+    EXIT_USAGE
+)
+from ambrogio.utils.telemetry import RunTelemetry
+from ambrogio.utils.report import get_baseline, find_regressions
+
+from . import AmbrogioTestCase
+
+
+def get_run(index: int, elapsed: float, latency: float, status = 'completed'):
+    """
+    Get a run record with a single step.
+    """
+
+    return {
+        'version': RunTelemetry.version,
+        'run_id': f'run-{index}',
+        'procedure': 'Test report procedure',
+        'status': status,
+        'started': f'2024-01-01T00:00:{index:02}+00:00',
+        'elapsed': elapsed,
+        'memory_delta': None,
+        'process_peak_memory': 100 * 1024 ** 2,
+        'max_memory': 50 * 1024 ** 2,
+        'steps': {
+            'download': {'attempts': 2, 'wall_time': latency * 2},
+            'parse': {'attempts': 1, 'wall_time': 0.001 * (index + 1)}
+        }
+    }
+
+
+class TestReport(AmbrogioTestCase):
+    """
+    Test the performance reports of the stored runs.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.prev_cwd = os.getcwd()
+        os.chdir(self.project_path.resolve())
+
+    def tearDown(self):
+        os.chdir(self.prev_cwd)
+
+        super().tearDown()
+
+    def test_regressions(self):
+        """
+        Test the comparison of the last completed run with the baseline.
+        """
+
+        runs = [
+            get_run(0, 1.0, 0.5),
+            get_run(1, 1.2, 0.4),
+            get_run(2, 1.1, 0.6),
+            get_run(3, 9.0, 9.0, 'failed'),
+            get_run(4, 1.1, 1.0)
+        ]
+
+        baseline = get_baseline(runs)
+
+        self.assertEqual(baseline['elapsed'], 1.1)
+        self.assertEqual(baseline['latencies']['download'], 0.5)
+
+        regressions = find_regressions(runs[-1], baseline)
+
+        # The parse step is slower but below the minimum delta
+        self.assertEqual(len(regressions), 1)
+        self.assertEqual(regressions[0].metric, 'latency')
+        self.assertEqual(regressions[0].step, 'download')
+        self.assertAlmostEqual(regressions[0].change, 1.0)
+        self.assertIn(
+            "Step 'download' increased by 100.0%",
+            str(regressions[0])
+        )
+
+        self.assertEqual(
+            find_regressions(runs[-1], get_baseline(runs, 'run-3')),
+            []
+        )
+        self.assertIsNone(get_baseline(runs[:1]))
+
+        with self.assertRaises(KeyError):
+            get_baseline(runs, 'missing')
+
+    def test_report(self):
+        """
+        Test that the report command writes an offline HTML report.
+        """
+
+        name = 'Test report procedure'
+        telemetry = RunTelemetry(self.project_path / '.ambrogio' / 'runs')
+
+        self.assertEqual(report(name), EXIT_USAGE)
+
+        for run in (get_run(0, 1.0, 0.5), get_run(1, 1.0, 1.0)):
+            telemetry.write(run)
+
+        self.assertEqual(report(name), EXIT_SUCCESS)
+        self.assertEqual(
+            report(name, fail_on_regression = True),
+            EXIT_REGRESSION
+        )
+        self.assertEqual(report(name, baseline = 'missing'), EXIT_USAGE)
+
+        report_path = (
+            self.project_path
+            / '.ambrogio'
+            / 'reports'
+            / 'test_report_procedure.html'
+        )
+        html = report_path.read_text()
+
+        self.assertIn('<title>Test report procedure performances', html)
+        self.assertIn('Step &#x27;download&#x27; increased by 100.0%', html)
+        self.assertIn('Plotly', html)
+        self.assertNotIn('<script src="http', html)
+
+        output_path = self.project_path / 'report.html'
+
+        self.assertEqual(
+            report(name, str(output_path), threshold = 2),
+            EXIT_SUCCESS
+        )
+        self.assertIn('No regressions', output_path.read_text())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import os
+import json
+
+from ambrogio.cli.prompt import Prompt, NonInteractiveError
+from ambrogio.cli.run import (
+    run,
+    get_env_name,
+    EXIT_SUCCESS,
+    EXIT_FAILURE,
+    EXIT_USAGE
+)
+
+from . import AmbrogioTestCase
+
+
+class TestRun(AmbrogioTestCase):
+    """
+    Test the headless execution of procedures.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        self.prev_cwd = os.getcwd()
+        os.chdir(self.project_path.resolve())
+
+    def tearDown(self):
+        os.chdir(self.prev_cwd)
+        os.environ.pop(get_env_name('times'), None)
+        Prompt.interactive = True
+
+        super().tearDown()
+
+    def test_run(self):
+        """
+        Test the parameters and the exit codes of headless runs.
+        """
+
+        (self.project_path / 'procedures' / 'test_run.py').write_text(
+            'from ambrogio.procedures.basic import BasicProcedure\n'
+            'from ambrogio.procedures.param import ProcedureParam\n'
+            '\n'
+            'class TestRunProcedure(BasicProcedure):\n'
+            '    name = "Test run procedure"\n'
+            '    params = [\n'
+            '        ProcedureParam("name", str, value = "World"),\n'
+            '        ProcedureParam("times", int, value = 1),\n'
+            '        ProcedureParam("fail", bool, value = False)\n'
+            '    ]\n'
+            '    calls = []\n'
+            '\n'
+            '    def execute(self):\n'
+            '        self.calls.append((\n'
+            '            self.get_param("name").value,\n'
+            '            self.get_param("times").value,\n'
+            '            self.prompt.text("Name?", default = "default")\n'
+            '        ))\n'
+            '\n'
+            '        if self.get_param("fail").value:\n'
+            '            self.prompt.text("Name?")\n'
+        )
+
+        self.procedure_loader._load_all_procedures()
+
+        name = 'Test run procedure'
+        params_file = self.project_path / 'params.json'
+        params_file.write_text(json.dumps({'name': 'File', 'times': 2}))
+        os.environ[get_env_name('times')] = '3'
+
+        self.assertEqual(run(name, [], str(params_file)), EXIT_SUCCESS)
+        self.assertEqual(run(name, ['name=Ambrogio', 'times=4']), EXIT_SUCCESS)
+
+        calls = self.procedure_loader.load(name).calls
+
+        self.assertEqual(calls, [
+            ('File', 3, 'default'),
+            ('Ambrogio', 4, 'default')
+        ])
+
+        self.assertEqual(run(name, ['fail=yes']), EXIT_FAILURE)
+        self.assertEqual(run(name, ['times=many']), EXIT_USAGE)
+        self.assertEqual(run(name, ['missing=1']), EXIT_USAGE)
+        self.assertEqual(run('Missing procedure', []), EXIT_USAGE)
+
+        with self.assertRaises(NonInteractiveError):
+            Prompt.list('Choose', ['a', 'b'])
+
+
+if __name__ == '__main__':
+    unittest.main()
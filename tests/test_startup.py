@@ -0,0 +1,137 @@
+import unittest
+import os
+import sys
+import subprocess
+from pathlib import Path
+from typing import List
+
+from tests import AmbrogioTestCase
+from ambrogio.utils.project import create_procedure
+
+try:
+    import resource
+
+except ImportError:
+    # Not available on Windows, where the startup time is not measured
+    resource = None
+
+
+# Modules which must not be imported by headless and listing commands
+HEAVY_MODULES = (
+    'rich',
+    'inquirer',
+    'blessed',
+    'psutil',
+    'asyncio',
+    'multiprocessing'
+)
+
+# Maximum processor time in seconds of headless and listing commands, on
+# top of the startup time of the interpreter: the target is 0.1 seconds,
+# with a margin for slower machines
+STARTUP_BUDGET = 0.12
+
+# The commands are executed more times, keeping the fastest execution, and
+# their processor time is measured, so the other processes of the machine
+# don't make the measure fluctuate
+STARTUP_RUNS = 7
+
+
+class TestStartup(AmbrogioTestCase):
+    """
+    Test the startup time of the command-line interface.
+    """
+
+    def setUp(self):
+        super().setUp()
+
+        create_procedure('Hello', project_path = self.project_path)
+
+        # Compiled modules are written like in an installed package, so the
+        # time needed to compile them is only spent by the first execution
+        self.env = {
+            **os.environ,
+            'PYTHONPATH': str(Path(__file__).parent.parent)
+        }
+        self.env.pop('PYTHONDONTWRITEBYTECODE', None)
+
+    def run_python(self, *args: str) -> str:
+        """
+        Run a new interpreter in the test project and get its output.
+        """
+
+        return subprocess.run(
+            [sys.executable, *args],
+            cwd = self.project_path,
+            env = self.env,
+            stdout = subprocess.PIPE,
+            stderr = subprocess.DEVNULL,
+            universal_newlines = True,
+            check = True
+        ).stdout
+
+    def get_execution_time(self, *args: str) -> float:
+        """
+        Get the shortest processor time in seconds needed to run a new
+        interpreter.
+        """
+
+        self.run_python(*args)
+        times: List[float] = []
+
+        for _ in range(STARTUP_RUNS):
+            started = resource.getrusage(resource.RUSAGE_CHILDREN)
+            self.run_python(*args)
+            finished = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+            times.append(
+                finished.ru_utime - started.ru_utime
+                + finished.ru_stime - started.ru_stime
+            )
+
+        return min(times)
+
+    def test_deferred_imports(self):
+        """
+        Test that headless and listing commands don't import the
+        dependencies of the interactive ones.
+        """
+
+        for command in (['list'], ['run', 'Hello']):
+            imported = self.run_python(
+                '-c',
+                'import sys; from ambrogio.cli import execute\n'
+                'try:\n'
+                f'    execute({command!r})\n'
+                'finally:\n'
+                '    print(" ".join(sorted(sys.modules)))'
+            ).split()
+
+            for heavy_module in HEAVY_MODULES:
+                self.assertNotIn(heavy_module, imported, command)
+
+    @unittest.skipIf(resource is None, 'resource module not available')
+    def test_startup_time(self):
+        """
+        Test that headless and listing commands are executed within the
+        startup budget.
+        """
+
+        interpreter_time = self.get_execution_time('-c', 'pass')
+
+        for command in (['list'], ['run', 'Hello']):
+            execution_time = self.get_execution_time(
+                '-m',
+                'ambrogio',
+                *command
+            )
+
+            self.assertLess(
+                execution_time - interpreter_time,
+                STARTUP_BUDGET,
+                command
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,184 @@
+import unittest
+import os
+import sys
+import subprocess
+from time import time
+from types import MethodType
+from threading import Lock
+
+from ambrogio.utils.cache import StepCache
+from ambrogio.utils.project import create_procedure
+from ambrogio.procedures.step import StepProcedure
+from ambrogio.procedures.param import ProcedureParam
+
+from . import AmbrogioTestCase
+
+
+calls = []
+
+
+def compute(value: int) -> int:
+    calls.append(value)
+    return value * 2
+
+
+def scale(procedure: StepProcedure) -> int:
+    calls.append('scale')
+    return procedure.get_param('factor').value * 100
+
+
+def classify(value: str, tags: set) -> bool:
+    return value in {'a', 'b', 'c'} and value in tags
+
+
+class TestStepCache(AmbrogioTestCase):
+    """
+    Test the cache of the step results.
+    """
+
+    def test_cached_steps(self):
+        """
+        Test that cached steps are not executed again with the same params.
+        """
+
+        name = 'Test cache procedure'
+
+        create_procedure(
+            name,
+            'step',
+            self.project_path
+        )
+
+        self.procedure_loader._load_all_procedures()
+        procedure_class = self.procedure_loader.load(name)
+
+        calls.clear()
+
+        for value in (1, 1, 2):
+            procedure: StepProcedure = procedure_class(self.config)
+
+            procedure.set_up = lambda: None
+            procedure.add_step(compute, params = {'value': value}, cache = True)
+            procedure._execute()
+
+            self.assertEqual(procedure.get_result('compute'), value * 2)
+
+        self.assertEqual(calls, [1, 2])
+        self.assertTrue(
+            (self.project_path / '.ambrogio' / 'cache').exists()
+        )
+
+    def test_procedure_state(self):
+        """
+        Test that cached steps are executed again when the variables of
+        their closures or the parameters of the procedure change.
+        """
+
+        name = 'Test cache state procedure'
+
+        create_procedure(
+            name,
+            'step',
+            self.project_path
+        )
+
+        self.procedure_loader._load_all_procedures()
+        procedure_class = self.procedure_loader.load(name)
+        procedure_class.params = [ProcedureParam('factor', int, value = 1)]
+
+        calls.clear()
+
+        for factor in (1, 1, 2):
+            procedure: StepProcedure = procedure_class.with_params(
+                factor = factor
+            )(self.config)
+
+            def multiply() -> int:
+                calls.append('multiply')
+                return factor * 10
+
+            procedure.set_up = lambda: None
+            procedure.add_step(multiply, cache = True)
+            procedure.add_step(
+                MethodType(scale, procedure),
+                cache = True
+            )
+            procedure._execute()
+
+            self.assertEqual(procedure.get_result('multiply'), factor * 10)
+            self.assertEqual(procedure.get_result('scale'), factor * 100)
+
+        self.assertEqual(calls, ['multiply', 'scale'] * 2)
+
+        # Functions whose closure can't be hashed are not cached
+        lock = Lock()
+        self.assertIsNone(StepCache.get_key(lambda: lock.locked(), {}))
+
+    def test_stable_keys(self):
+        """
+        Test that the keys don't depend on the hash seed of the interpreter.
+        """
+
+        script = (
+            'from ambrogio.utils.cache import StepCache;'
+            'from tests.test_step_cache import classify;'
+            "print(StepCache.get_key("
+            "classify, {'value': 'a', 'tags': {'a', 'x', 'y', 'z'}}"
+            "))"
+        )
+
+        keys = set()
+
+        for seed in range(1, 5):
+            output = subprocess.run(
+                [sys.executable, '-c', script],
+                env = {**os.environ, 'PYTHONHASHSEED': str(seed)},
+                cwd = os.path.dirname(os.path.dirname(__file__)),
+                capture_output = True,
+                text = True,
+                check = True
+            )
+
+            keys.add(output.stdout.strip())
+
+        self.assertEqual(len(keys), 1)
+        self.assertNotEqual(
+            keys.pop(),
+            StepCache.get_key(classify, {'value': 'a', 'tags': {'b'}})
+        )
+
+    def test_cache_eviction(self):
+        """
+        Test that the least recently used results are evicted first.
+        """
+
+        cache = StepCache(self.project_path / 'cache', 2500)
+
+        first_key = cache.get_key(compute, {'value': 1})
+        second_key = cache.get_key(compute, {'value': 2})
+        third_key = cache.get_key(compute, {'value': 3})
+
+        self.assertNotEqual(first_key, second_key)
+        self.assertEqual(first_key, cache.get_key(compute, {'value': 1}))
+        self.assertIsNone(cache.get_key(compute, {'value': lambda: None}))
+
+        cache.set(first_key, b'1' * 1000)
+        cache.set(second_key, b'2' * 1000)
+
+        # Make the first result the most recently used one
+        os.utime(
+            cache.path / f'{second_key}.pickle',
+            (time() - 60, time() - 60)
+        )
+        self.assertEqual(cache.get(first_key), (True, b'1' * 1000))
+
+        cache.set(third_key, b'3' * 1000)
+
+        self.assertTrue(cache.get(first_key)[0])
+        self.assertFalse(cache.get(second_key)[0])
+        self.assertTrue(cache.get(third_key)[0])
+        self.assertLessEqual(cache.size, 2500)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,41 @@
 import unittest
+import os
+from time import sleep, perf_counter
+from threading import Thread, Timer, Event, current_thread
+from pathlib import Path
 
 from ambrogio.utils.project import create_procedure
 
 from . import AmbrogioTestCase
 from ambrogio.procedures.step import StepProcedure
+from ambrogio.procedures.param import ProcedureParam
+from ambrogio.utils.threading import exit_event
+
+
+def write_pid(path: Path):
+    path.write_text(str(os.getpid()))
+
+
+def get_process_id(procedure) -> int:
+    return os.getpid()
+
+
+def square(value: int) -> int:
+    return value * value
+
+
+def raise_process_error():
+    raise ValueError('Process error')
+
+
+def check_cancellation(seconds: float, cancel_token) -> str:
+    started_at = perf_counter()
+
+    while perf_counter() - started_at < seconds:
+        cancel_token.check()
+        sleep(0.01)
+
+    return 'finished'
 
 
 class TestStepProcedure(AmbrogioTestCase):
@@ -36,6 +68,630 @@ class TestStepProcedure(AmbrogioTestCase):
     def check_errors(self, count):
         self.assertEqual(self.counters['errors'], count)
 
+    def create_step_procedure(self, name: str) -> StepProcedure:
+        if name not in self.procedure_loader.list():
+            create_procedure(
+                name,
+                'step',
+                self.project_path
+            )
+
+            self.procedure_loader._load_all_procedures()
+
+        procedure: StepProcedure = self.procedure_loader.load(name)(self.config)
+
+        procedure.set_up = lambda: None
+
+        return procedure
+
+    def test_step_dependencies(self):
+        """
+        Test that steps start as soon as their dependencies have finished.
+        """
+
+        procedure = self.create_step_procedure('Test dependencies procedure')
+        events = []
+
+        def record(event, delay = 0):
+            sleep(delay)
+            events.append(event)
+
+        procedure.add_step(record, 'load', params = {'event': 'load'})
+        procedure.add_step(
+            record,
+            'slow',
+            parallel = True,
+            params = {'event': 'slow', 'delay': 0.2}
+        )
+        procedure.add_step(
+            record,
+            'fast',
+            parallel = True,
+            params = {'event': 'fast'},
+            depends_on = ['load']
+        )
+        procedure.add_step(
+            record,
+            'after_fast',
+            parallel = True,
+            params = {'event': 'after_fast'},
+            depends_on = ['fast']
+        )
+        procedure.add_step(
+            record,
+            'join',
+            params = {'event': 'join'},
+            depends_on = ['slow', 'after_fast']
+        )
+
+        procedure._execute()
+
+        self.assertEqual(
+            events,
+            ['load', 'fast', 'after_fast', 'slow', 'join']
+        )
+        self.assertEqual(procedure.completed_steps, 5)
+
+        self.assertRaises(
+            ValueError,
+            lambda: procedure.add_step(record, depends_on = ['missing'])
+        )
+
+    def test_sequential_step_dependencies(self):
+        """
+        Test that a sequential step with explicit dependencies doesn't delay
+        the steps which don't depend on it, while sequential steps are still
+        executed one at a time.
+        """
+
+        procedure = self.create_step_procedure(
+            'Test sequential dependencies procedure'
+        )
+        started_at = perf_counter()
+        started = {}
+        finished = {}
+
+        def record(event, delay = 0):
+            started[event] = perf_counter() - started_at
+            sleep(delay)
+            finished[event] = perf_counter() - started_at
+
+        for name, parallel, delay, depends_on in (
+            ('a', True, 0.2, []),
+            ('b', False, 1, []),
+            ('c', True, 0, ['a']),
+            ('d', False, 0, [])
+        ):
+            procedure.add_step(
+                record,
+                name,
+                parallel = parallel,
+                params = {'event': name, 'delay': delay},
+                depends_on = depends_on
+            )
+
+        procedure._execute()
+
+        self.assertEqual(procedure.completed_steps, 4)
+        self.assertLess(started['c'], 0.5)
+        self.assertGreaterEqual(started['d'], finished['b'])
+
+    def test_worker_pool(self):
+        """
+        Test that parallel steps are executed by a bounded worker pool.
+        """
+
+        procedure = self.create_step_procedure('Test worker pool procedure')
+        procedure.max_workers = 2
+        threads = set()
+
+        def record_thread():
+            sleep(0.01)
+            threads.add(current_thread().name)
+
+        for _ in range(20):
+            procedure.add_step(record_thread, parallel = True)
+
+        procedure._execute()
+
+        self.assertEqual(procedure.completed_steps, 20)
+        self.assertLessEqual(len(threads), 2)
+        self.assertLessEqual(procedure._worker_pool.threads, 2)
+
+    def test_process_steps(self):
+        """
+        Test steps executed in worker processes.
+        """
+
+        procedure = self.create_step_procedure('Test process procedure')
+        pid_path = self.project_path / 'pid.txt'
+
+        procedure.add_step(
+            write_pid,
+            parallel = True,
+            executor = 'process',
+            params = {'path': pid_path}
+        )
+        procedure.add_step(raise_process_error, executor = 'process')
+
+        with self.assertRaises(ValueError):
+            procedure._execute()
+
+        self.assertNotEqual(int(pid_path.read_text()), os.getpid())
+        self.assertEqual(procedure.completed_steps, 1)
+        self.assertEqual(procedure.failed_steps, 1)
+
+        # Methods of the procedure, like the ones added by the templates,
+        # are executed by a copy of the procedure in the worker process
+        name = 'Test process method procedure'
+
+        create_procedure(name, 'step', self.project_path)
+        self.procedure_loader._load_all_procedures()
+
+        procedure_class = self.procedure_loader.load(name)
+        procedure_class.get_process_id = get_process_id
+        procedure_class.set_up = lambda self: self.add_step(
+            self.get_process_id,
+            executor = 'process'
+        )
+
+        procedure = procedure_class(self.config)
+        procedure._execute()
+
+        self.assertTrue(procedure.finished)
+        self.assertNotEqual(
+            procedure.get_result('get_process_id'),
+            os.getpid()
+        )
+
+        self.assertRaises(
+            ValueError,
+            lambda: procedure.add_step(write_pid, executor = 'fiber')
+        )
+
+    def test_step_results(self):
+        """
+        Test passing the results of steps to other steps.
+        """
+
+        procedure = self.create_step_procedure('Test results procedure')
+        data = list(range(10))
+
+        procedure.add_step(lambda: data, 'load')
+        procedure.add_step(
+            lambda values: [value + 1 for value in values],
+            'increment',
+            parallel = True,
+            inputs = {'values': 'load'}
+        )
+        procedure.add_step(
+            square,
+            parallel = True,
+            executor = 'process',
+            params = {'value': 3}
+        )
+        procedure.add_step(
+            lambda values, squared: sum(values) + squared,
+            'total',
+            inputs = {'values': 'increment', 'squared': 'square'}
+        )
+
+        procedure._execute()
+
+        self.assertIs(procedure.get_result('load'), data)
+        self.assertEqual(procedure.get_result('square'), 9)
+        self.assertEqual(procedure.get_result('total'), 64)
+        self.assertRaises(KeyError, lambda: procedure.get_result('missing'))
+
+    def test_checkpoint(self):
+        """
+        Test resuming an interrupted procedure from its checkpoint, only
+        with the same parameters.
+        """
+
+        calls = []
+
+        def create_procedure(mode: str = 'a', suffix: str = ''):
+            procedure = self.create_step_procedure(
+                'Test checkpoint procedure'
+            )
+            procedure.checkpoint = True
+            procedure.checkpoint_results = True
+            procedure.params = [ProcedureParam('mode', str, mode)]
+
+            procedure.add_step(
+                lambda suffix: calls.append('load') or 'data' + suffix,
+                'load',
+                params = {'suffix': suffix}
+            )
+            procedure.add_step(
+                lambda data: calls.append('transform') or data.upper(),
+                'transform',
+                inputs = {'data': 'load'}
+            )
+            procedure.add_step(lambda: calls.append('save'), 'save')
+
+            return procedure
+
+        def interrupt(procedure: StepProcedure):
+            procedure._steps[-1]['function'] = raise_process_error
+
+            with self.assertRaises(ValueError):
+                procedure._execute()
+
+        procedure = create_procedure()
+        interrupt(procedure)
+
+        self.assertEqual(calls, ['load', 'transform'])
+        self.assertTrue(procedure._get_checkpoint().path.exists())
+
+        # An entry truncated while storing it is removed when loading
+        checkpoint = procedure._get_checkpoint()
+        size = checkpoint.path.stat().st_size
+
+        with open(checkpoint.path, 'ab') as checkpoint_file:
+            checkpoint_file.write(b'\x80\x05\x95truncated')
+
+        self.assertEqual(
+            [entry['result'] for entry in checkpoint.load().values()],
+            ['data', 'DATA']
+        )
+        self.assertEqual(checkpoint.path.stat().st_size, size)
+
+        # Executions with other parameters use their own checkpoint
+        calls.clear()
+        other_procedure = create_procedure('b')
+        other_procedure._execute()
+
+        self.assertEqual(calls, ['load', 'transform', 'save'])
+        self.assertNotEqual(
+            other_procedure._get_checkpoint().path,
+            procedure._get_checkpoint().path
+        )
+        self.assertTrue(procedure._get_checkpoint().path.exists())
+
+        calls.clear()
+
+        procedure = create_procedure()
+        procedure._execute()
+
+        self.assertEqual(calls, ['save'])
+        self.assertEqual(procedure.get_result('transform'), 'DATA')
+        self.assertEqual(procedure.completed_steps, 3)
+        self.assertFalse(procedure._get_checkpoint().path.exists())
+
+        # Steps whose parameters or inputs changed are executed again
+        interrupt(create_procedure())
+        calls.clear()
+
+        procedure = create_procedure(suffix = '!')
+        procedure._execute()
+
+        self.assertEqual(calls, ['load', 'transform', 'save'])
+        self.assertEqual(procedure.get_result('transform'), 'DATA!')
+
+    def test_cancellation(self):
+        """
+        Test that running steps are stopped when a blocking step fails.
+        """
+
+        procedure = self.create_step_procedure('Test cancellation procedure')
+        procedure.cancel_timeout = 0.2
+        cancelled = []
+
+        def cooperative(cancel_token):
+            try:
+                cancel_token.sleep(10)
+
+            except Exception:
+                cancelled.append(cancel_token.cancelled)
+                raise
+
+        def fail():
+            sleep(0.1)
+            raise ValueError('Test error')
+
+        procedure.add_step(cooperative, parallel = True, blocking = False)
+        procedure.add_step(lambda: sleep(2), 'stubborn', parallel = True)
+        procedure.add_step(fail, parallel = True)
+
+        started_at = perf_counter()
+
+        with self.assertRaisesRegex(ValueError, 'Test error'):
+            procedure._execute()
+
+        self.assertLess(perf_counter() - started_at, 1)
+        self.assertEqual(cancelled, [True])
+        self.assertFalse(procedure.finished)
+
+        # Process steps are stopped by a failing step or by the exit event
+        for stop in ('fail', 'exit'):
+            procedure = self.create_step_procedure(
+                f'Test process cancellation {stop}'
+            )
+            procedure.cancel_timeout = 10
+
+            procedure.add_step(
+                check_cancellation,
+                parallel = True,
+                blocking = False,
+                params = {'seconds': 5},
+                executor = 'process'
+            )
+
+            if stop == 'fail':
+                procedure.add_step(fail, parallel = True)
+
+            else:
+                Timer(0.5, exit_event.set).start()
+
+            started_at = perf_counter()
+
+            try:
+                procedure._execute()
+
+            except ValueError:
+                self.assertEqual(stop, 'fail')
+
+            exit_event.clear()
+
+            self.assertLess(perf_counter() - started_at, 3)
+            self.assertIsNone(procedure.get_result('check_cancellation'))
+            self.assertFalse(procedure.finished)
+
+    def test_stubborn_cancellation(self):
+        """
+        Test that a procedure returns within the cancel timeout when it is
+        cancelled or the exit event is set, even if its running steps
+        ignore their token.
+        """
+
+        for stop in ('cancel', 'exit'):
+            procedure = self.create_step_procedure(
+                f'Test stubborn cancellation {stop}'
+            )
+            procedure.cancel_timeout = 0.2
+            release = Event()
+
+            procedure.add_step(lambda: release.wait(5), parallel = True)
+
+            Timer(
+                0.2,
+                procedure.cancel if stop == 'cancel' else exit_event.set
+            ).start()
+
+            started_at = perf_counter()
+
+            try:
+                procedure._execute()
+
+            finally:
+                release.set()
+                exit_event.clear()
+
+            self.assertLess(perf_counter() - started_at, 1, stop)
+            self.assertFalse(procedure.finished)
+
+    def test_concurrent_procedures(self):
+        """
+        Test that procedures running in the same process have their own
+        steps and are not stopped by the failures of the others.
+        """
+
+        procedures = [
+            self.create_step_procedure('Test concurrent procedure')
+            for _ in range(2)
+        ]
+        failing, passing = procedures
+
+        def fail():
+            raise ValueError('Test error')
+
+        failing.add_step(fail, parallel = True)
+        passing.add_step(lambda cancel_token: cancel_token.sleep(0.2))
+        passing.add_step(lambda: 'done', 'last')
+
+        self.assertEqual([p.total_steps for p in procedures], [1, 2])
+
+        threads = [Thread(target = p._execute) for p in procedures]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertTrue(failing.cancelled)
+        self.assertFalse(failing.finished)
+        self.assertFalse(passing.cancelled)
+        self.assertTrue(passing.finished)
+        self.assertEqual(passing.get_result('last'), 'done')
+
+    def test_timeouts_and_retries(self):
+        """
+        Test the timeouts and the retries of the steps.
+        """
+
+        procedure = self.create_step_procedure('Test retries procedure')
+        attempts = []
+
+        def flaky():
+            attempts.append(perf_counter())
+
+            if len(attempts) < 3:
+                raise ConnectionError('Test error')
+
+            return len(attempts)
+
+        def hang(cancel_token):
+            cancel_token.wait()
+
+        procedure.add_step(flaky, parallel = True, retries = 3, backoff = 0.05)
+        procedure.add_step(
+            hang,
+            parallel = True,
+            blocking = False,
+            timeout = 0.1,
+            retries = 1
+        )
+
+        procedure._execute()
+
+        self.assertEqual(procedure.get_result('flaky'), 3)
+        self.assertGreaterEqual(attempts[1] - attempts[0], 0.05)
+        self.assertGreaterEqual(attempts[2] - attempts[1], 0.1)
+
+        self.assertEqual(procedure.completed_steps, 1)
+        self.assertEqual(procedure.failed_steps, 1)
+        self.assertEqual(procedure.retries, 3)
+        self.assertEqual(procedure.timeouts, 2)
+        self.assertEqual(procedure._steps[1]['attempts'], 2)
+
+        # A process step which times out is asked to stop, freeing its
+        # worker process for the next steps
+        procedure = self.create_step_procedure('Test process timeout')
+        procedure.max_processes = 1
+
+        procedure.add_step(
+            check_cancellation,
+            blocking = False,
+            params = {'seconds': 5},
+            executor = 'process',
+            timeout = 0.3
+        )
+        procedure.add_step(square, params = {'value': 3}, executor = 'process')
+
+        started_at = perf_counter()
+
+        procedure._execute()
+
+        self.assertLess(perf_counter() - started_at, 3)
+        self.assertEqual(procedure.get_result('square'), 9)
+        self.assertEqual(procedure.timeouts, 1)
+
+    def test_step_profiles(self):
+        """
+        Test the wall time, CPU time, memory and thread of each step attempt.
+        """
+
+        procedure = self.create_step_procedure('Test profiles procedure')
+        attempts = []
+
+        def busy():
+            started = perf_counter()
+
+            while perf_counter() - started < 0.05:
+                pass
+
+            return current_thread().ident
+
+        def allocate():
+            attempts.append(bytearray(32 * 1024 * 1024))
+
+            if len(attempts) < 2:
+                raise ConnectionError('Test error')
+
+        procedure.add_step(busy)
+        procedure.add_step(allocate, parallel = True, retries = 1, backoff = 0)
+        procedure.add_step(square, executor = 'process', params = {'value': 2})
+        procedure.add_step(
+            lambda cancel_token: cancel_token.wait(),
+            'hang',
+            blocking = False,
+            timeout = 0.05
+        )
+
+        procedure._execute()
+
+        busy_profile, = procedure.get_step_profiles('busy')
+        self.assertGreaterEqual(busy_profile.wall_time, 0.05)
+        self.assertGreater(busy_profile.cpu_time, 0.025)
+        self.assertEqual(busy_profile.thread_id, procedure.get_result('busy'))
+        self.assertEqual(busy_profile.status, 'completed')
+
+        allocate_profiles = procedure.get_step_profiles('allocate')
+        self.assertEqual(
+            [(profile.attempt, profile.status) for profile in allocate_profiles],
+            [(1, 'failed'), (2, 'completed')]
+        )
+
+        if allocate_profiles[0].memory_delta is not None:
+            self.assertGreater(
+                max(profile.memory_delta for profile in allocate_profiles),
+                0
+            )
+
+        square_profile, = procedure.get_step_profiles('square')
+        self.assertNotEqual(square_profile.process_id, os.getpid())
+
+        hang_profile, = procedure.get_step_profiles('hang')
+        self.assertEqual(hang_profile.status, 'timeout')
+        self.assertIsNone(hang_profile.cpu_time)
+
+        summary = procedure.metrics.summarize_profiles()
+        self.assertEqual(
+            sorted(summary),
+            ['allocate', 'busy', 'hang', 'square']
+        )
+        self.assertEqual(summary['allocate']['attempts'], 2)
+        self.assertEqual(summary['allocate']['status'], 'completed')
+        self.assertEqual(len(procedure._dashboard_widgets), 2)
+
+    def test_map_step(self):
+        """
+        Test map steps consuming a generator in chunks.
+        """
+
+        procedure = self.create_step_procedure('Test map procedure')
+        procedure.max_workers = 2
+        consumed = []
+        streamed = []
+
+        def generate(count):
+            for item in range(count):
+                consumed.append(item)
+                yield item
+
+        def check_bounded(item):
+            # The generator is never more than the in-flight chunks ahead
+            self.assertLess(len(consumed) - item, 10 * 2 * 2 + 10)
+            return item * 2
+
+        procedure.map_step(
+            check_bounded,
+            generate(1000),
+            chunk_size = 10,
+            parallel = True,
+            on_result = streamed.append,
+            collect = True
+        )
+        procedure.map_step(
+            square,
+            range(20),
+            chunk_size = 5,
+            executor = 'process',
+            collect = True
+        )
+        procedure.map_step(
+            lambda item, offset: item + offset,
+            range(5),
+            'count',
+            params = {'offset': 1}
+        )
+
+        procedure._execute()
+
+        expected = [item * 2 for item in range(1000)]
+
+        self.assertEqual(streamed, expected)
+        self.assertEqual(procedure.get_result('check_bounded'), expected)
+        self.assertEqual(
+            procedure.get_result('square'),
+            [item * item for item in range(20)]
+        )
+        self.assertEqual(procedure.get_result('count'), 5)
+        self.assertEqual(procedure.completed_steps, 3)
+
     def test_step_procedure(self):
         """
         Test the step procedure.
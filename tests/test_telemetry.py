@@ -0,0 +1,154 @@
+import unittest
+import time
+
+from ambrogio.procedures.param import ProcedureParam
+from ambrogio.utils.project import create_procedure
+from ambrogio.utils.telemetry import RunTelemetry
+
+from . import AmbrogioTestCase
+
+
+class TestTelemetry(AmbrogioTestCase):
+    """
+    Test the telemetry of procedure runs.
+    """
+
+    def test_run_telemetry(self):
+        """
+        Test that each run appends a record with its status, timings and
+        step metrics to the telemetry file of its procedure.
+        """
+
+        name = 'Test telemetry procedure'
+
+        create_procedure(name, 'step', self.project_path)
+        self.procedure_loader._load_all_procedures()
+
+        procedure_class = self.procedure_loader.load(name)
+        procedure_class.params = [ProcedureParam('fail', bool, value = False)]
+
+        def set_up(procedure):
+            procedure.add_step(lambda: 3, 'answer')
+
+            if procedure.get_param('fail').value:
+                procedure.add_step(lambda: int('one'), 'parse')
+
+        procedure_class.set_up = set_up
+
+        procedure = self.procedure_loader.run(name)
+        procedure.metrics.record_performances({'memory': 10, 'threads': 2})
+        procedure.metrics.record_performances({'memory': 5, 'threads': 3})
+
+        self.assertEqual(
+            procedure.metrics.max_performances,
+            {'memory': 10, 'threads': 3}
+        )
+
+        with self.assertRaises(ValueError):
+            procedure_class.with_params(fail = True)(self.config)._run()
+
+        telemetry = RunTelemetry(self.project_path / '.ambrogio' / 'runs')
+        telemetry_path = telemetry.get_file_path(name)
+
+        self.assertEqual(telemetry_path.name, 'test_telemetry_procedure.jsonl')
+
+        with open(telemetry_path, 'a') as telemetry_file:
+            telemetry_file.write('not valid\n')
+
+        completed, failed = telemetry.read(name)
+
+        self.assertEqual(completed['procedure'], name)
+        self.assertEqual(completed['status'], 'completed')
+        self.assertEqual(completed['params'], {'fail': False})
+        self.assertEqual(completed['counters']['completed'], 1)
+        self.assertEqual(completed['steps']['answer']['attempts'], 1)
+        self.assertGreaterEqual(completed['elapsed'], 0)
+        self.assertGreaterEqual(completed['memory_delta'], 0)
+        self.assertGreater(completed['process_peak_memory'], 0)
+        self.assertIn('cpu_count', completed['host'])
+
+        # The run is shorter than the sampling interval
+        self.assertIsNone(completed['max_memory'])
+
+        self.assertEqual(failed['status'], 'failed')
+        self.assertEqual(failed['params'], {'fail': True})
+        self.assertEqual(failed['steps']['parse']['failed'], 1)
+        self.assertEqual(failed['steps']['parse']['status'], 'failed')
+        self.assertIn('one', failed['error'])
+        self.assertNotEqual(failed['run_id'], completed['run_id'])
+
+        self.assertEqual(len(telemetry.read()), 2)
+
+        procedure_class.telemetry = False
+        self.procedure_loader.run(name)
+
+        self.assertEqual(len(telemetry.read(name)), 2)
+
+    def test_parallel_step_failure(self):
+        """
+        Test that a run is recorded as failed when a blocking parallel step
+        raises an exception.
+        """
+
+        for template in ('step', 'async_step'):
+            name = f'Test failed {template} procedure'
+
+            create_procedure(name, template, self.project_path)
+            self.procedure_loader._load_all_procedures()
+
+            def set_up(procedure):
+                procedure.add_step(lambda: time.sleep(0.05), 'wait')
+                procedure.add_step(
+                    lambda: int('one'),
+                    'parse',
+                    parallel = True
+                )
+
+            procedure_class = self.procedure_loader.load(name)
+            procedure_class.set_up = set_up
+
+            with self.assertRaises(ValueError):
+                self.procedure_loader.run(name)
+
+            run, = RunTelemetry(
+                self.project_path / '.ambrogio' / 'runs'
+            ).read(name)
+
+            self.assertEqual(run['status'], 'failed', template)
+            self.assertIn('one', run['error'])
+            self.assertEqual(run['steps']['parse']['status'], 'failed')
+
+    def test_run_sampling(self):
+        """
+        Test that the performances of the process are sampled while a
+        procedure runs, storing their max values in its record.
+        """
+
+        name = 'Test sampled procedure'
+
+        create_procedure(name, 'step', self.project_path)
+        self.procedure_loader._load_all_procedures()
+
+        procedure_class = self.procedure_loader.load(name)
+        procedure_class.telemetry_interval = 0.05
+        procedure_class.set_up = lambda procedure: procedure.add_step(
+            lambda: time.sleep(0.3),
+            'wait'
+        )
+
+        procedure = self.procedure_loader.run(name)
+
+        self.assertGreater(procedure.metrics.max_performances['memory'], 0)
+
+        run, = RunTelemetry(self.project_path / '.ambrogio' / 'runs').read(name)
+
+        self.assertEqual(
+            run['max_memory'],
+            procedure.metrics.max_performances['memory']
+        )
+        self.assertGreaterEqual(run['max_threads'], 1)
+        self.assertGreaterEqual(run['memory_delta'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
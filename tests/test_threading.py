@@ -0,0 +1,51 @@
+import unittest
+from threading import Thread
+from time import perf_counter, sleep
+
+from ambrogio.utils.threading import PauseEvent
+
+
+class TestThreading(unittest.TestCase):
+    """
+    Test the threading utilities.
+    """
+
+    def test_pause_event(self):
+        """
+        Test that paused threads are resumed as soon as the event is cleared.
+        """
+
+        pause_event = PauseEvent()
+        resumed_at = []
+
+        def wait():
+            pause_event.wait_resume()
+            resumed_at.append(perf_counter())
+
+        self.assertTrue(pause_event.wait_resume(0))
+
+        pause_event.set()
+        self.assertTrue(pause_event.is_set())
+        self.assertFalse(pause_event.wait_resume(0))
+
+        threads = [Thread(target = wait) for _ in range(5)]
+
+        for thread in threads:
+            thread.start()
+
+        sleep(0.1)
+        self.assertEqual(resumed_at, [])
+
+        cleared_at = perf_counter()
+        pause_event.clear()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertFalse(pause_event.is_set())
+        self.assertEqual(len(resumed_at), 5)
+        self.assertLess(max(resumed_at) - cleared_at, 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()